@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Async load client for the n8n Voice-Activated Trading System
+
+Asyncio sibling of N8nVoiceTradingTester (test-voic2trade.py). It exposes the
+same test_* methods as coroutines and adds a runner that keeps many requests
+in flight at once, so the workflow can be exercised under concurrent load
+instead of one call per second.
+"""
+
+import asyncio
+import json
+import time
+
+import aiohttp
+
+from latency_stats import LatencyHistogram, LatencyRecorder, record_server_timing, server_stage_timings
+from resilience import DEFAULT_TIMEOUT, DEFAULT_TIMEOUTS
+
+
+class AsyncN8nVoiceTradingTester:
+    """Async test client for n8n voice trading workflow"""
+
+    def __init__(self, base_url, verbose=False, connection_limit=100, timeouts=None, connection_limit_per_host=0):
+        """
+        Initialize the tester
+
+        Args:
+            base_url: Base URL of your n8n instance (e.g., 'https://your-n8n-instance.com')
+            verbose: Print status code and response body for every call
+            connection_limit: Maximum number of simultaneous connections
+            timeouts: Dict mapping endpoint to a (connect, read) timeout tuple,
+                merged over resilience.DEFAULT_TIMEOUTS
+            connection_limit_per_host: Maximum simultaneous connections to one
+                host, 0 for no limit besides connection_limit
+        """
+        self.base_url = base_url.rstrip('/')
+        self.verbose = verbose
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.session = None
+        self.stats = LatencyRecorder()
+        self.stage_stats = LatencyRecorder()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        """Create the underlying aiohttp session"""
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.connection_limit,
+                                             limit_per_host=self.connection_limit_per_host)
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                headers={'Content-Type': 'application/json'},
+                trace_configs=[phase_trace_config()]
+            )
+
+    async def close(self):
+        """Close the underlying aiohttp session"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _request(self, method, endpoint, description, payload=None, params=None):
+        """
+        Send a request to a workflow webhook
+
+        Args:
+            method: HTTP method
+            endpoint: Webhook path below /webhook/
+            description: Text printed before the request in verbose mode
+            payload: JSON body
+            params: Query string parameters
+
+        Returns:
+            API response
+        """
+        await self.open()
+        url = f"{self.base_url}/webhook/{endpoint}"
+
+        if self.verbose:
+            print(description)
+
+        connect, read = self.timeouts.get(endpoint, DEFAULT_TIMEOUT)
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=connect, sock_read=read)
+
+        phases = {}
+        started = time.monotonic()
+        async with self.session.request(method, url, json=payload, params=params, timeout=timeout,
+                                        trace_request_ctx=phases) as response:
+            headers_received = time.monotonic()
+            body = await response.read()
+        finished = time.monotonic()
+
+        phases["ttfb"] = headers_received - started
+        phases["body"] = finished - headers_received
+        self.stats.record(endpoint, finished - started, phases=phases, started=started)
+        result = json.loads(body) if body else {}
+        stages = server_stage_timings(response.headers, result)
+        if stages:
+            record_server_timing(self.stage_stats, endpoint, finished - started, stages, started=started)
+
+        if self.verbose:
+            print(f"Status Code: {response.status}")
+            print(f"Latency: {(finished - started) * 1000:.1f} ms")
+            print(f"Response: {json.dumps(result, indent=2)}")
+            print("-" * 50)
+
+        return result
+
+    async def test_voice_command(self, audio_url, user_id="test_user"):
+        """
+        Test voice command processing
+
+        Args:
+            audio_url: URL to audio file
+            user_id: User identifier
+
+        Returns:
+            API response
+        """
+        payload = {
+            "audio_url": audio_url,
+            "user_id": user_id
+        }
+        return await self._request("POST", "voice-command",
+                                   f"Testing voice command with audio: {audio_url}",
+                                   payload=payload)
+
+    async def test_balance(self, exchange="binance"):
+        """
+        Test balance retrieval
+
+        Args:
+            exchange: Exchange name (binance, coinbase)
+
+        Returns:
+            API response
+        """
+        return await self._request("GET", "balance",
+                                   f"Testing balance retrieval for {exchange}",
+                                   params={"exchange": exchange})
+
+    async def test_orders(self, exchange="binance"):
+        """
+        Test orders retrieval
+
+        Args:
+            exchange: Exchange name (binance, coinbase)
+
+        Returns:
+            API response
+        """
+        return await self._request("GET", "orders",
+                                   f"Testing orders retrieval for {exchange}",
+                                   params={"exchange": exchange})
+
+    async def test_no_audio_input(self):
+        """
+        Test voice command processing with no audio input
+
+        Returns:
+            API response
+        """
+        payload = {
+            "user_id": "test_user"
+            # Missing audio_url field
+        }
+        return await self._request("POST", "voice-command",
+                                   "Testing voice command with no audio input",
+                                   payload=payload)
+
+    async def test_empty_audio_url(self):
+        """
+        Test voice command processing with empty audio URL
+
+        Returns:
+            API response
+        """
+        payload = {
+            "audio_url": "",
+            "user_id": "test_user"
+        }
+        return await self._request("POST", "voice-command",
+                                   "Testing voice command with empty audio URL",
+                                   payload=payload)
+
+    async def test_malformed_request(self):
+        """
+        Test voice command processing with malformed request
+
+        Returns:
+            API response
+        """
+        payload = {
+            "invalid_field": "invalid_value",
+            "another_invalid": 123
+        }
+        return await self._request("POST", "voice-command",
+                                   "Testing voice command with malformed request",
+                                   payload=payload)
+
+    async def test_passing_error_response(self):
+        """
+        Test voice command processing that triggers error response nodes
+
+        Returns:
+            API response
+        """
+        payload = {
+            "audio_url": "https://github.com/TigranGalstyan/molecula_test_files/raw/refs/heads/main/non_trade.m4a",
+            "user_id": "test_user"
+        }
+        return await self._request("POST", "voice-command",
+                                   "Testing voice command that should trigger error response",
+                                   payload=payload)
+
+
+def phase_trace_config():
+    """
+    aiohttp trace hooks that time DNS resolution and connection setup
+
+    The phases are written into the dict passed as trace_request_ctx. They are
+    only present when the request had to resolve a host or open a new
+    connection; 'connect' covers TCP connect plus TLS handshake.
+    """
+    async def on_dns_start(session, context, params):
+        context.trace_request_ctx["_dns_start"] = time.monotonic()
+
+    async def on_dns_end(session, context, params):
+        phases = context.trace_request_ctx
+        phases["dns"] = time.monotonic() - phases.pop("_dns_start")
+
+    async def on_connect_start(session, context, params):
+        context.trace_request_ctx["_connect_start"] = time.monotonic()
+
+    async def on_connect_end(session, context, params):
+        phases = context.trace_request_ctx
+        # Connection creation includes the DNS lookup, report it separately
+        phases["connect"] = time.monotonic() - phases.pop("_connect_start") - phases.get("dns", 0.0)
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_dns_resolvehost_start.append(on_dns_start)
+    trace_config.on_dns_resolvehost_end.append(on_dns_end)
+    trace_config.on_connection_create_start.append(on_connect_start)
+    trace_config.on_connection_create_end.append(on_connect_end)
+    return trace_config
+
+
+async def run_concurrent(make_call, total, concurrency):
+    """
+    Run `total` calls with at most `concurrency` of them in flight
+
+    Args:
+        make_call: Callable taking the call index and returning a coroutine
+        total: Number of calls to make
+        concurrency: Maximum number of simultaneous in-flight calls, at least 1
+
+    Returns:
+        Dict with per-call results (in call order), wall time and throughput
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+    results = [None] * total
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < total:
+            index = next_index
+            next_index += 1
+
+            start = time.perf_counter()
+            try:
+                result = await make_call(index)
+                record = {"index": index, "ok": True, "result": result}
+            except Exception as e:
+                record = {"index": index, "ok": False, "error": str(e)}
+            record["latency"] = time.perf_counter() - start
+            results[index] = record
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+    wall_time = time.perf_counter() - started
+
+    return {
+        "results": results,
+        "total": total,
+        "concurrency": concurrency,
+        "succeeded": sum(1 for r in results if r["ok"]),
+        "failed": sum(1 for r in results if not r["ok"]),
+        "wall_time": wall_time,
+        "throughput": total / wall_time if wall_time > 0 else 0.0,
+    }
+
+
+def print_load_summary(summary):
+    """Print the outcome of a run_concurrent() call"""
+    histogram = LatencyHistogram()
+    for r in summary["results"]:
+        histogram.record(r["latency"])
+
+    print(f"   Requests:    {summary['total']} ({summary['concurrency']} concurrent)")
+    print(f"   Succeeded:   {summary['succeeded']}")
+    print(f"   Failed:      {summary['failed']}")
+    print(f"   Wall time:   {summary['wall_time']:.2f}s")
+    print(f"   Throughput:  {summary['throughput']:.1f} req/s")
+    if histogram.count:
+        print(f"   Latency:     p50 {histogram.percentile(50) * 1000:.0f}ms / "
+              f"p90 {histogram.percentile(90) * 1000:.0f}ms / "
+              f"p99 {histogram.percentile(99) * 1000:.0f}ms / "
+              f"p99.9 {histogram.percentile(99.9) * 1000:.0f}ms / "
+              f"max {histogram.max / 1000:.0f}ms")
+
+    errors = {}
+    for r in summary["results"]:
+        if not r["ok"]:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+    for error, count in sorted(errors.items(), key=lambda item: -item[1]):
+        print(f"   ❌ {count}x {error}")
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Audio pre-processing for voice command uploads
+
+Speech recognition only needs 16 kHz mono, while the fixtures are 44.1 kHz
+AAC/MP3. This module decodes a recording with ffmpeg, trims leading and
+trailing silence with a vectorized NumPy energy detector, downmixes and
+resamples to 16 kHz mono and re-encodes to a compact speech codec (Opus in
+Ogg by default), so uploads carry fewer bytes.
+
+Requires numpy and an ffmpeg binary (set FFMPEG to override its path).
+"""
+
+import os
+import struct
+import subprocess
+import time
+
+import numpy as np
+
+FFMPEG = os.environ.get("FFMPEG", "ffmpeg")
+
+TARGET_RATE = 16000
+
+
+def decode(path, ffmpeg=FFMPEG):
+    """
+    Decode an audio file to floating point samples
+
+    ffmpeg writes 16-bit WAV to a pipe; the channel count and sample rate
+    are read from its header so no ffprobe is needed.
+
+    Args:
+        path: Audio file readable by ffmpeg
+        ffmpeg: ffmpeg executable
+
+    Returns:
+        Tuple of (samples, sample_rate); samples has shape (frames, channels)
+        with values in [-1, 1]
+    """
+    wav = subprocess.run(
+        [ffmpeg, "-v", "error", "-i", path, "-f", "wav", "-acodec", "pcm_s16le", "pipe:1"],
+        check=True, capture_output=True,
+    ).stdout
+
+    if wav[:4] != b"RIFF" or wav[8:12] != b"WAVE":
+        raise ValueError(f"ffmpeg did not produce WAV output for {path}")
+
+    offset = 12
+    channels = sample_rate = None
+    while offset + 8 <= len(wav):
+        chunk_id, chunk_size = struct.unpack_from("<4sI", wav, offset)
+        offset += 8
+        if chunk_id == b"fmt ":
+            _, channels, sample_rate = struct.unpack_from("<HHI", wav, offset)
+        elif chunk_id == b"data":
+            # Sizes are not known up front when ffmpeg writes to a pipe
+            data = wav[offset:]
+            break
+        offset += chunk_size + (chunk_size & 1)
+    else:
+        raise ValueError(f"No audio data in decoded {path}")
+
+    if not channels:
+        raise ValueError(f"No format chunk in decoded {path}")
+    data = data[:len(data) - len(data) % (2 * channels)]
+    samples = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+    return samples.reshape(-1, channels), sample_rate
+
+
+def downmix(samples):
+    """Average all channels into one"""
+    return samples.mean(axis=1) if samples.ndim == 2 else samples
+
+
+def resample(signal, source_rate, target_rate=TARGET_RATE, taps=101):
+    """
+    Resample a mono signal
+
+    A Hamming-windowed sinc low-pass removes content above the target Nyquist
+    frequency before linear interpolation onto the new sample grid.
+
+    Args:
+        signal: 1-D float array
+        source_rate: Sample rate of signal
+        target_rate: Desired sample rate
+        taps: Length of the anti-aliasing filter
+    """
+    if source_rate == target_rate or not len(signal):
+        return signal.astype(np.float32)
+
+    if target_rate < source_rate:
+        cutoff = 0.45 * target_rate / source_rate
+        n = np.arange(taps) - (taps - 1) / 2
+        kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)
+        signal = np.convolve(signal, kernel / kernel.sum(), mode="same")
+
+    duration = len(signal) / source_rate
+    positions = np.arange(int(duration * target_rate)) * (source_rate / target_rate)
+    return np.interp(positions, np.arange(len(signal)), signal).astype(np.float32)
+
+
+def trim_silence(signal, sample_rate, frame_ms=20, threshold_db=-35.0, padding_ms=150):
+    """
+    Cut leading and trailing silence using frame energy
+
+    Frames whose RMS energy is more than threshold_db below the loudest frame
+    count as silence. padding_ms of audio is kept around the voiced region so
+    word onsets are not clipped.
+
+    Args:
+        signal: 1-D float array
+        sample_rate: Sample rate of signal
+        frame_ms: Analysis frame length
+        threshold_db: Energy threshold relative to the loudest frame
+        padding_ms: Audio kept before the first and after the last voiced frame
+
+    Returns:
+        Tuple of (trimmed signal, seconds cut at the start, seconds cut at the end)
+    """
+    frame = max(1, int(sample_rate * frame_ms / 1000))
+    count = len(signal) // frame
+    if count == 0:
+        return signal, 0.0, 0.0
+
+    frames = signal[:count * frame].reshape(count, frame)
+    energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-12)
+    voiced = np.flatnonzero(energy_db > energy_db.max() + threshold_db)
+    if not len(voiced):
+        return signal, 0.0, 0.0
+
+    padding = int(sample_rate * padding_ms / 1000)
+    start = max(0, voiced[0] * frame - padding)
+    end = min(len(signal), (voiced[-1] + 1) * frame + padding)
+    return signal[start:end], start / sample_rate, (len(signal) - end) / sample_rate
+
+
+def encode(signal, sample_rate, output_path, codec="libopus", bitrate="16k", ffmpeg=FFMPEG):
+    """
+    Encode a mono float signal with ffmpeg
+
+    Args:
+        signal: 1-D float array
+        sample_rate: Sample rate of signal
+        output_path: Destination file, its extension picks the container
+        codec: ffmpeg audio encoder
+        bitrate: Target bitrate
+        ffmpeg: ffmpeg executable
+    """
+    pcm = np.clip(signal, -1.0, 1.0).astype("<f4").tobytes()
+    command = [ffmpeg, "-v", "error", "-y",
+               "-f", "f32le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0",
+               "-c:a", codec, "-b:a", bitrate]
+    if codec == "libopus":
+        command += ["-application", "voip"]
+    subprocess.run(command + [output_path], input=pcm, check=True, capture_output=True)
+
+
+def preprocess_file(path, output_dir=".preprocessed", target_rate=TARGET_RATE,
+                    codec="libopus", bitrate="16k", extension="ogg", **trim_options):
+    """
+    Trim, downmix, resample and re-encode one recording
+
+    Args:
+        path: Source audio file
+        output_dir: Directory for processed files
+        target_rate: Output sample rate
+        codec: ffmpeg audio encoder
+        bitrate: Target bitrate
+        extension: Output container extension
+        **trim_options: Passed to trim_silence()
+
+    Returns:
+        Dict describing the output file, byte sizes, durations and time spent
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    output_path = os.path.join(output_dir, f"{stem}.{target_rate // 1000}k.{extension}")
+
+    started = time.perf_counter()
+    samples, source_rate = decode(path)
+    mono = resample(downmix(samples), source_rate, target_rate)
+    trimmed, leading, trailing = trim_silence(mono, target_rate, **trim_options)
+
+    encode(trimmed, target_rate, output_path, codec=codec, bitrate=bitrate)
+
+    input_bytes = os.path.getsize(path)
+    output_bytes = os.path.getsize(output_path)
+    return {
+        "source": path,
+        "output": output_path,
+        "source_rate": source_rate,
+        "source_channels": samples.shape[1],
+        "input_bytes": input_bytes,
+        "output_bytes": output_bytes,
+        "bytes_saved": input_bytes - output_bytes,
+        "input_duration": len(samples) / source_rate,
+        "output_duration": len(trimmed) / target_rate,
+        "trimmed_leading": leading,
+        "trimmed_trailing": trailing,
+        "elapsed": time.perf_counter() - started,
+    }
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Client-side balance cache for the n8n Voice-Activated Trading System
+
+Dashboards poll /webhook/balance for every exchange continuously, although
+balances rarely change between polls. BalanceCache keeps the last snapshot per
+exchange and:
+
+- answers from memory while the snapshot is younger than the TTL,
+- revalidates stale snapshots with a conditional GET (If-None-Match), so an
+  unchanged balance costs a cheap 304 instead of an exchange API call,
+- coalesces concurrent misses: callers that find the same exchange already
+  being fetched wait for that request instead of sending their own.
+
+The cache does not talk HTTP itself; it is given a fetch callable
+(exchange, etag) -> (status, body, etag), so one cache can be shared by
+testers running in several threads.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+
+
+class BalanceCache:
+    """TTL cache of balance snapshots with ETag revalidation and request coalescing"""
+
+    def __init__(self, ttl=5.0, clock=time.monotonic):
+        """
+        Args:
+            ttl: Seconds a snapshot is served without asking the workflow
+            clock: Monotonic time source
+        """
+        self.ttl = ttl
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.in_flight = {}
+        self.counters = {"hits": 0, "coalesced": 0, "revalidated": 0, "fetched": 0, "errors": 0}
+
+    def get(self, exchange, fetch):
+        """
+        Balance snapshot of an exchange
+
+        Args:
+            exchange: Exchange name
+            fetch: Callable (exchange, etag) -> (status, body, etag) performing
+                the (conditional) GET; etag is None for an unconditional request
+
+        Returns:
+            Balance response body
+        """
+        with self.lock:
+            entry = self.entries.get(exchange)
+            if entry is not None and self.clock() - entry["stored_at"] < self.ttl:
+                self.counters["hits"] += 1
+                return entry["body"]
+
+            future = self.in_flight.get(exchange)
+            leader = future is None
+            if leader:
+                future = self.in_flight[exchange] = Future()
+            else:
+                self.counters["coalesced"] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            body = self._refresh(exchange, entry, fetch)
+        except BaseException as e:
+            with self.lock:
+                self.counters["errors"] += 1
+                del self.in_flight[exchange]
+            future.set_exception(e)
+            raise
+        with self.lock:
+            del self.in_flight[exchange]
+        future.set_result(body)
+        return body
+
+    def _refresh(self, exchange, entry, fetch):
+        """Fetch or revalidate one snapshot and store it"""
+        status, body, etag = fetch(exchange, entry["etag"] if entry else None)
+        with self.lock:
+            if status == 304 and entry is not None:
+                self.counters["revalidated"] += 1
+                entry["stored_at"] = self.clock()
+                return entry["body"]
+
+            self.counters["fetched"] += 1
+            # Only successful snapshots are worth keeping
+            if status == 200 and isinstance(body, dict) and body.get("success", True):
+                self.entries[exchange] = {"body": body, "etag": etag, "stored_at": self.clock()}
+            return body
+
+    def invalidate(self, exchange=None):
+        """Drop the snapshot of one exchange, or of all exchanges"""
+        with self.lock:
+            if exchange is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(exchange, None)
+
+    def stats(self):
+        """Counters plus the share of calls that did not reach the exchange"""
+        with self.lock:
+            stats = dict(self.counters)
+        calls = stats["hits"] + stats["coalesced"] + stats["revalidated"] + stats["fetched"]
+        stats["calls"] = calls
+        stats["upstream_requests"] = stats["revalidated"] + stats["fetched"]
+        stats["exchange_calls_saved"] = (calls - stats["fetched"]) / calls if calls else 0.0
+        return stats
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Connection pool sizing and reuse statistics for requests sessions
+
+A requests.Session keeps at most 10 idle connections per host by default.
+When more threads than that share a session, the connections beyond the
+tenth are closed after every response instead of being kept alive. The next
+request then pays a new TCP connect, plus a TLS handshake for HTTPS.
+make_session() mounts an adapter that has a configurable pool size, with
+optional per-host overrides. The adapter also counts, per scheme://host:port:
+
+- requests sent,
+- connects (new TCP connections, including reconnects of dropped ones),
+- TLS handshakes,
+- requests that reused an open connection,
+- connections discarded because the pool was full.
+
+These counters show whether keep-alive works and whether the pool is large
+enough for the concurrency used.
+"""
+
+import threading
+
+import requests
+from requests.adapters import DEFAULT_POOLBLOCK, DEFAULT_POOLSIZE, HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.poolmanager import PoolManager
+
+
+class ConnectionStats:
+    """Thread-safe connection counters per scheme://host:port"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hosts = {}
+
+    def count(self, host, counter, amount=1):
+        with self.lock:
+            counters = self.hosts.setdefault(host, {
+                "requests": 0, "connects": 0, "tls_handshakes": 0, "discarded": 0,
+            })
+            counters[counter] += amount
+
+    def snapshot(self):
+        """Counters per host, with reused requests and the reuse rate"""
+        with self.lock:
+            hosts = {host: dict(counters) for host, counters in self.hosts.items()}
+        for counters in hosts.values():
+            counters["reused"] = max(0, counters["requests"] - counters["connects"])
+            counters["reuse_rate"] = counters["reused"] / counters["requests"] if counters["requests"] else 0.0
+        return hosts
+
+    def reset(self):
+        with self.lock:
+            self.hosts.clear()
+
+
+class _CountingConnection:
+    """Connection mixin reporting every (re)connect to its pool"""
+
+    on_connect = None
+
+    def connect(self):
+        super().connect()
+        if self.on_connect is not None:
+            self.on_connect()
+
+
+class CountingHTTPConnection(_CountingConnection, HTTPConnection):
+    pass
+
+
+class CountingHTTPSConnection(_CountingConnection, HTTPSConnection):
+    pass
+
+
+class _CountingPool:
+    """Connection pool mixin feeding a ConnectionStats"""
+
+    connection_stats = None
+
+    def _count(self, counter):
+        if self.connection_stats is not None:
+            self.connection_stats.count(f"{self.scheme}://{self.host}:{self.port}", counter)
+
+    def _on_connect(self):
+        self._count("connects")
+        if self.scheme == "https":
+            self._count("tls_handshakes")
+
+    def _new_conn(self):
+        conn = super()._new_conn()
+        conn.on_connect = self._on_connect
+        return conn
+
+    def _make_request(self, conn, method, url, *args, **kwargs):
+        self._count("requests")
+        return super()._make_request(conn, method, url, *args, **kwargs)
+
+    def _put_conn(self, conn):
+        if conn is not None and self.pool is not None and self.pool.full():
+            self._count("discarded")
+        super()._put_conn(conn)
+
+
+class CountingHTTPConnectionPool(_CountingPool, HTTPConnectionPool):
+    ConnectionCls = CountingHTTPConnection
+
+
+class CountingHTTPSConnectionPool(_CountingPool, HTTPSConnectionPool):
+    ConnectionCls = CountingHTTPSConnection
+
+
+class CountingPoolManager(PoolManager):
+    """PoolManager with counting pools and per-host pool sizes"""
+
+    def __init__(self, connection_stats, host_pool_sizes=None, **kwargs):
+        super().__init__(**kwargs)
+        self.connection_stats = connection_stats
+        self.host_pool_sizes = dict(host_pool_sizes or {})
+        self.pool_classes_by_scheme = {"http": CountingHTTPConnectionPool, "https": CountingHTTPSConnectionPool}
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        if host in self.host_pool_sizes:
+            request_context = dict(self.connection_pool_kw if request_context is None else request_context)
+            request_context["maxsize"] = self.host_pool_sizes[host]
+        pool = super()._new_pool(scheme, host, port, request_context)
+        pool.connection_stats = self.connection_stats
+        return pool
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter with per-host pool sizes and connection reuse statistics"""
+
+    def __init__(self, pool_connections=DEFAULT_POOLSIZE, pool_maxsize=DEFAULT_POOLSIZE,
+                 pool_block=DEFAULT_POOLBLOCK, host_pool_sizes=None, connection_stats=None):
+        """
+        Args:
+            pool_connections: Hosts whose pools are cached
+            pool_maxsize: Idle connections kept per host
+            pool_block: Wait for a free connection instead of opening an extra one
+            host_pool_sizes: Dict mapping host name to its own pool_maxsize
+            connection_stats: ConnectionStats to feed, a new one is created if omitted
+        """
+        self.host_pool_sizes = dict(host_pool_sizes or {})
+        self.connection_stats = connection_stats if connection_stats is not None else ConnectionStats()
+        super().__init__(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+
+    def init_poolmanager(self, connections, maxsize, block=DEFAULT_POOLBLOCK, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = CountingPoolManager(
+            self.connection_stats, self.host_pool_sizes,
+            num_pools=connections, maxsize=maxsize, block=block, **pool_kwargs,
+        )
+
+
+def make_session(pool_maxsize=DEFAULT_POOLSIZE, host_pool_sizes=None, pool_block=DEFAULT_POOLBLOCK,
+                 connection_stats=None):
+    """
+    requests.Session with a sized, counting connection pool for http and https
+
+    Args:
+        pool_maxsize: Idle connections kept per host; match the number of
+            threads sharing the session
+        host_pool_sizes: Dict mapping host name to its own pool size
+        pool_block: Wait for a free connection instead of opening an extra one
+        connection_stats: ConnectionStats to feed
+
+    Returns:
+        Session; its counters are in session.get_adapter(url).connection_stats
+    """
+    session = requests.Session()
+    adapter = PooledAdapter(pool_maxsize=pool_maxsize, pool_block=pool_block,
+                            host_pool_sizes=host_pool_sizes, connection_stats=connection_stats)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def print_connection_report(snapshot):
+    """Print ConnectionStats.snapshot()"""
+    if not snapshot:
+        print("   No connections opened")
+        return
+    print(f"   {'host':<32}{'requests':>9}{'connects':>10}{'reused':>8}{'reuse':>7}{'TLS':>6}{'discarded':>11}")
+    for host, counters in snapshot.items():
+        print(f"   {host:<32}{counters['requests']:>9}{counters['connects']:>10}{counters['reused']:>8}"
+              f"{counters['reuse_rate']:>7.0%}{counters['tls_handshakes']:>6}{counters['discarded']:>11}")
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Minimal HTTP echo servers for connection benchmarks
+
+EchoServer speaks HTTP/1.1 with keep-alive. H2EchoServer speaks HTTP/2 and
+multiplexes concurrent requests over one connection; it requires the 'h2'
+package. The client sends HTTP/2 directly (prior knowledge) over plain TCP,
+or negotiates it with ALPN when TLS is on. Both servers answer every request
+with a small JSON document describing it. They can add a fixed delay to
+stand in for server work, and they count the connections they accepted and
+the requests they served, so client-side reuse numbers can be checked
+against what the server saw. GET /_stats returns those counters (and
+/_stats?reset=1 zeroes them); it is not counted as a request.
+
+Usage:
+    python echo_server.py --port 8081 --delay-ms 5
+    python echo_server.py --port 8082 --http2 --certfile cert.pem --keyfile key.pem
+"""
+
+import argparse
+import json
+import socketserver
+import ssl
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+STATS_PATH = "/_stats"
+
+
+def echo_body(server, method, path, size):
+    """Response body for a request; answers GET /_stats with the server counters"""
+    if path.split("?")[0] == STATS_PATH:
+        stats = server.stats()
+        if path.endswith("reset=1"):
+            server.reset()
+        return json.dumps(stats).encode("utf-8")
+    if server.delay:
+        time.sleep(server.delay)
+    server.count_request()
+    return json.dumps({"method": method, "path": path, "bytes": size}).encode("utf-8")
+
+
+class _EchoServerMixin:
+    """Counters, optional TLS and background serving shared by both servers"""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def setup_echo(self, delay=0.0, ssl_context=None):
+        self.delay = delay
+        self.ssl_context = ssl_context
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"{'https' if self.ssl_context else 'http'}://{host}:{port}"
+
+    def count_request(self):
+        with self.lock:
+            self.requests += 1
+
+    def stats(self):
+        with self.lock:
+            return {"connections": self.connections, "requests": self.requests}
+
+    def reset(self):
+        with self.lock:
+            self.connections = self.requests = 0
+
+    def get_request(self):
+        sock, address = super().get_request()
+        with self.lock:
+            self.connections += 1
+        if self.ssl_context is not None:
+            # The handshake runs in the connection's thread, not the accept loop
+            sock = self.ssl_context.wrap_socket(sock, server_side=True, do_handshake_on_connect=False)
+        return sock, address
+
+    def start(self):
+        """Serve requests from a background thread"""
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop the background thread and release the socket"""
+        self.shutdown()
+        self.server_close()
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], (ConnectionError, ssl.SSLError)):
+            return
+        super().handle_error(request, client_address)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class EchoRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; with Nagle on, the body of every
+    # response on a reused connection waits for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def echo(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        body = echo_body(self.server, self.command, self.path, length)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = echo
+
+
+class EchoServer(_EchoServerMixin, ThreadingHTTPServer):
+    """Threaded HTTP/1.1 keep-alive echo server"""
+
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0, ssl_context=None):
+        """
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            delay: Seconds every request waits before it is answered
+            ssl_context: Server-side SSLContext to serve HTTPS
+        """
+        super().__init__((host, port), EchoRequestHandler)
+        self.setup_echo(delay, ssl_context)
+
+
+class H2EchoHandler(socketserver.BaseRequestHandler):
+    """One HTTP/2 connection; streams are answered from worker threads"""
+
+    def handle(self):
+        import h2.config
+        import h2.connection
+        import h2.events
+        import h2.exceptions
+
+        conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False, header_encoding="utf-8"))
+        write_lock = threading.Lock()
+        streams = {}
+
+        def flush():
+            data = conn.data_to_send()
+            if data:
+                self.request.sendall(data)
+
+        def respond(stream_id, method, path, size):
+            body = echo_body(self.server, method, path, size)
+            with write_lock:
+                try:
+                    conn.send_headers(stream_id, [(":status", "200"), ("content-type", "application/json"),
+                                                  ("content-length", str(len(body)))])
+                    conn.send_data(stream_id, body, end_stream=True)
+                    flush()
+                except (h2.exceptions.StreamClosedError, OSError):
+                    pass
+
+        with write_lock:
+            conn.initiate_connection()
+            flush()
+        while True:
+            data = self.request.recv(65536)
+            if not data:
+                return
+            with write_lock:
+                events = conn.receive_data(data)
+                for event in events:
+                    if isinstance(event, h2.events.RequestReceived):
+                        headers = dict(event.headers)
+                        streams[event.stream_id] = [headers.get(":method"), headers.get(":path"), 0]
+                    elif isinstance(event, h2.events.DataReceived):
+                        streams[event.stream_id][2] += len(event.data)
+                        conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                    elif isinstance(event, h2.events.StreamEnded):
+                        method, path, size = streams.pop(event.stream_id)
+                        threading.Thread(target=respond, args=(event.stream_id, method, path, size),
+                                         daemon=True).start()
+                    elif isinstance(event, h2.events.StreamReset):
+                        streams.pop(event.stream_id, None)
+                    elif isinstance(event, h2.events.ConnectionTerminated):
+                        flush()
+                        return
+                flush()
+
+
+class H2EchoServer(_EchoServerMixin, socketserver.ThreadingTCPServer):
+    """Threaded HTTP/2 echo server (requires the 'h2' package)"""
+
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0, ssl_context=None):
+        """
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            delay: Seconds every request waits before it is answered
+            ssl_context: Server-side SSLContext; 'h2' is offered via ALPN
+        """
+        import h2  # noqa: F401 - fail early with ImportError when h2 is missing
+
+        if ssl_context is not None:
+            ssl_context.set_alpn_protocols(["h2"])
+        super().__init__((host, port), H2EchoHandler)
+        self.setup_echo(delay, ssl_context)
+
+
+def server_ssl_context(certfile, keyfile=None):
+    """Server-side SSLContext for a PEM certificate and key"""
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(certfile, keyfile)
+    return context
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP echo server for connection benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="Simulated work per request")
+    parser.add_argument("--http2", action="store_true", help="Serve HTTP/2 instead of HTTP/1.1 (requires h2)")
+    parser.add_argument("--certfile", help="PEM certificate to serve HTTPS")
+    parser.add_argument("--keyfile", help="PEM private key of the certificate")
+    args = parser.parse_args()
+
+    context = server_ssl_context(args.certfile, args.keyfile) if args.certfile else None
+    server_class = H2EchoServer if args.http2 else EchoServer
+    try:
+        server = server_class(args.host, args.port, args.delay_ms / 1000, context)
+    except ImportError:
+        parser.error("--http2 requires the 'h2' package (pip install h2)")
+    print(f"🔁 {'HTTP/2' if args.http2 else 'HTTP/1.1'} echo server listening on {server.url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
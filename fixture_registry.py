@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Manifest-driven registry of audio fixtures
+
+fixtures.jsonl describes every recording the tester and the mock workflow
+know about, one JSON object per line:
+
+    {"name": "Buy Bitcoin Market Order", "path": "buy_btc_binance.m4a",
+     "codec": "aac", "duration": 6.15, "sample_rate": 44100, "size": 53473,
+     "sha256": "...", "transcript": "Buy 0.5 Bitcoin on Binance at market price",
+     "intent": {"side": "BUY", ...}, "tags": ["trade", "market"]}
+
+Paths are relative to the manifest. 'intent' is what a correct parse of the
+transcript yields, null for recordings that are not trades.
+
+FixtureManifest reads the manifest lazily. Iterating or filtering streams
+it one line at a time and never opens an audio file, so a corpus of
+thousands of recordings can be enumerated, filtered by tag, codec,
+duration or trade/non-trade, and split into shards for parallel workers
+for the cost of reading the manifest. A fixture's shard follows from its
+sha256, so every worker computes the same split without coordination, and
+copies of the same audio always land on the same worker. Audio bytes are
+read only when a caller asks for them (Fixture.read()).
+
+'build' probes recordings with ffmpeg (codec, duration, sample rate) and
+hashes them; it keeps the names, transcripts, intents and tags of files
+already in the manifest.
+
+Usage:
+    python fixture_registry.py list --tag trade --shard 0/4
+    python fixture_registry.py verify
+    FFMPEG=/path/to/ffmpeg python fixture_registry.py build *.m4a *.mp3
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+
+from transcription_cache import hash_audio_file
+
+MANIFEST_NAME = "fixtures.jsonl"
+DEFAULT_MANIFEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), MANIFEST_NAME)
+
+FFMPEG = os.environ.get("FFMPEG", "ffmpeg")
+
+FIELDS = ("name", "path", "codec", "duration", "sample_rate", "size", "sha256", "transcript", "intent", "tags")
+
+DURATION_PATTERN = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+AUDIO_PATTERN = re.compile(r"Audio: (\w+)[^\n]*?, (\d+) Hz")
+
+
+class Fixture:
+    """One recording of the manifest"""
+
+    __slots__ = FIELDS + ("root",)
+
+    def __init__(self, record, root):
+        for field in FIELDS:
+            setattr(self, field, record.get(field))
+        self.tags = tuple(self.tags or ())
+        self.root = root
+
+    @property
+    def file(self):
+        """Absolute path of the recording"""
+        return os.path.join(self.root, self.path)
+
+    @property
+    def is_trade(self):
+        return self.intent is not None
+
+    def read(self):
+        """Audio bytes of the recording"""
+        with open(self.file, "rb") as f:
+            return f.read()
+
+    def verify(self):
+        """
+        Check the recording against the manifest
+
+        Returns:
+            None if it exists and its size and sha256 match, otherwise the problem
+        """
+        if not os.path.isfile(self.file):
+            return "missing"
+        if self.size is not None and os.path.getsize(self.file) != self.size:
+            return f"size {os.path.getsize(self.file)} != {self.size}"
+        if hash_audio_file(self.file) != self.sha256:
+            return "sha256 mismatch"
+        return None
+
+    def to_record(self):
+        record = {field: getattr(self, field) for field in FIELDS}
+        record["tags"] = list(self.tags)
+        return record
+
+    def __repr__(self):
+        return f"Fixture({self.path!r})"
+
+
+def parse_shard(spec):
+    """'2/8' -> (2, 8); tuples pass through"""
+    if isinstance(spec, str):
+        index, count = (int(part) for part in spec.split("/"))
+    else:
+        index, count = spec
+    if not 0 <= index < count:
+        raise ValueError(f"Shard {index}/{count} is out of range")
+    return index, count
+
+
+def shard_of(fixture, count):
+    """Shard (0..count-1) of a fixture, derived from its audio hash"""
+    return int(fixture.sha256[:16], 16) % count
+
+
+class FixtureManifest:
+    """Lazily read fixtures.jsonl"""
+
+    def __init__(self, path=DEFAULT_MANIFEST):
+        self.path = path
+        self.root = os.path.dirname(os.path.abspath(path))
+        self.offsets = None
+
+    def __iter__(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield Fixture(json.loads(line), self.root)
+
+    def select(self, names=None, tags=None, codecs=None, trades=None, max_duration=None, shard=None, limit=None):
+        """
+        Fixtures matching every given filter, in manifest order
+
+        Args:
+            names: Fixture names or paths to keep
+            tags: Tags a fixture must all have
+            codecs: Codecs to keep (e.g. 'aac', 'mp3')
+            trades: True for trade commands only, False for the others
+            max_duration: Longest recording in seconds
+            shard: (index, count) or 'index/count' of the shard to keep
+            limit: Stop after this many fixtures
+
+        Yields:
+            Fixture
+        """
+        names = set(names) if names else None
+        tags = set(tags) if tags else None
+        codecs = set(codecs) if codecs else None
+        shard = parse_shard(shard) if shard else None
+        selected = 0
+        for fixture in self:
+            if limit is not None and selected >= limit:
+                return
+            if names is not None and fixture.name not in names and fixture.path not in names:
+                continue
+            if tags is not None and not tags.issubset(fixture.tags):
+                continue
+            if codecs is not None and fixture.codec not in codecs:
+                continue
+            if trades is not None and fixture.is_trade != trades:
+                continue
+            if max_duration is not None and (fixture.duration or 0.0) > max_duration:
+                continue
+            if shard is not None and shard_of(fixture, shard[1]) != shard[0]:
+                continue
+            selected += 1
+            yield fixture
+
+    def get(self, name):
+        """
+        Fixture by name or path, None if the manifest has none
+
+        The first call indexes the byte offset of every line; later calls
+        read only the line they need.
+        """
+        if self.offsets is None:
+            self.offsets = {}
+            with open(self.path, "rb") as f:
+                offset = f.tell()
+                for line in iter(f.readline, b""):
+                    if line.strip():
+                        record = json.loads(line)
+                        self.offsets.setdefault(record["name"], offset)
+                        self.offsets.setdefault(record["path"], offset)
+                    offset = f.tell()
+        offset = self.offsets.get(name)
+        if offset is None:
+            return None
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return Fixture(json.loads(f.readline()), self.root)
+
+
+def probe(path, ffmpeg=FFMPEG):
+    """
+    Codec, duration and sample rate of a recording, read from ffmpeg's
+    description of the input without decoding it
+
+    Returns:
+        Dict with codec, duration (seconds) and sample_rate
+    """
+    result = subprocess.run([ffmpeg, "-hide_banner", "-i", path], capture_output=True, text=True)
+    duration = DURATION_PATTERN.search(result.stderr)
+    audio = AUDIO_PATTERN.search(result.stderr)
+    if duration is None or audio is None:
+        raise ValueError(f"ffmpeg found no audio stream in {path}")
+    hours, minutes, seconds = duration.groups()
+    return {
+        "codec": audio.group(1),
+        "duration": round(int(hours) * 3600 + int(minutes) * 60 + float(seconds), 2),
+        "sample_rate": int(audio.group(2)),
+    }
+
+
+def build_manifest(paths, manifest=DEFAULT_MANIFEST, ffmpeg=FFMPEG):
+    """
+    Write a manifest entry for every recording, keeping the names,
+    transcripts, intents and tags of recordings already listed
+
+    Args:
+        paths: Recordings to describe
+        manifest: Manifest to update (written atomically)
+        ffmpeg: ffmpeg executable
+
+    Returns:
+        Number of entries written
+    """
+    root = os.path.dirname(os.path.abspath(manifest))
+    previous = {fixture.path: fixture for fixture in FixtureManifest(manifest)} if os.path.isfile(manifest) else {}
+    records = []
+    for path in paths:
+        relative = os.path.relpath(os.path.abspath(path), root).replace(os.sep, "/")
+        known = previous.get(relative)
+        record = known.to_record() if known else {
+            "name": os.path.splitext(os.path.basename(path))[0], "path": relative,
+            "transcript": "", "intent": None, "tags": [],
+        }
+        record.update(probe(path, ffmpeg))
+        record["size"] = os.path.getsize(path)
+        record["sha256"] = hash_audio_file(path)
+        records.append({field: record.get(field) for field in FIELDS})
+
+    temporary = manifest + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    os.replace(temporary, manifest)
+    return len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List, verify or build the audio fixture manifest")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="List fixtures matching filters")
+    list_parser.add_argument("--tag", action="append", dest="tags", help="Required tag (repeatable)")
+    list_parser.add_argument("--codec", action="append", dest="codecs", help="Codec to keep (repeatable)")
+    list_parser.add_argument("--trades", action="store_true", default=None, help="Trade commands only")
+    list_parser.add_argument("--no-trades", action="store_false", dest="trades", help="Non-trade recordings only")
+    list_parser.add_argument("--max-duration", type=float)
+    list_parser.add_argument("--shard", help="index/count, e.g. 0/4")
+    list_parser.add_argument("--limit", type=int)
+
+    commands.add_parser("verify", help="Check every recording's size and sha256")
+
+    build_parser = commands.add_parser("build", help="Probe and hash recordings into the manifest")
+    build_parser.add_argument("paths", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        count = build_manifest(args.paths, args.manifest)
+        print(f"📝 Wrote {count} fixtures to {args.manifest}")
+        return
+
+    manifest = FixtureManifest(args.manifest)
+    if args.command == "verify":
+        problems = 0
+        for fixture in manifest:
+            problem = fixture.verify()
+            problems += problem is not None
+            print(f"   {'✅' if problem is None else '❌'} {fixture.path:<24}{problem or ''}")
+        print(f"\n{'✅ All fixtures match the manifest' if not problems else f'❌ {problems} fixture(s) differ'}")
+        raise SystemExit(1 if problems else 0)
+
+    print(f"   {'name':<32}{'path':<24}{'codec':<6}{'duration':>9}{'rate':>7}  transcript")
+    for fixture in manifest.select(tags=args.tags, codecs=args.codecs, trades=args.trades,
+                                   max_duration=args.max_duration, shard=args.shard, limit=args.limit):
+        print(f"   {fixture.name:<32}{fixture.path:<24}{fixture.codec:<6}{fixture.duration:>8.2f}s"
+              f"{fixture.sample_rate:>7}  {fixture.transcript}")
+
+
+if __name__ == "__main__":
+    main()
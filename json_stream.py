@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Incremental parsing of large JSON responses
+
+/webhook/orders answers with one object whose 'orders' array can hold
+thousands of entries. stream_json_array() walks the top level of such an
+object as the response body arrives and yields the array items one at a
+time, so the client never holds the raw body and the whole parsed list at
+once. Every other top-level field is collected into an envelope dict.
+"""
+
+import codecs
+import json
+
+_decoder = json.JSONDecoder()
+
+WHITESPACE = " \t\n\r"
+
+# Drop consumed text once this much has accumulated, so the buffer stays small
+COMPACT_THRESHOLD = 64 * 1024
+
+
+class _Buffer:
+    """Text decoded so far from a chunk iterator, with a read position"""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.exhausted = False
+
+    def fill(self):
+        """Append the next chunk, False once the stream has ended"""
+        if self.exhausted:
+            return False
+        for chunk in self.chunks:
+            if chunk:
+                if self.pos > COMPACT_THRESHOLD:
+                    self.text, self.pos = self.text[self.pos:], 0
+                self.text += self.decoder.decode(chunk)
+                return True
+        self.text += self.decoder.decode(b"", final=True)
+        self.exhausted = True
+        return False
+
+    def peek(self):
+        """Next non-whitespace character, '' at the end of the stream"""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self.pos} of the JSON stream")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except ValueError:
+                if not self.fill():
+                    raise
+                continue
+            # A number at the very end of the buffer may continue in the next chunk
+            if end == len(self.text) and not self.exhausted:
+                if self.fill():
+                    continue
+            self.pos = end
+            return value
+
+
+def stream_json_array(chunks, key="orders", envelope=None):
+    """
+    Yield the items of one top-level array of a streamed JSON object
+
+    Args:
+        chunks: Iterable of bytes, e.g. response.iter_content(65536)
+        key: Top-level key holding the array
+        envelope: Optional dict receiving every other top-level field; fields
+            after the array are only present once the generator is exhausted
+
+    Yields:
+        The array items, in order
+    """
+    if envelope is None:
+        envelope = {}
+    buffer = _Buffer(chunks)
+    buffer.expect("{")
+    if buffer.peek() == "}":
+        buffer.pos += 1
+        return
+
+    while True:
+        if buffer.peek() != '"':
+            raise ValueError(f"Expected an object key at offset {buffer.pos} of the JSON stream")
+        name = buffer.value()
+        buffer.expect(":")
+
+        if name == key and buffer.peek() == "[":
+            buffer.pos += 1
+            if buffer.peek() == "]":
+                buffer.pos += 1
+            else:
+                while True:
+                    yield buffer.value()
+                    separator = buffer.peek()
+                    buffer.pos += 1
+                    if separator == "]":
+                        break
+                    if separator != ",":
+                        raise ValueError(f"Expected ',' or ']' at offset {buffer.pos - 1} of the JSON stream")
+        else:
+            envelope[name] = buffer.value()
+
+        separator = buffer.peek()
+        buffer.pos += 1
+        if separator == "}":
+            return
+        if separator != ",":
+            raise ValueError(f"Expected ',' or '}}' at offset {buffer.pos - 1} of the JSON stream")
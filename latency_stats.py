@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Latency histograms for the n8n Voice-Activated Trading System tester
+
+LatencyHistogram is an HDR-style log-linear histogram: values are recorded in
+microseconds into buckets whose width grows with magnitude, so any recorded
+value is reproduced within the configured number of significant digits while
+memory stays bounded no matter how many samples are recorded.
+LatencyRecorder keeps one histogram per endpoint (plus one per request phase)
+and reports percentiles and throughput. parse_server_timing() and
+record_server_timing() turn the workflow's per-stage Server-Timing header into
+a LatencyRecorder whose phases are pipeline stages, and print_stage_breakdown()
+reports where the time goes.
+"""
+
+import json
+import math
+import re
+import threading
+import time
+
+REPORT_PERCENTILES = [50, 90, 99, 99.9]
+
+SERVER_TIMING_DURATION = re.compile(r";\s*dur=([0-9.]+)")
+
+
+class LatencyHistogram:
+    """Log-linear histogram of latencies with bounded relative error"""
+
+    def __init__(self, significant_digits=3):
+        """
+        Args:
+            significant_digits: Decimal digits of precision kept for every value (1-5)
+        """
+        if not 1 <= significant_digits <= 5:
+            raise ValueError("significant_digits must be between 1 and 5")
+        self.significant_digits = significant_digits
+
+        largest_exact = 2 * 10 ** significant_digits
+        self.sub_bucket_bits = math.ceil(math.log2(largest_exact))
+        self.sub_bucket_count = 1 << self.sub_bucket_bits
+        self.sub_bucket_half = self.sub_bucket_count >> 1
+
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _index(self, value):
+        """Bucket index for an integer value in microseconds"""
+        if value < self.sub_bucket_count:
+            return value
+        shift = value.bit_length() - self.sub_bucket_bits
+        sub_bucket = value >> shift
+        return self.sub_bucket_count + (shift - 1) * self.sub_bucket_half + (sub_bucket - self.sub_bucket_half)
+
+    def _highest_equivalent(self, index):
+        """Largest microsecond value that maps to a bucket index"""
+        if index < self.sub_bucket_count:
+            return index
+        offset = index - self.sub_bucket_count
+        shift = offset // self.sub_bucket_half + 1
+        sub_bucket = offset % self.sub_bucket_half + self.sub_bucket_half
+        return ((sub_bucket + 1) << shift) - 1
+
+    def record(self, seconds, count=1):
+        """Record a latency given in seconds"""
+        value = max(0, int(round(seconds * 1_000_000)))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        """Add all samples of another histogram with the same precision"""
+        if other.significant_digits != self.significant_digits:
+            raise ValueError("Cannot merge histograms with different precision")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, percent):
+        """Latency in seconds at or below which `percent` % of samples fall"""
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(percent / 100.0 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._highest_equivalent(index), self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    @property
+    def mean(self):
+        return self.total / self.count / 1_000_000 if self.count else 0.0
+
+    def to_dict(self):
+        """Summary statistics in seconds"""
+        summary = {
+            "count": self.count,
+            "min": (self.min or 0) / 1_000_000,
+            "mean": self.mean,
+            "max": (self.max or 0) / 1_000_000,
+        }
+        for percent in REPORT_PERCENTILES:
+            summary[f"p{percent:g}"] = self.percentile(percent)
+        return summary
+
+
+class LatencyRecorder:
+    """Thread-safe per-endpoint latency histograms with throughput tracking"""
+
+    def __init__(self, significant_digits=3):
+        self.significant_digits = significant_digits
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def record(self, endpoint, seconds, phases=None, started=None):
+        """
+        Record one completed call
+
+        Args:
+            endpoint: Endpoint name the call went to
+            seconds: Total latency in seconds
+            phases: Optional dict mapping phase name (dns, connect, ttfb, body, ...)
+                to its duration in seconds
+            started: time.monotonic() value when the call started, defaults
+                to now minus `seconds`
+        """
+        finished = time.monotonic()
+        if started is None:
+            started = finished - seconds
+
+        with self.lock:
+            entry = self.endpoints.get(endpoint)
+            if entry is None:
+                entry = self.endpoints[endpoint] = {
+                    "total": LatencyHistogram(self.significant_digits),
+                    "phases": {},
+                    "first_start": started,
+                    "last_end": finished,
+                }
+            entry["total"].record(seconds)
+            entry["first_start"] = min(entry["first_start"], started)
+            entry["last_end"] = max(entry["last_end"], finished)
+            for phase, duration in (phases or {}).items():
+                if duration is None:
+                    continue
+                histogram = entry["phases"].get(phase)
+                if histogram is None:
+                    histogram = entry["phases"][phase] = LatencyHistogram(self.significant_digits)
+                histogram.record(duration)
+
+    def histogram(self, endpoint, phase=None):
+        """Histogram for an endpoint (or one of its phases), None if nothing was recorded"""
+        entry = self.endpoints.get(endpoint)
+        if entry is None:
+            return None
+        return entry["total"] if phase is None else entry["phases"].get(phase)
+
+    def report(self):
+        """Per-endpoint summary: percentiles, throughput and phase breakdown"""
+        with self.lock:
+            report = {}
+            for endpoint, entry in self.endpoints.items():
+                window = entry["last_end"] - entry["first_start"]
+                summary = entry["total"].to_dict()
+                summary["throughput"] = summary["count"] / window if window > 0 else 0.0
+                summary["phases"] = {
+                    phase: histogram.to_dict() for phase, histogram in entry["phases"].items()
+                }
+                report[endpoint] = summary
+            return report
+
+    def to_json(self, path):
+        """Write report() to a JSON file"""
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def print_report(self):
+        """Print a latency table for every endpoint"""
+        print_latency_report(self.report())
+
+
+def print_latency_report(report):
+    """Print a LatencyRecorder.report() dict"""
+    if not report:
+        print("   No requests recorded")
+        return
+
+    header = "".join(f"{'p' + format(p, 'g'):>10}" for p in REPORT_PERCENTILES)
+    print(f"   {'endpoint':<22}{'count':>7}{header}{'max':>10}{'req/s':>9}")
+    for endpoint, summary in report.items():
+        rows = [(endpoint, summary, f"{summary['throughput']:9.2f}")]
+        rows += [(f"  {phase}", stats, "") for phase, stats in summary["phases"].items()]
+        for name, stats, throughput in rows:
+            values = "".join(f"{stats[f'p{p:g}'] * 1000:8.1f}ms" for p in REPORT_PERCENTILES)
+            print(f"   {name:<22}{stats['count']:>7}{values}{stats['max'] * 1000:8.1f}ms{throughput}")
+
+
+def parse_server_timing(value):
+    """
+    Parse a Server-Timing header
+
+    Args:
+        value: Header value, e.g. 'stt;dur=612.4, parse;dur=3.1'
+
+    Returns:
+        Dict of metric name -> seconds; metrics without a duration are skipped
+    """
+    timings = {}
+    for metric in value.split(","):
+        name = metric.split(";", 1)[0].strip()
+        match = SERVER_TIMING_DURATION.search(metric)
+        if name and match:
+            timings[name] = timings.get(name, 0.0) + float(match.group(1)) / 1000
+    return timings
+
+
+def server_stage_timings(headers, body):
+    """
+    Stage timings reported by the workflow for one response
+
+    The Server-Timing header is preferred; a 'timings' block of milliseconds
+    in the JSON body is used when a proxy stripped the header.
+
+    Returns:
+        Dict of stage -> seconds, None if the response carries no timings
+    """
+    header = headers.get("Server-Timing")
+    if header:
+        return parse_server_timing(header) or None
+    timings = body.get("timings") if isinstance(body, dict) else None
+    if isinstance(timings, dict):
+        return {name: ms / 1000 for name, ms in timings.items() if isinstance(ms, (int, float))} or None
+    return None
+
+
+def record_server_timing(recorder, endpoint, elapsed, timings, started=None):
+    """
+    Record one response's stage timings into a stage recorder
+
+    The server-side total becomes the endpoint latency, every stage a phase,
+    and whatever the client measured beyond the server total is recorded as
+    the 'network' stage (transfer, queueing and client overhead).
+
+    Args:
+        recorder: LatencyRecorder collecting stage timings
+        endpoint: Endpoint name
+        elapsed: End-to-end latency measured by the client, in seconds
+        timings: Dict from server_stage_timings()
+        started: Monotonic send time, used for throughput
+    """
+    stages = dict(timings)
+    server_total = stages.pop("total", None)
+    if server_total is None:
+        server_total = sum(stages.values())
+    stages["network"] = max(0.0, elapsed - server_total)
+    recorder.record(endpoint, server_total, phases=stages, started=started)
+
+
+def print_stage_breakdown(report):
+    """
+    Print where the time goes inside each endpoint and name the bottleneck
+
+    Args:
+        report: LatencyRecorder.report() of a recorder fed by record_server_timing()
+    """
+    if not report:
+        print("   No stage timings received (the workflow sent no Server-Timing header)")
+        return
+
+    for endpoint, summary in report.items():
+        stages = summary["phases"]
+        # Not every response runs every stage, so weigh stages by how often they ran
+        spent = {stage: stats["mean"] * stats["count"] for stage, stats in stages.items()}
+        end_to_end = summary["mean"] * summary["count"] + spent.get("network", 0.0)
+        print(f"   {endpoint} ({summary['count']} responses, "
+              f"server p50 {summary['p50'] * 1000:.1f}ms)")
+        print(f"     {'stage':<12}{'count':>7}{'p50':>10}{'p99':>10}{'mean':>10}{'share':>8}")
+        for stage, stats in stages.items():
+            share = spent[stage] / end_to_end if end_to_end > 0 else 0.0
+            print(f"     {stage:<12}{stats['count']:>7}{stats['p50'] * 1000:8.1f}ms"
+                  f"{stats['p99'] * 1000:8.1f}ms{stats['mean'] * 1000:8.1f}ms{share:8.1%}")
+        if spent:
+            bottleneck = max(spent, key=spent.get)
+            share = spent[bottleneck] / end_to_end if end_to_end > 0 else 0.0
+            print(f"     🐢 Bottleneck: {bottleneck} ({share:.0%} of end-to-end time)")
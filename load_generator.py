@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Open-loop load generator for the n8n Voice-Activated Trading System
+
+Requests are sent on a fixed or Poisson arrival schedule regardless of how
+long earlier requests take, so queueing delay inside the n8n/Groq pipeline
+shows up in the numbers. Every call records its intended send time as well as
+its actual send time, and latency is reported both as plain service time and
+corrected for coordinated omission (measured from the intended send time).
+"""
+
+import asyncio
+import random
+
+from latency_stats import LatencyHistogram
+
+EXCHANGES = ["binance", "coinbase"]
+
+DEFAULT_MIX = {
+    "voice-command": 0.8,
+    "balance": 0.1,
+    "orders": 0.1,
+}
+
+
+def arrival_schedule(rate, duration, arrival="fixed", seed=None):
+    """
+    Generate intended send offsets for an open-loop run
+
+    Args:
+        rate: Target arrival rate in requests per second
+        duration: Length of the run in seconds
+        arrival: 'fixed' for evenly spaced arrivals, 'poisson' for
+            exponentially distributed inter-arrival times
+        seed: Seed for the Poisson schedule
+
+    Yields:
+        Offsets in seconds from the start of the run
+    """
+    if rate <= 0:
+        raise ValueError("rate must be positive")
+    if arrival not in ("fixed", "poisson"):
+        raise ValueError(f"Unknown arrival schedule: {arrival}")
+
+    rng = random.Random(seed)
+    index = 0
+    offset = 0.0
+    while True:
+        if arrival == "fixed":
+            offset = index / rate
+        elif index > 0:
+            offset += rng.expovariate(rate)
+        if offset >= duration:
+            return
+        yield offset
+        index += 1
+
+
+def default_calls(tester, audio_urls, user_id="load_user"):
+    """
+    Build the endpoint -> call factory mapping for an async tester
+
+    Args:
+        tester: AsyncN8nVoiceTradingTester instance
+        audio_urls: Audio URLs cycled through by voice-command calls
+        user_id: Prefix for generated user identifiers
+
+    Returns:
+        Dict mapping endpoint name to a callable taking the request index
+        and returning a coroutine
+    """
+    return {
+        "voice-command": lambda i: tester.test_voice_command(
+            audio_urls[i % len(audio_urls)], user_id=f"{user_id}_{i}"),
+        "balance": lambda i: tester.test_balance(EXCHANGES[i % len(EXCHANGES)]),
+        "orders": lambda i: tester.test_orders(EXCHANGES[i % len(EXCHANGES)]),
+    }
+
+
+async def run_open_loop(calls, rate, duration, arrival="fixed", mix=None, seed=None):
+    """
+    Send requests on an open-loop schedule
+
+    Args:
+        calls: Dict mapping endpoint name to a call factory (see default_calls)
+        rate: Target arrival rate in requests per second
+        duration: Length of the run in seconds
+        arrival: 'fixed' or 'poisson'
+        mix: Dict mapping endpoint name to its relative weight
+        seed: Seed for the arrival schedule and endpoint selection
+
+    Returns:
+        List of samples, one per request, in send order. Each sample holds
+        the endpoint, intended/sent/done times (seconds from the start of the
+        run) and whether the call succeeded.
+    """
+    mix = mix or DEFAULT_MIX
+    endpoints = [name for name in mix if name in calls]
+    if not endpoints:
+        raise ValueError("mix does not reference any known endpoint")
+    weights = [mix[name] for name in endpoints]
+
+    rng = random.Random(seed)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    samples = []
+
+    async def fire(sample):
+        sample["sent"] = loop.time() - start
+        try:
+            await calls[sample["endpoint"]](sample["index"])
+            sample["ok"] = True
+        except Exception as e:
+            sample["ok"] = False
+            sample["error"] = str(e)
+        sample["done"] = loop.time() - start
+
+    tasks = []
+    for index, offset in enumerate(arrival_schedule(rate, duration, arrival, seed)):
+        delay = start + offset - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        sample = {
+            "index": index,
+            "endpoint": rng.choices(endpoints, weights)[0],
+            "intended": offset,
+        }
+        samples.append(sample)
+        tasks.append(asyncio.create_task(fire(sample)))
+
+    await asyncio.gather(*tasks)
+    return samples
+
+
+def summarize(samples, rate, duration):
+    """
+    Aggregate open-loop samples per endpoint
+
+    Args:
+        samples: Samples returned by run_open_loop()
+        rate: Target arrival rate the run used
+        duration: Length of the run in seconds
+
+    Returns:
+        Dict with per-endpoint and overall statistics. Latencies are in
+        seconds; 'service' is measured from the actual send time and
+        'corrected' from the intended send time.
+    """
+    groups = {"all": samples}
+    for sample in samples:
+        groups.setdefault(sample["endpoint"], []).append(sample)
+
+    report = {"target_rate": rate, "duration": duration, "endpoints": {}}
+    for name, group in groups.items():
+        service, corrected, lag = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for s in group:
+            service.record(s["done"] - s["sent"])
+            corrected.record(s["done"] - s["intended"])
+            lag.record(s["sent"] - s["intended"])
+        stats = {
+            "count": len(group),
+            "errors": sum(1 for s in group if not s["ok"]),
+            "achieved_rate": len(group) / duration if duration > 0 else 0.0,
+        }
+        for label, histogram in (("service", service), ("corrected", corrected), ("send_lag", lag)):
+            stats[label] = histogram.to_dict()
+        report["endpoints"][name] = stats
+    return report
+
+
+def print_report(report):
+    """Print a summarize() report"""
+    print(f"   Target rate: {report['target_rate']:.1f} req/s for {report['duration']:.0f}s")
+    for name, stats in report["endpoints"].items():
+        print(f"\n   {name}: {stats['count']} requests, {stats['errors']} errors, "
+              f"{stats['achieved_rate']:.1f} req/s")
+        for label in ("service", "corrected", "send_lag"):
+            values = stats[label]
+            print(f"     {label:<10} p50 {values['p50'] * 1000:8.1f}ms"
+                  f"  p90 {values['p90'] * 1000:8.1f}ms"
+                  f"  p99 {values['p99'] * 1000:8.1f}ms"
+                  f"  p99.9 {values['p99.9'] * 1000:8.1f}ms"
+                  f"  max {values['max'] * 1000:8.1f}ms")
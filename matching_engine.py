@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Local simulated exchange with price-time priority order books
+
+The mock workflow can route the orders parsed from voice commands through a
+SimulatedExchange instead of declaring every market order filled at a
+reference price. The exchange keeps one OrderBook per (exchange, symbol).
+Each book has bids and asks grouped into price levels, and a level is a FIFO
+queue of resting orders:
+
+- inserting an order at a new price pushes the price onto a heap, O(log n);
+  at an existing price it appends to the level's queue, O(1),
+- cancelling marks the order and takes its quantity off the level, O(1);
+  cancelled orders and emptied levels are dropped lazily when they reach the
+  front of a queue or the top of a heap, so every entry is popped at most
+  once (amortized O(log n)),
+- the best bid/ask is the top of a heap, O(1) after stale prices are popped.
+
+An incoming order matches against the opposite side, best price first and
+oldest order first within a price. A limit remainder rests in the book. A
+market order never rests: whatever cannot be filled expires.
+
+Usage:
+    python matching_engine.py --orders 200000 --cancel-rate 0.3
+"""
+
+import argparse
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import deque
+
+# Quantities are rounded to this many decimals on entry and after every fill
+QUANTITY_DECIMALS = 8
+
+
+class BookOrder:
+    """An order known to an order book"""
+
+    __slots__ = ("order_id", "side", "price", "quantity", "remaining", "owner", "sequence", "status")
+
+    def __init__(self, order_id, side, price, quantity, owner, sequence):
+        self.order_id = order_id
+        self.side = side
+        self.price = price
+        self.quantity = quantity
+        self.remaining = quantity
+        self.owner = owner
+        self.sequence = sequence
+        self.status = "NEW"
+
+    @property
+    def filled(self):
+        return round(self.quantity - self.remaining, QUANTITY_DECIMALS)
+
+
+class Fill:
+    """One match between a resting (maker) and an incoming (taker) order"""
+
+    __slots__ = ("maker", "taker_id", "price", "quantity")
+
+    def __init__(self, maker, taker_id, price, quantity):
+        self.maker = maker
+        self.taker_id = taker_id
+        self.price = price
+        self.quantity = quantity
+
+
+class PriceLevel:
+    """Resting orders at one price, oldest first"""
+
+    __slots__ = ("price", "orders", "volume")
+
+    def __init__(self, price):
+        self.price = price
+        self.orders = deque()
+        self.volume = 0.0
+
+
+class OrderBook:
+    """Price-time priority limit order book of one symbol"""
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.levels = {"BUY": {}, "SELL": {}}
+        # Bid prices are stored negated so both heaps pop the best price first
+        self.heaps = {"BUY": [], "SELL": []}
+        self.orders = {}
+        self.sequence = itertools.count(1)
+        self.last_price = None
+
+    def _best_level(self, side):
+        """
+        Best live price level of a side, dropping stale heap entries
+
+        A level is live while an unfilled order is queued at it, whatever
+        its volume says, so rounding drift can never keep an empty level on top.
+        """
+        heap = self.heaps[side]
+        levels = self.levels[side]
+        while heap:
+            price = -heap[0] if side == "BUY" else heap[0]
+            level = levels.get(price)
+            if level is not None:
+                queue = level.orders
+                while queue and queue[0].remaining <= 0:
+                    queue.popleft()  # cancelled while queued
+                if queue:
+                    return level
+            heapq.heappop(heap)
+            if level is not None:
+                del levels[price]
+        return None
+
+    def best_bid(self):
+        """Highest resting buy price, None if there are no bids"""
+        level = self._best_level("BUY")
+        return level.price if level else None
+
+    def best_ask(self):
+        """Lowest resting sell price, None if there are no asks"""
+        level = self._best_level("SELL")
+        return level.price if level else None
+
+    def submit(self, order_id, side, quantity, price=None, owner=None):
+        """
+        Match an incoming order and rest the remainder of a limit order
+
+        Args:
+            order_id: Unique order identifier
+            side: 'BUY' or 'SELL'
+            quantity: Order quantity
+            price: Limit price, None for a market order
+            owner: Opaque owner reference kept with resting orders
+
+        Returns:
+            Tuple of (BookOrder, list of Fill); the order's status is FILLED,
+            PARTIALLY_FILLED or NEW for limit orders, FILLED or EXPIRED for
+            market orders
+        """
+        if side not in self.levels:
+            raise ValueError(f"Unknown side '{side}'")
+        if order_id in self.orders:
+            raise ValueError(f"Duplicate order id '{order_id}'")
+        quantity = round(quantity, QUANTITY_DECIMALS)
+        order = BookOrder(order_id, side, price, quantity, owner, next(self.sequence))
+        fills = self._match(order)
+
+        if order.remaining <= 0:
+            order.status = "FILLED"
+        elif price is None:
+            order.status = "EXPIRED"
+        else:
+            order.status = "PARTIALLY_FILLED" if fills else "NEW"
+            self._rest(order)
+        return order, fills
+
+    def _match(self, order):
+        opposite = "SELL" if order.side == "BUY" else "BUY"
+        fills = []
+        while order.remaining > 0:
+            level = self._best_level(opposite)
+            if level is None:
+                break
+            if order.price is not None and (level.price > order.price if order.side == "BUY"
+                                            else level.price < order.price):
+                break
+            queue = level.orders
+            while queue and order.remaining > 0:
+                maker = queue[0]
+                if maker.remaining <= 0:
+                    queue.popleft()  # cancelled while queued
+                    continue
+                quantity = min(maker.remaining, order.remaining)
+                maker.remaining = round(maker.remaining - quantity, QUANTITY_DECIMALS)
+                order.remaining = round(order.remaining - quantity, QUANTITY_DECIMALS)
+                level.volume = round(level.volume - quantity, QUANTITY_DECIMALS)
+                if maker.remaining <= 0:
+                    maker.status = "FILLED"
+                    queue.popleft()
+                    del self.orders[maker.order_id]
+                else:
+                    maker.status = "PARTIALLY_FILLED"
+                fills.append(Fill(maker, order.order_id, level.price, quantity))
+                self.last_price = level.price
+            if not queue:
+                # Every order at this price is gone; drop the level and any volume left by rounding
+                level.volume = 0.0
+                del self.levels[opposite][level.price]
+                heapq.heappop(self.heaps[opposite])
+        return fills
+
+    def _rest(self, order):
+        levels = self.levels[order.side]
+        level = levels.get(order.price)
+        if level is None:
+            level = levels[order.price] = PriceLevel(order.price)
+            heapq.heappush(self.heaps[order.side], -order.price if order.side == "BUY" else order.price)
+        level.orders.append(order)
+        level.volume = round(level.volume + order.remaining, QUANTITY_DECIMALS)
+        self.orders[order.order_id] = order
+
+    def cancel(self, order_id):
+        """
+        Cancel a resting order
+
+        Returns:
+            The cancelled BookOrder, None if it is not resting in the book
+        """
+        order = self.orders.pop(order_id, None)
+        if order is None:
+            return None
+        level = self.levels[order.side].get(order.price)
+        if level is not None:
+            level.volume = round(level.volume - order.remaining, QUANTITY_DECIMALS)
+        order.remaining = 0
+        order.status = "CANCELED"
+        return order
+
+    def depth(self, levels=5):
+        """Best `levels` (price, volume) pairs of each side"""
+        def side(name):
+            prices = sorted((price for price, level in self.levels[name].items() if level.volume > 0),
+                            reverse=name == "BUY")
+            return [(price, self.levels[name][price].volume) for price in prices[:levels]]
+        return {"bids": side("BUY"), "asks": side("SELL")}
+
+    def __len__(self):
+        return len(self.orders)
+
+
+class SimulatedExchange:
+    """Thread-safe order books keyed by (exchange, symbol)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.books = {}
+        self.book_locks = {}
+        self.mm_ids = itertools.count(1)
+
+    def book(self, exchange, symbol):
+        """Order book of a symbol, created on first use, and its lock"""
+        key = (exchange, symbol)
+        with self.lock:
+            if key not in self.books:
+                self.books[key] = OrderBook(symbol)
+                self.book_locks[key] = threading.Lock()
+            return self.books[key], self.book_locks[key]
+
+    def submit(self, exchange, symbol, order_id, side, quantity, price=None, owner=None):
+        """Match an order in its book; see OrderBook.submit()"""
+        book, lock = self.book(exchange, symbol)
+        with lock:
+            return book.submit(order_id, side, quantity, price, owner)
+
+    def cancel(self, exchange, symbol, order_id):
+        """Cancel a resting order; see OrderBook.cancel()"""
+        book, lock = self.book(exchange, symbol)
+        with lock:
+            return book.cancel(order_id)
+
+    def quote(self, exchange, symbol):
+        """Best bid and ask of a symbol"""
+        book, lock = self.book(exchange, symbol)
+        with lock:
+            return {"bid": book.best_bid(), "ask": book.best_ask()}
+
+    def last_price(self, exchange, symbol):
+        """Price of the last fill of a symbol, None before the first one"""
+        return self.book(exchange, symbol)[0].last_price
+
+    def seed_liquidity(self, exchange, symbol, mid, levels=20, tick=None, size=5.0, rng=None):
+        """
+        Rest market-maker orders around a mid price, so market orders can fill
+
+        Args:
+            exchange: Exchange name
+            symbol: Exchange symbol
+            mid: Price the book is centred on
+            levels: Price levels per side
+            tick: Distance between levels, 0.01% of mid if omitted
+            size: Average quantity per level
+            rng: random.Random for the level sizes
+        """
+        rng = rng or random.Random()
+        tick = tick or round(mid * 0.0001, 2) or 0.01
+        for index in range(1, levels + 1):
+            for side, price in (("BUY", mid - index * tick), ("SELL", mid + index * tick)):
+                quantity = round(size * rng.uniform(0.5, 1.5), 4)
+                self.submit(exchange, symbol, f"mm-{next(self.mm_ids)}", side, quantity,
+                            round(price, 2), owner="market_maker")
+
+
+def benchmark(orders=200_000, cancel_rate=0.3, market_rate=0.1, mid=45250.0, spread_ticks=50, seed=1):
+    """
+    Throughput of one book under a random mix of limit, market and cancel requests
+
+    Args:
+        orders: Requests to process
+        cancel_rate: Share of requests that cancel a random resting order
+        market_rate: Share of new orders that are market orders
+        mid: Price limit orders are spread around
+        spread_ticks: Limit prices are drawn within this many ticks of mid
+        seed: Seed for the request mix
+
+    Returns:
+        Dict with request counts, fills, elapsed seconds, requests per second
+        and the final book size
+    """
+    rng = random.Random(seed)
+    book = OrderBook("BENCH")
+    tick = 0.5
+    requests = []
+    resting = []
+    for index in range(orders):
+        if resting and rng.random() < cancel_rate:
+            requests.append(("cancel", resting[rng.randrange(len(resting))]))
+            continue
+        side = "BUY" if rng.random() < 0.5 else "SELL"
+        quantity = round(rng.uniform(0.01, 2.0), 4)
+        if rng.random() < market_rate:
+            requests.append(("market", f"o{index}", side, quantity))
+        else:
+            price = mid + rng.randint(-spread_ticks, spread_ticks) * tick
+            requests.append(("limit", f"o{index}", side, quantity, price))
+            resting.append(f"o{index}")
+
+    counts = {"limit": 0, "market": 0, "cancel": 0, "fills": 0, "quotes": 0}
+    started = time.perf_counter()
+    for request in requests:
+        kind = request[0]
+        if kind == "cancel":
+            book.cancel(request[1])
+        else:
+            _, fills = book.submit(request[1], request[2], request[3], request[4] if kind == "limit" else None)
+            counts["fills"] += len(fills)
+            book.best_bid()
+            book.best_ask()
+            counts["quotes"] += 2
+        counts[kind] += 1
+    elapsed = time.perf_counter() - started
+    return {**counts, "requests": len(requests), "elapsed": elapsed,
+            "requests_per_second": len(requests) / elapsed, "resting": len(book),
+            "best_bid": book.best_bid(), "best_ask": book.best_ask()}
+
+
+def print_benchmark(result):
+    print(f"   Requests:   {result['requests']:,} ({result['limit']:,} limit, {result['market']:,} market, "
+          f"{result['cancel']:,} cancel) with a best bid/ask quote after every order")
+    print(f"   Fills:      {result['fills']:,}")
+    print(f"   Elapsed:    {result['elapsed']:.2f}s")
+    print(f"   Throughput: {result['requests_per_second']:,.0f} requests/s "
+          f"({result['elapsed'] / result['requests'] * 1e6:.2f}µs each)")
+    print(f"   Book:       {result['resting']:,} resting orders, "
+          f"best bid {result['best_bid']}, best ask {result['best_ask']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the price-time priority order book")
+    parser.add_argument("--orders", type=int, default=200_000, help="Requests to process")
+    parser.add_argument("--cancel-rate", type=float, default=0.3)
+    parser.add_argument("--market-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"📈 Order book benchmark ({args.orders:,} requests)")
+    print_benchmark(benchmark(args.orders, args.cancel_rate, args.market_rate, seed=args.seed))
+
+
+if __name__ == "__main__":
+    main()
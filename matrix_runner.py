@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Parallel test matrix for the n8n Voice-Activated Trading System
+
+Expands a list of scenarios into every (scenario x exchange x repetition)
+cell and runs the cells on a bounded thread pool. Each worker thread gets its
+own tester (requests.Session is not meant to be shared between threads) and
+results come back in matrix order regardless of completion order, so reports
+are deterministic while wall time approaches that of the slowest call.
+
+A scenario is a dict:
+    name:         Label used in the report
+    call:         Callable (tester, exchange) -> API response
+    check:        Optional callable (response) -> (passed, message)
+    per_exchange: Whether the scenario is repeated for every exchange
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_EXCHANGES = ["binance", "coinbase"]
+
+
+def build_matrix(scenarios, exchanges=DEFAULT_EXCHANGES, repetitions=1):
+    """
+    Expand scenarios into matrix cells
+
+    Args:
+        scenarios: Scenario dicts (see module docstring)
+        exchanges: Exchanges for per_exchange scenarios
+        repetitions: Times every (scenario, exchange) pair is run
+
+    Returns:
+        List of cells in deterministic order
+    """
+    cells = []
+    for scenario in scenarios:
+        for exchange in (exchanges if scenario.get("per_exchange") else [None]):
+            for repetition in range(repetitions):
+                cells.append({
+                    "index": len(cells),
+                    "scenario": scenario,
+                    "exchange": exchange,
+                    "repetition": repetition,
+                })
+    return cells
+
+
+def run_matrix(make_tester, scenarios, exchanges=DEFAULT_EXCHANGES, repetitions=1, max_workers=8):
+    """
+    Run every matrix cell on a thread pool
+
+    Args:
+        make_tester: Zero-argument callable creating a tester for a worker thread
+        scenarios: Scenario dicts (see module docstring)
+        exchanges: Exchanges for per_exchange scenarios
+        repetitions: Times every (scenario, exchange) pair is run
+        max_workers: Maximum number of concurrent calls
+
+    Returns:
+        Dict with the per-cell results in matrix order and the wall time
+    """
+    cells = build_matrix(scenarios, exchanges, repetitions)
+    local = threading.local()
+
+    def run_cell(cell):
+        tester = getattr(local, "tester", None)
+        if tester is None:
+            tester = local.tester = make_tester()
+
+        scenario = cell["scenario"]
+        record = {
+            "index": cell["index"],
+            "scenario": scenario["name"],
+            "exchange": cell["exchange"],
+            "repetition": cell["repetition"],
+        }
+        started = time.perf_counter()
+        try:
+            response = scenario["call"](tester, cell["exchange"])
+            record["latency"] = time.perf_counter() - started
+            record["response"] = response
+            check = scenario.get("check")
+            record["passed"], record["message"] = check(response) if check else (True, "")
+        except Exception as e:
+            record["latency"] = time.perf_counter() - started
+            record["passed"], record["message"] = False, f"Exception: {e}"
+        return record
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # map() yields results in submission order, not completion order
+        results = list(pool.map(run_cell, cells))
+    return {"results": results, "wall_time": time.perf_counter() - started}
+
+
+def print_matrix_report(report):
+    """Print one line per matrix cell followed by a timing summary"""
+    results = report["results"]
+    for record in results:
+        label = record["scenario"]
+        if record["exchange"]:
+            label += f" [{record['exchange']}]"
+        status = "✅" if record["passed"] else "❌"
+        print(f"   {status} {label:<40} #{record['repetition'] + 1:<3}"
+              f"{record['latency'] * 1000:8.1f}ms  {record['message']}")
+
+    if not results:
+        return
+    serial_time = sum(r["latency"] for r in results)
+    slowest = max(r["latency"] for r in results)
+    passed = sum(1 for r in results if r["passed"])
+    print(f"\n   Passed:      {passed}/{len(results)}")
+    print(f"   Wall time:   {report['wall_time']:.2f}s "
+          f"(serial {serial_time:.2f}s, slowest call {slowest:.2f}s)")
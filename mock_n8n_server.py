@@ -0,0 +1,1412 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the n8n Voice-Activated Trading workflow
+
+Serves the workflow's webhooks with the response shapes the tester checks,
+so the load and regression tooling can run offline:
+
+    POST /webhook/voice-command          audio_url or multipart upload, Idempotency-Key dedupe
+    POST /webhook/voice-command/batch    many commands for one workflow start-up
+    POST /webhook/voice-command/stream   chunked audio in, Server-Sent Events out
+    GET  /webhook/balance                ETag and If-None-Match revalidation
+    GET  /webhook/orders                 ?since=<cursor> returns only changed orders
+
+Every endpoint and stage has a configurable latency distribution and error
+rate, and voice commands report their stage timings in the body and a
+Server-Timing header. The optional matching engine, paper-trading ledger,
+risk checks and fixture manifest are described in MockWorkflow and --help.
+
+Usage:
+    python mock_n8n_server.py --port 5678 \\
+        --latency voice-command=lognormal:800:0.5 --error-rate voice-command=0.02
+    N8N_BASE_URL=http://127.0.0.1:5678 python test-voic2trade.py
+"""
+
+import argparse
+import bisect
+import email.parser
+import email.policy
+import hashlib
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from matching_engine import SimulatedExchange
+from fixture_registry import FixtureManifest
+from paper_ledger import PaperLedger
+from risk_engine import DEFAULT_LIMITS, RiskEngine
+from symbol_registry import REFERENCE_PRICES, REGISTRY
+from trade_parser import parse_trade_command
+from transcription_cache import TranscriptionCache, hash_audio
+
+ENDPOINTS = ["voice-command", "balance", "orders"]
+
+# Pipeline stages with their own latency distribution
+STAGES = ["fetch", "stt", "parse", "order", "format", "revalidate", "partial", "finalize"]
+
+MAX_BODY_SIZE = 25 * 1024 * 1024
+
+MAX_BATCH_ITEMS = 256
+
+DEDUPE_ENTRIES = 10_000
+DEDUPE_TTL = 24 * 3600
+
+SUPPORTED_EXCHANGES = ["binance", "coinbase"]
+
+EXCHANGE_SYMBOLS = REGISTRY.exchange_symbols(SUPPORTED_EXCHANGES)
+
+SYMBOL_ASSETS = {symbol: asset for symbols in EXCHANGE_SYMBOLS.values() for asset, symbol in symbols.items()}
+
+QUOTE_ASSETS = {exchange: REGISTRY.quote_asset(exchange) for exchange in SUPPORTED_EXCHANGES}
+
+INITIAL_BALANCES = {
+    "binance": {"BTC": 2.5, "ETH": 15.0, "USDT": 150000.0},
+    "coinbase": {"BTC": 1.0, "ETH": 25.0, "USD": 80000.0},
+}
+
+DEFAULT_LATENCIES = {
+    "voice-command": "lognormal:100:0.5",
+    "fetch": "lognormal:150:0.5",
+    "stt": "lognormal:600:0.4",
+    "parse": "lognormal:400:0.4",
+    "order": "lognormal:120:0.4",
+    "format": "lognormal:15:0.3",
+    "revalidate": "lognormal:10:0.3",
+    "partial": "lognormal:40:0.3",
+    "finalize": "lognormal:150:0.4",
+    "balance": "lognormal:150:0.3",
+    "orders": "lognormal:200:0.3",
+}
+
+
+class LatencyModel:
+    """Random latency distribution parsed from a 'kind:arg:arg' spec (milliseconds)"""
+
+    def __init__(self, spec):
+        """
+        Args:
+            spec: One of 'none', 'fixed:MS', 'uniform:LOW_MS:HIGH_MS',
+                'exponential:MEAN_MS' or 'lognormal:MEDIAN_MS:SIGMA'
+        """
+        self.spec = spec
+        kind, *args = spec.split(":")
+        try:
+            args = [float(a) for a in args]
+        except ValueError:
+            raise ValueError(f"Invalid latency spec: {spec}")
+
+        expected_args = {"none": 0, "fixed": 1, "uniform": 2, "exponential": 1, "lognormal": 2}
+        if kind not in expected_args:
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        if len(args) != expected_args[kind]:
+            raise ValueError(f"Latency spec '{spec}' needs {expected_args[kind]} argument(s)")
+
+        self.kind = kind
+        self.args = args
+
+    def sample(self, rng):
+        """Draw one latency in seconds"""
+        if self.kind == "none":
+            return 0.0
+        if self.kind == "fixed":
+            ms = self.args[0]
+        elif self.kind == "uniform":
+            ms = rng.uniform(*self.args)
+        elif self.kind == "exponential":
+            ms = rng.expovariate(1.0 / self.args[0]) if self.args[0] > 0 else 0.0
+        else:
+            median, sigma = self.args
+            ms = rng.lognormvariate(0.0, sigma) * median
+        return max(ms, 0.0) / 1000.0
+
+
+class StageTimer:
+    """Wall time spent in each stage of one workflow execution"""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    def to_ms(self):
+        """Stage durations in milliseconds"""
+        return {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()}
+
+
+class IdempotencyTable:
+    """Bounded LRU of responses keyed by idempotency key"""
+
+    def __init__(self, max_entries=DEDUPE_ENTRIES, ttl=DEDUPE_TTL):
+        """
+        Args:
+            max_entries: Keys remembered; the least recently used are evicted first
+            ttl: Seconds a key is remembered
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.replays = 0
+        self.conflicts = 0
+
+    def run(self, key, fingerprint, execute):
+        """
+        Execute a request once per key
+
+        Args:
+            key: Idempotency key sent by the client
+            fingerprint: Digest of what the request asks for; reusing a key
+                for a different request is rejected
+            execute: Zero-argument callable returning (status, body)
+
+        Returns:
+            Tuple of (status, body, replayed)
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and now - entry["created"] > self.ttl:
+                del self.entries[key]
+                entry = None
+            leader = entry is None
+            if leader:
+                entry = self.entries[key] = {"fingerprint": fingerprint, "created": now,
+                                             "done": threading.Event(), "result": None}
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+            else:
+                self.entries.move_to_end(key)
+                if entry["fingerprint"] != fingerprint:
+                    self.conflicts += 1
+                    return 422, {
+                        "success": False,
+                        "error": "Idempotency key reused",
+                        "message": "The Idempotency-Key was already used for a different request",
+                    }, False
+
+        if not leader:
+            entry["done"].wait()
+            status, body = entry["result"]
+            if status >= 500:
+                # The original attempt failed and was forgotten; the client may retry
+                return status, dict(body), False
+            with self.lock:
+                self.replays += 1
+            return status, dict(body), True
+
+        try:
+            status, body = execute()
+        except BaseException:
+            entry["result"] = (500, {"success": False, "error": "Workflow execution failed"})
+            self._forget(key, entry)
+            raise
+        entry["result"] = (status, body)
+        if status >= 500:
+            # Failures are not remembered, so a retry runs the workflow again
+            self._forget(key, entry)
+        else:
+            entry["done"].set()
+        return status, body, False
+
+    def _forget(self, key, entry):
+        with self.lock:
+            if self.entries.get(key) is entry:
+                del self.entries[key]
+        entry["done"].set()
+
+    def stats(self):
+        """Keys remembered, replayed duplicates and rejected key reuses"""
+        with self.lock:
+            return {"entries": len(self.entries), "replays": self.replays, "conflicts": self.conflicts}
+
+
+class Speculation:
+    """Orders staged from partial transcripts, committed or rolled back on the final one"""
+
+    def __init__(self, workflow, user_id, emit):
+        self.workflow = workflow
+        self.user_id = user_id
+        self.emit = emit
+        self.intent = None
+        self.future = None
+        self.attempts = 0
+        self.rollbacks = 0
+        self.committed = False
+
+    def update(self, transcription, intent):
+        """Stage an order for a newly parsed intent, replacing a different staged one"""
+        if intent is None or intent == self.intent:
+            return
+        if self.workflow.validate_intent(transcription, intent) is not None:
+            return
+        self.rollback("superseded by a later partial transcript")
+        self.intent = intent
+        self.attempts += 1
+        self.future = self.workflow.batch_pool.submit(self.workflow.place_order, intent, self.user_id, True)
+        self.emit("speculate", {"transcription": transcription, "intent": intent})
+
+    def rollback(self, reason):
+        """Cancel the staged order once it has been placed"""
+        if self.future is None:
+            return
+        self.rollbacks += 1
+        self.future.add_done_callback(lambda future: self.workflow.cancel_staged(future.result()["order_id"]))
+        self.emit("rollback", {"intent": self.intent, "reason": reason})
+        self.intent = self.future = None
+
+    def resolve(self, intent):
+        """
+        Validate the staged order against the final intent
+
+        Returns:
+            The committed order, None if nothing matching was staged
+        """
+        if self.future is not None and intent == self.intent:
+            order = self.workflow.commit_staged(self.future.result()["order_id"])
+            self.committed = True
+            self.emit("commit", {"intent": intent, "order_id": order["order_id"]})
+            return order
+        self.rollback("final transcript differs")
+        return None
+
+    def summary(self):
+        return {"attempts": self.attempts, "rollbacks": self.rollbacks, "committed": self.committed}
+
+
+class MockWorkflow:
+    """In-memory implementation of the voice trading workflow"""
+
+    def __init__(self, latencies=None, error_rates=None, seed=None, transcription_cache=None,
+                 fast_path=True, order_history=0, batch_workers=16, dedupe_entries=DEDUPE_ENTRIES,
+                 matching_engine=None, ledger=None, risk_engine=None, fixtures=None):
+        """
+        Args:
+            latencies: Dict mapping endpoint or stage to a latency spec or LatencyModel
+            error_rates: Dict mapping endpoint to the probability of a simulated failure
+            seed: Seed for latency and error sampling
+            transcription_cache: Optional TranscriptionCache used by the STT stage;
+                a hit skips it
+            fast_path: Try the deterministic trade_parser before the simulated
+                LLM ('parse' stage)
+            order_history: Historical orders pre-loaded per exchange
+            batch_workers: Batch items processed in parallel
+            dedupe_entries: Idempotency keys remembered for voice-command dedupe
+            matching_engine: Optional SimulatedExchange that matches
+                orders in price-time priority order books; its books are
+                seeded with market-maker liquidity around the reference prices.
+                Market orders fill at book prices, limit orders rest until
+                crossed, and fills of resting orders show up in
+                /webhook/orders like any other status change
+            ledger: Optional PaperLedger; every order change is booked in it,
+                /webhook/balance?user_id= serves that user's free and locked
+                balances from it, and its orders, balances and open limit
+                orders are restored on start-up
+            risk_engine: Optional RiskEngine every order must pass before it
+                is placed ('risk' stage): max notional, max position, price
+                band around the last price and available balance (per user
+                with a ledger). A rejected command gets a 422 naming the rule
+            fixtures: FixtureManifest of the recordings the simulated STT
+                recognizes by their sha256, the bundled fixtures.jsonl if omitted
+        """
+        latencies = {**DEFAULT_LATENCIES, **(latencies or {})}
+        self.latencies = {
+            endpoint: spec if isinstance(spec, LatencyModel) else LatencyModel(spec)
+            for endpoint, spec in latencies.items()
+        }
+        self.error_rates = {endpoint: 0.0 for endpoint in ENDPOINTS}
+        self.error_rates.update(error_rates or {})
+        self.transcription_cache = transcription_cache
+        self.fast_path = fast_path
+
+        # The simulated STT recognizes fixtures by the audio hash the manifest lists,
+        # so no recording is opened at start-up
+        self.fixture_digests = {}
+        self.fixture_transcripts = {}
+        self.fixture_stems = {}
+        self.transcript_intents = {}
+        for fixture in (fixtures if fixtures is not None else FixtureManifest()):
+            name = os.path.basename(fixture.path)
+            self.fixture_digests[name] = fixture.sha256
+            self.fixture_transcripts[name] = fixture.transcript
+            self.fixture_stems.setdefault(name.split(".")[0], name)
+            if fixture.intent is not None:
+                self.transcript_intents[fixture.transcript] = fixture.intent
+        self.fixture_names = {digest: name for name, digest in self.fixture_digests.items()}
+
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.order_ids = itertools.count(1)
+        self.orders = {exchange: [] for exchange in SUPPORTED_EXCHANGES}
+        self.orders_by_id = {}
+        # Speculatively placed order id -> order, executed once committed
+        self.staged = {}
+
+        # Change log per exchange: sequence numbers and the order each one touched
+        self.order_revisions = itertools.count(1)
+        self.change_seqs = {exchange: [] for exchange in SUPPORTED_EXCHANGES}
+        self.change_ids = {exchange: [] for exchange in SUPPORTED_EXCHANGES}
+
+        self.batch_pool = ThreadPoolExecutor(max_workers=batch_workers, thread_name_prefix="batch")
+        self.idempotency = IdempotencyTable(dedupe_entries)
+        self.matching_engine = matching_engine
+        if matching_engine is not None:
+            for name, symbols in EXCHANGE_SYMBOLS.items():
+                for asset, symbol in symbols.items():
+                    matching_engine.seed_liquidity(name, symbol, REFERENCE_PRICES[asset], rng=self.rng)
+
+        self.risk_engine = risk_engine
+        self.static_holdings = {exchange: {asset: (amount, 0.0) for asset, amount in balances.items()}
+                                for exchange, balances in INITIAL_BALANCES.items()}
+        self.ledger = ledger
+        restored = self.restore_orders() if ledger is not None else 0
+        if not restored:
+            for exchange in SUPPORTED_EXCHANGES:
+                self.seed_order_history(exchange, order_history)
+
+    def simulate(self, endpoint):
+        """
+        Sleep for a sampled latency and decide whether the call fails
+
+        Returns:
+            Error response tuple when the call should fail, None otherwise
+        """
+        time.sleep(self.latencies[endpoint].sample(self.rng))
+        if self.rng.random() < self.error_rates.get(endpoint, 0.0):
+            return 500, {
+                "success": False,
+                "error": "Workflow execution failed",
+                "message": f"Simulated {endpoint} failure",
+            }
+        return None
+
+    def voice_command(self, payload, audio=None, audio_name=None, overhead=True):
+        """
+        Handle POST /webhook/voice-command
+
+        Args:
+            payload: JSON body, or the form fields of a multipart upload
+            audio: Uploaded audio bytes of a multipart upload
+            audio_name: File name of the uploaded audio
+            overhead: Simulate workflow start-up; batch items share one start-up
+        """
+        key = payload.get("idempotency_key") if isinstance(payload, dict) else None
+        if not key:
+            return self.timed_voice_command(payload, audio, audio_name, overhead)
+
+        # The key only replays the same command: user and audio must match
+        started = time.perf_counter()
+        fingerprint = hashlib.sha256(json.dumps([
+            payload.get("user_id", "test_user"), payload.get("audio_url"), hash_audio(audio) if audio else None,
+        ]).encode("utf-8")).hexdigest()
+        status, body, replayed = self.idempotency.run(
+            str(key), fingerprint, lambda: self.timed_voice_command(payload, audio, audio_name, overhead))
+        if replayed:
+            waited = round((time.perf_counter() - started) * 1000, 3)
+            body["idempotent_replay"] = True
+            body["timings"] = {"dedupe": waited, "total": waited}
+        return status, body
+
+    def timed_voice_command(self, payload, audio, audio_name, overhead=True):
+        """Run the voice command pipeline and attach its stage timings"""
+        timer = StageTimer()
+        started = time.perf_counter()
+        status, body = self.run_voice_command(timer, payload, audio, audio_name, overhead)
+        timer.stages["total"] = time.perf_counter() - started
+        body["timings"] = timer.to_ms()
+        return status, body
+
+    def run_voice_command(self, timer, payload, audio, audio_name, overhead=True):
+        """Voice command pipeline, timing every stage into timer"""
+        if overhead:
+            with timer.stage("overhead"):
+                failure = self.simulate("voice-command")
+            if failure:
+                return failure
+
+        if not isinstance(payload, dict):
+            payload = {}
+        audio_url = payload.get("audio_url")
+        if not audio and not audio_url:
+            return 400, {
+                "success": False,
+                "error": "No audio input provided",
+                "message": "Request must include a non-empty audio_url or an uploaded audio file",
+            }
+
+        # A transcription sent by the client (e.g. from its cache) skips fetch and STT
+        transcription = payload.get("transcription")
+        if not isinstance(transcription, str) or not transcription:
+            if audio:
+                digest = hash_audio(audio)
+            else:
+                with timer.stage("fetch"):
+                    digest = self.fetch_audio(audio_url)
+            with timer.stage("stt"):
+                transcription = self.transcribe(digest, audio_name)
+        if transcription is None:
+            source = f"audio at {audio_url}" if not audio else "uploaded audio"
+            return 422, {
+                "success": False,
+                "error": "Transcription failed",
+                "message": f"Could not transcribe {source}",
+            }
+
+        # An intent cached by the client alongside its transcription skips parsing
+        intent = payload.get("intent") if payload.get("transcription") else None
+        if not is_valid_intent(intent):
+            with timer.stage("parse"):
+                intent = self.parse(transcription)
+        return self.execute_intent(timer, transcription, intent, payload.get("user_id", "test_user"))
+
+    def validate_intent(self, transcription, intent):
+        """Error response tuple when an intent cannot be executed, None if it can"""
+        if intent is None:
+            return 200, {
+                "success": False,
+                "transcription": transcription,
+                "error": "Not a trading command",
+                "message": "The voice command did not describe a trade",
+            }
+        if intent["exchange"] not in SUPPORTED_EXCHANGES:
+            return 400, unsupported_exchange(intent["exchange"])
+        if intent["asset"] not in EXCHANGE_SYMBOLS[intent["exchange"]]:
+            return 422, {
+                "success": False,
+                "transcription": transcription,
+                "error": "Unsupported asset",
+                "message": f"{intent['asset']} cannot be traded on {intent['exchange']}",
+            }
+        message = REGISTRY.instrument(intent["exchange"], intent["asset"]).check(intent["quantity"], intent["price"])
+        if message:
+            return 422, {
+                "success": False,
+                "transcription": transcription,
+                "error": "Invalid order size",
+                "message": message,
+            }
+        return None
+
+    def pre_trade_check(self, transcription, intent, user_id):
+        """Error response tuple when the risk engine rejects a valid intent, None if it passes"""
+        if self.risk_engine is None:
+            return None
+        exchange = intent["exchange"]
+        last_price = None
+        if self.matching_engine is not None:
+            last_price = self.matching_engine.last_price(exchange, EXCHANGE_SYMBOLS[exchange][intent["asset"]])
+        if last_price is None:
+            last_price = REFERENCE_PRICES[intent["asset"]]
+        holdings = (self.ledger.holdings(user_id, exchange) if self.ledger is not None
+                    else self.static_holdings[exchange])
+        rejection = self.risk_engine.check(user_id, intent, last_price, holdings)
+        if rejection is None:
+            return None
+        rule, message = rejection
+        return 422, {
+            "success": False,
+            "transcription": transcription,
+            "intent": intent,
+            "error": "Risk check failed",
+            "rule": rule,
+            "message": message,
+        }
+
+    def execute_intent(self, timer, transcription, intent, user_id, order=None, risk_checked=False,
+                       rejection=None):
+        """
+        Validate a parsed intent, place its order and format the response
+
+        Args:
+            order: Order already placed for this intent (a committed speculation)
+            risk_checked: pre_trade_check() already ran for this intent
+            rejection: Its error response, None if the intent passed
+        """
+        error = self.validate_intent(transcription, intent)
+        if error:
+            return error
+
+        if order is None and self.risk_engine is not None:
+            if not risk_checked:
+                with timer.stage("risk"):
+                    rejection = self.pre_trade_check(transcription, intent, user_id)
+            if rejection:
+                return rejection
+        if order is None:
+            with timer.stage("order"):
+                order = self.place_order(intent, user_id)
+
+        with timer.stage("format"):
+            time.sleep(self.latencies["format"].sample(self.rng))
+            return 200, {
+                "success": True,
+                "transcription": transcription,
+                "trade_summary": trade_summary(intent),
+                "intent": intent,
+                "order_result": order,
+            }
+
+    def voice_command_stream(self, chunks, emit, audio_name=None, audio_length=0, user_id="test_user",
+                             speculate=False, default_exchange=None):
+        """
+        Handle POST /webhook/voice-command/stream
+
+        Partial transcripts are revealed in proportion to the audio received
+        so far. A fixture is recognized by its file name up front, as a
+        streaming recognizer would start decoding right away; other audio is
+        transcribed in one go once the stream ends.
+
+        Args:
+            chunks: Iterable of audio byte chunks, in arrival order
+            emit: Callable (event, data) sending one Server-Sent Event
+            audio_name: File name of the recording
+            audio_length: Total audio bytes announced by the client, 0 if unknown
+            user_id: User identifier
+            speculate: Stage orders for intents parsed from partial transcripts;
+                the final intent commits the staged order or rolls it back
+            default_exchange: Exchange assumed by speculation until one is spoken
+        """
+        timer = StageTimer()
+        started = time.perf_counter()
+        with timer.stage("overhead"):
+            failure = self.simulate("voice-command")
+        if failure:
+            emit("error", failure[1])
+            return
+
+        transcript = None
+        if audio_name:
+            stem = os.path.basename(audio_name).split(".")[0]
+            transcript = self.fixture_transcripts.get(self.fixture_stems.get(stem))
+        words = transcript.split() if transcript else []
+
+        digest = hashlib.sha256()
+        received = shown = 0
+        early_intent = None
+        speculation = Speculation(self, user_id, emit) if speculate else None
+        for chunk in chunks:
+            digest.update(chunk)
+            received += len(chunk)
+            if not words or audio_length <= 0:
+                continue
+            heard = min(len(words), len(words) * received // audio_length)
+            if heard <= shown:
+                continue
+            with timer.stage("partial"):
+                time.sleep(self.latencies["partial"].sample(self.rng))
+            shown = heard
+            text = " ".join(words[:shown])
+            emit("partial", {"transcription": text, "words": shown, "audio_bytes": received})
+            if early_intent is None:
+                early_intent = parse_trade_command(text)
+                if early_intent is not None:
+                    emit("intent", {"early": True, "transcription": text, "intent": early_intent})
+            if speculation is not None:
+                speculation.update(text, parse_trade_command(text, default_exchange))
+
+        if received == 0:
+            emit("error", {"success": False, "error": "No audio input provided",
+                           "message": "The audio stream was empty"})
+            return
+
+        if transcript is not None:
+            with timer.stage("finalize"):
+                time.sleep(self.latencies["finalize"].sample(self.rng))
+        else:
+            with timer.stage("stt"):
+                transcript = self.transcribe(digest.hexdigest(), audio_name)
+        if transcript is None:
+            emit("error", {"success": False, "error": "Transcription failed",
+                           "message": "Could not transcribe streamed audio"})
+            return
+        emit("transcript", {"transcription": transcript, "final": True})
+
+        with timer.stage("parse"):
+            intent = self.parse(transcript)
+        emit("intent", {"early": False, "transcription": transcript, "intent": intent})
+
+        order = None
+        risk_checked, rejection = False, None
+        if speculation is not None:
+            # The check decides the commit; a rollback reuses its result instead of checking again
+            valid = self.validate_intent(transcript, intent) is None
+            if valid and self.risk_engine is not None:
+                with timer.stage("risk"):
+                    rejection = self.pre_trade_check(transcript, intent, user_id)
+                risk_checked = True
+            with timer.stage("commit"):
+                order = speculation.resolve(intent if valid and rejection is None else None)
+        status, body = self.execute_intent(timer, transcript, intent, user_id, order=order,
+                                           risk_checked=risk_checked, rejection=rejection)
+        if speculation is not None:
+            body["speculation"] = speculation.summary()
+        timer.stages["total"] = time.perf_counter() - started
+        body["timings"] = timer.to_ms()
+        emit("result", {"status": status, **body})
+
+    def voice_command_batch(self, payload):
+        """
+        Handle POST /webhook/voice-command/batch
+
+        The workflow starts once for the whole batch; every item then runs
+        the voice-command pipeline on the batch pool. Per-item failures are
+        reported in that item's result and do not fail the batch.
+
+        Args:
+            payload: JSON body {"items": [voice-command payloads], "user_id": default}
+        """
+        timer = StageTimer()
+        started = time.perf_counter()
+        status, body = self.run_voice_command_batch(timer, payload)
+        timer.stages["total"] = time.perf_counter() - started
+        body["timings"] = timer.to_ms()
+        return status, body
+
+    def run_voice_command_batch(self, timer, payload):
+        items = payload.get("items") if isinstance(payload, dict) else None
+        if not isinstance(items, list) or not items:
+            return 400, {
+                "success": False,
+                "error": "No batch items provided",
+                "message": "Request must include a non-empty 'items' list of voice commands",
+            }
+        if len(items) > MAX_BATCH_ITEMS:
+            return 413, {
+                "success": False,
+                "error": "Batch too large",
+                "message": f"A batch holds at most {MAX_BATCH_ITEMS} items, got {len(items)}",
+            }
+
+        with timer.stage("overhead"):
+            failure = self.simulate("voice-command")
+        if failure:
+            return failure
+
+        default_user = payload.get("user_id", "test_user")
+
+        def run_item(item):
+            if not isinstance(item, dict):
+                return 400, {"success": False, "error": "Invalid batch item",
+                             "message": "Every batch item must be a JSON object"}
+            return self.voice_command({"user_id": default_user, **item}, overhead=False)
+
+        with timer.stage("items"):
+            outcomes = list(self.batch_pool.map(run_item, items))
+
+        results = [{"index": index, "status": status, **body}
+                   for index, (status, body) in enumerate(outcomes)]
+        return 200, {
+            "success": True,
+            "count": len(results),
+            "succeeded": sum(1 for result in results if result.get("success")),
+            "results": results,
+        }
+
+    def fetch_audio(self, audio_url):
+        """
+        Simulated download of the audio behind a URL
+
+        Returns:
+            SHA-256 of the audio, None if the URL does not name a bundled fixture
+        """
+        time.sleep(self.latencies["fetch"].sample(self.rng))
+        return self.fixture_digests.get(os.path.basename(urlparse(audio_url).path))
+
+    def transcribe(self, digest, audio_name=None):
+        """
+        Simulated speech-to-text stage
+
+        Audio is recognized by content hash; re-encoded copies of a fixture
+        (e.g. 'sell_eth.16k.ogg' from audio_preprocess.py) are recognized by
+        the fixture name their file name starts with.
+
+        Args:
+            digest: SHA-256 of the audio bytes
+            audio_name: File name of an uploaded recording
+
+        Returns:
+            Transcription of the audio, None if it cannot be transcribed
+        """
+        if digest is None:
+            return None
+
+        if self.transcription_cache is not None:
+            cached = self.transcription_cache.get(digest)
+            if cached:
+                return cached["transcription"]
+
+        name = self.fixture_names.get(digest)
+        if name is None and audio_name:
+            name = self.fixture_stems.get(os.path.basename(audio_name).split(".")[0])
+
+        time.sleep(self.latencies["stt"].sample(self.rng))
+        transcription = self.fixture_transcripts.get(name)
+        if self.transcription_cache is not None and transcription:
+            self.transcription_cache.put(digest, transcription, self.transcript_intents.get(transcription))
+        return transcription
+
+    def parse(self, transcription):
+        """
+        Parsing stage: deterministic fast path, then the simulated LLM
+
+        Returns:
+            Trade intent, None if the transcription is not a trade
+        """
+        if self.fast_path:
+            intent = parse_trade_command(transcription)
+            if intent is not None:
+                return intent
+
+        time.sleep(self.latencies["parse"].sample(self.rng))
+        return self.transcript_intents.get(transcription)
+
+    def place_order(self, intent, user_id, staged=False):
+        """
+        Record an order for a parsed intent and return its order_result
+
+        A staged order is recorded as PENDING until commit_staged() or
+        cancel_staged() is called for it.
+        """
+        time.sleep(self.latencies["order"].sample(self.rng))
+        exchange = intent["exchange"]
+        market = intent["order_type"] == "MARKET"
+        order = {
+            "order_id": f"mock-{next(self.order_ids)}",
+            "exchange": exchange,
+            "symbol": EXCHANGE_SYMBOLS[exchange][intent["asset"]],
+            "side": intent["side"],
+            "type": intent["order_type"],
+            "quantity": intent["quantity"],
+            "price": REFERENCE_PRICES[intent["asset"]] if market else intent["price"],
+            "status": "PENDING",
+            "user_id": user_id,
+            "timestamp": time.time(),
+        }
+        with self.changing():
+            if staged:
+                self.staged[order["order_id"]] = order
+            else:
+                self._execute(order)
+            self.orders[exchange].append(order)
+            self.orders_by_id[order["order_id"]] = order
+            self._record_change(order)
+        return dict(order)
+
+    def _execute(self, order):
+        """
+        Fill an order (lock held)
+
+        Without a simulated exchange, market orders fill at the reference
+        price and limit orders rest as NEW. With one, the order is matched in
+        its book, gets the resulting status, filled_quantity and
+        average_price, and every resting order it filled is updated too.
+        """
+        if self.matching_engine is None:
+            order["status"] = "FILLED" if order["type"] == "MARKET" else "NEW"
+            return
+        order["filled_quantity"] = 0.0
+        self._match(order, order["quantity"])
+
+    def _match(self, order, quantity):
+        """Submit the unfilled `quantity` of an order to its book and apply the fills (lock held)"""
+        book_order, fills = self.matching_engine.submit(
+            order["exchange"], order["symbol"], order["order_id"], order["side"], quantity,
+            None if order["type"] == "MARKET" else order["price"], owner=order["user_id"])
+        filled_before = order["filled_quantity"]
+        order["filled_quantity"] = round(filled_before + book_order.filled, 8)
+        if book_order.status == "NEW" and filled_before:
+            order["status"] = "PARTIALLY_FILLED"
+        else:
+            order["status"] = book_order.status
+        if fills:
+            notional = filled_before * order.get("average_price", order["price"])
+            notional += sum(fill.price * fill.quantity for fill in fills)
+            order["average_price"] = round(notional / order["filled_quantity"], 2)
+            if order["type"] == "MARKET":
+                order["price"] = order["average_price"]
+        for fill in fills:
+            maker = self.orders_by_id.get(fill.maker.order_id)
+            if maker is not None:
+                maker["status"] = fill.maker.status
+                maker["filled_quantity"] = round(maker["quantity"] - fill.maker.remaining, 8)
+                self._record_change(maker)
+
+    def commit_staged(self, order_id):
+        """Execute a speculatively placed order as if it had just been placed"""
+        with self.changing():
+            order = self.staged.pop(order_id)
+            self._execute(order)
+            self._record_change(order)
+            return dict(order)
+
+    def cancel_staged(self, order_id):
+        """Roll back a speculatively placed order"""
+        with self.lock:
+            self.staged.pop(order_id, None)
+        return self.set_order_status(order_id, "CANCELED")
+
+    @contextmanager
+    def changing(self):
+        """
+        Hold the lock while orders change, then book the changes in the ledger
+
+        The ledger writes to disk, so it only gets the changes once the lock
+        is released; its shards apply them in the order they were made.
+        """
+        try:
+            with self.lock:
+                yield
+        finally:
+            if self.ledger is not None:
+                self.ledger.drain()
+
+    def _record_change(self, order, book=True):
+        """Stamp an order with the next revision and queue the change for the ledger (lock held)"""
+        revision = next(self.order_revisions)
+        order["revision"] = revision
+        self.change_seqs[order["exchange"]].append(revision)
+        self.change_ids[order["exchange"]].append(order["order_id"])
+        if book and self.ledger is not None:
+            self.ledger.submit(order, SYMBOL_ASSETS[order["symbol"]], QUOTE_ASSETS[order["exchange"]])
+
+    def restore_orders(self):
+        """
+        Reload the orders kept by the ledger after a restart
+
+        Open limit orders are rested in the matching engine again, and
+        orders that were staged by a speculation are cancelled, since the
+        stream that staged them is gone.
+
+        Returns:
+            Number of orders restored
+        """
+        orders = self.ledger.all_orders()
+        with self.changing():
+            for order in orders:
+                self.orders[order["exchange"]].append(order)
+                self.orders_by_id[order["order_id"]] = order
+                if order["status"] == "PENDING":
+                    order["status"] = "CANCELED"
+                    self._record_change(order)
+                    continue
+                self._record_change(order, book=False)
+                if (self.matching_engine is not None and order["type"] == "LIMIT"
+                        and order["status"] in ("NEW", "PARTIALLY_FILLED")):
+                    order.setdefault("filled_quantity", 0.0)
+                    self._match(order, round(order["quantity"] - order["filled_quantity"], 8))
+                    self._record_change(order)
+            if orders:
+                self.order_ids = itertools.count(
+                    max(int(order["order_id"].rsplit("-", 1)[1]) for order in orders) + 1)
+        return len(orders)
+
+    def set_order_status(self, order_id, status):
+        """
+        Change the status of an order (fill, cancel, ...)
+
+        Returns:
+            The updated order, None if the id is unknown
+        """
+        with self.changing():
+            order = self.orders_by_id.get(order_id)
+            if order is None:
+                return None
+            order["status"] = status
+            self._record_change(order)
+            return dict(order)
+
+    def seed_order_history(self, exchange, count):
+        """Pre-load filled and cancelled orders, like an account with a long history"""
+        now = time.time()
+        for index in range(count):
+            asset = self.rng.choice(list(REFERENCE_PRICES))
+            order = {
+                "order_id": f"mock-{next(self.order_ids)}",
+                "exchange": exchange,
+                "symbol": EXCHANGE_SYMBOLS[exchange][asset],
+                "side": self.rng.choice(["BUY", "SELL"]),
+                "type": "LIMIT",
+                "quantity": round(self.rng.uniform(0.01, 5.0), 4),
+                "price": round(REFERENCE_PRICES[asset] * self.rng.uniform(0.9, 1.1), 2),
+                "status": self.rng.choice(["FILLED", "FILLED", "FILLED", "CANCELED"]),
+                "user_id": "history_user",
+                "timestamp": now - (count - index) * 60,
+            }
+            with self.changing():
+                self.orders[exchange].append(order)
+                self.orders_by_id[order["order_id"]] = order
+                self._record_change(order)
+
+    def balance_snapshot(self, exchange, user_id="test_user"):
+        """Current balances of an exchange account"""
+        if self.ledger is not None:
+            return self.ledger.balances(user_id, exchange)
+        return [
+            {"asset": asset, "free": amount, "locked": 0.0}
+            for asset, amount in INITIAL_BALANCES[exchange].items()
+        ]
+
+    def balance(self, params, if_none_match=None):
+        """
+        Handle GET /webhook/balance
+
+        Args:
+            params: Query string parameters
+            if_none_match: If-None-Match header of a conditional GET
+        """
+        exchange = params.get("exchange", "binance")
+        user_id = params.get("user_id", "test_user")
+        if if_none_match and exchange in SUPPORTED_EXCHANGES:
+            # Comparing against the local snapshot avoids the exchange round trip
+            etag = balance_etag(self.balance_snapshot(exchange, user_id))
+            if etag_matches(if_none_match, etag):
+                time.sleep(self.latencies["revalidate"].sample(self.rng))
+                return 304, {"etag": etag}
+
+        failure = self.simulate("balance")
+        if failure:
+            return failure
+
+        if exchange not in SUPPORTED_EXCHANGES:
+            return 400, unsupported_exchange(exchange)
+
+        balances = self.balance_snapshot(exchange, user_id)
+        return 200, {"success": True, "exchange": exchange, "balances": balances,
+                     "etag": balance_etag(balances)}
+
+    def list_orders(self, params):
+        """
+        Handle GET /webhook/orders
+
+        Without 'since' every order is returned. With since=<cursor> only the
+        orders changed after the cursor are, each once in its latest state. A
+        cursor from the future (e.g. issued before a restart) gets a full
+        listing flagged incremental=false, so the client resynchronizes.
+        With user_id only that user's orders are returned.
+        """
+        failure = self.simulate("orders")
+        if failure:
+            return failure
+
+        exchange = params.get("exchange", "binance")
+        if exchange not in SUPPORTED_EXCHANGES:
+            return 400, unsupported_exchange(exchange)
+
+        since = params.get("since")
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                return 400, {
+                    "success": False,
+                    "error": "Invalid cursor",
+                    "message": f"'since' must be a cursor returned by a previous call, got '{since}'",
+                }
+
+        with self.lock:
+            seqs = self.change_seqs[exchange]
+            cursor = seqs[-1] if seqs else 0
+            if since is None or since > cursor:
+                orders = [dict(order) for order in self.orders[exchange]]
+                incremental = False
+            else:
+                start = bisect.bisect_right(seqs, since)
+                # dict keeps the first-seen position and drops repeated ids
+                changed = dict.fromkeys(self.change_ids[exchange][start:])
+                orders = [dict(self.orders_by_id[order_id]) for order_id in changed]
+                incremental = True
+        user_id = params.get("user_id")
+        if user_id is not None:
+            orders = [order for order in orders if order.get("user_id") == user_id]
+        return 200, {"success": True, "exchange": exchange, "count": len(orders), "orders": orders,
+                     "cursor": cursor, "incremental": incremental}
+
+
+def parse_multipart(content_type, body):
+    """
+    Split a multipart/form-data body into form fields and uploaded files
+
+    Returns:
+        Tuple of (fields, files): fields maps name to text value, files maps
+        name to (filename, bytes)
+    """
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body)
+
+    fields, files = {}, {}
+    if not message.is_multipart():
+        return fields, files
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        if not name:
+            continue
+        data = part.get_payload(decode=True) or b""
+        filename = part.get_filename()
+        if filename is not None:
+            files[name] = (filename, data)
+        else:
+            fields[name] = data.decode("utf-8", errors="replace")
+    return fields, files
+
+
+def is_valid_intent(intent):
+    """Whether a client-supplied intent has the shape the parsing stage produces"""
+    return (isinstance(intent, dict)
+            and intent.get("side") in ("BUY", "SELL")
+            and isinstance(intent.get("quantity"), (int, float)) and intent["quantity"] > 0
+            and isinstance(intent.get("asset"), str)
+            and intent.get("order_type") in ("MARKET", "LIMIT")
+            and (intent.get("price") is None or isinstance(intent["price"], (int, float)))
+            and (intent["order_type"] == "MARKET" or intent.get("price") is not None)
+            and isinstance(intent.get("exchange"), str))
+
+
+def trade_summary(intent):
+    """Human readable one-line description of a parsed intent"""
+    price = "market price" if intent["price"] is None else f"${intent['price']:,.2f}"
+    return (f"{intent['side']} {intent['quantity']:g} {intent['asset']} "
+            f"on {intent['exchange'].capitalize()} at {price}")
+
+
+def balance_etag(balances):
+    """Strong ETag of a balance snapshot"""
+    data = json.dumps(balances, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return f'"{hashlib.sha256(data).hexdigest()[:20]}"'
+
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header value matches an ETag"""
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def unsupported_exchange(exchange):
+    return {
+        "success": False,
+        "error": "Unsupported exchange",
+        "message": f"Exchange '{exchange}' is not supported; use one of {', '.join(SUPPORTED_EXCHANGES)}",
+    }
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    """Routes webhook requests to the server's MockWorkflow"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; don't let Nagle delay the body
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        workflow = self.server.workflow
+        routes = {
+            "/webhook/balance": lambda params: workflow.balance(
+                params, if_none_match=self.headers.get("If-None-Match")),
+            "/webhook/orders": workflow.list_orders,
+        }
+        self.dispatch(routes, url.path, params)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.rstrip("/") == "/webhook/voice-command/stream":
+            self.handle_stream(url)
+            return
+
+        try:
+            body = self.read_body()
+        except ValueError as e:
+            self.close_connection = True
+            self.send_json(400, {"success": False, "error": "Invalid request body", "message": str(e)})
+            return
+
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("multipart/form-data"):
+            self.handle_upload(url.path, content_type, body)
+            return
+
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            self.send_json(400, {"success": False, "error": "Invalid JSON body", "message": "Request body is not valid JSON"})
+            return
+        if (url.path.rstrip("/") == "/webhook/voice-command" and isinstance(payload, dict)
+                and self.headers.get("Idempotency-Key")):
+            payload.setdefault("idempotency_key", self.headers["Idempotency-Key"])
+
+        routes = {
+            "/webhook/voice-command": self.server.workflow.voice_command,
+            "/webhook/voice-command/batch": self.server.workflow.voice_command_batch,
+        }
+        self.dispatch(routes, url.path, payload)
+
+    def handle_upload(self, path, content_type, body):
+        """Route a multipart/form-data voice command with the audio in the body"""
+        if path.rstrip("/") != "/webhook/voice-command":
+            self.send_json(404, {"success": False, "error": "Not found", "message": f"No upload webhook at {path}"})
+            return
+
+        fields, files = parse_multipart(content_type, body)
+        if self.headers.get("Idempotency-Key"):
+            fields.setdefault("idempotency_key", self.headers["Idempotency-Key"])
+        audio = files.get("audio")
+        status, result = self.server.workflow.voice_command(
+            fields, audio=audio[1] if audio else None, audio_name=audio[0] if audio else None)
+        self.send_json(status, result)
+
+    def handle_stream(self, url):
+        """Answer a streamed voice command with Server-Sent Events while its audio arrives"""
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            audio_length = int(params.get("audio_length") or 0)
+        except ValueError:
+            audio_length = 0
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def emit(event, data):
+            self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+
+        try:
+            self.server.workflow.voice_command_stream(
+                self.iter_body(), emit, audio_name=params.get("audio_name"),
+                audio_length=audio_length, user_id=params.get("user_id", "test_user"),
+                speculate=params.get("speculate") in ("1", "true"),
+                default_exchange=params.get("default_exchange"))
+        except ValueError as e:
+            emit("error", {"success": False, "error": "Invalid request body", "message": str(e)})
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def read_body(self):
+        """Read a Content-Length or chunked request body"""
+        return b"".join(self.iter_body())
+
+    def iter_body(self, chunk_size=64 * 1024):
+        """Yield a Content-Length or chunked request body as it arrives"""
+        if "chunked" not in self.headers.get("Transfer-Encoding", "").lower():
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY_SIZE:
+                raise ValueError(f"Request body larger than {MAX_BODY_SIZE} bytes")
+            while length > 0:
+                data = self.rfile.read1(min(length, chunk_size))
+                if not data:
+                    raise ValueError("Request body ended early")
+                length -= len(data)
+                yield data
+            return
+
+        size = 0
+        while True:
+            line = self.rfile.readline(65537)
+            try:
+                length = int(line.split(b";")[0].strip(), 16)
+            except ValueError:
+                raise ValueError("Malformed chunk size in chunked body")
+            if length == 0:
+                # Skip optional trailers up to the terminating empty line
+                while self.rfile.readline(65537) not in (b"\r\n", b"\n", b""):
+                    pass
+                return
+            size += length
+            if size > MAX_BODY_SIZE:
+                raise ValueError(f"Request body larger than {MAX_BODY_SIZE} bytes")
+            yield self.rfile.read(length)
+            self.rfile.readline()
+
+    def dispatch(self, routes, path, argument):
+        handler = routes.get(path.rstrip("/"))
+        if handler is None:
+            self.send_json(404, {"success": False, "error": "Not found", "message": f"No webhook at {path}"})
+            return
+        status, body = handler(argument)
+        self.send_json(status, body)
+
+    def send_json(self, status, body):
+        etag = body.get("etag") if isinstance(body, dict) else None
+        if status == 304:
+            self.send_response(status)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if etag:
+            self.send_header("ETag", etag)
+        timings = body.get("timings") if isinstance(body, dict) else None
+        if isinstance(timings, dict):
+            self.send_header("Server-Timing", ", ".join(f"{name};dur={ms}" for name, ms in timings.items()))
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class MockN8nServer(ThreadingHTTPServer):
+    """Threaded HTTP server hosting a MockWorkflow"""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, host="127.0.0.1", port=5678, workflow=None, verbose=False):
+        """
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            workflow: MockWorkflow instance, a default one is created if omitted
+            verbose: Log every request to stderr
+        """
+        super().__init__((host, port), MockRequestHandler)
+        self.workflow = workflow or MockWorkflow()
+        self.verbose = verbose
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve requests from a background thread"""
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop the background thread and release the socket"""
+        self.shutdown()
+        self.server_close()
+
+    def handle_error(self, request, client_address):
+        # Clients that time out or lose a hedge race hang up mid-response
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def load_risk_engine(path=None):
+    """RiskEngine with the default limits, or with the limits of a JSON file"""
+    if path is None:
+        return RiskEngine(QUOTE_ASSETS)
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    return RiskEngine(QUOTE_ASSETS, {**DEFAULT_LIMITS, **config.get("default", {})}, config.get("users"))
+
+
+def parse_endpoint_options(values, convert, valid=ENDPOINTS):
+    """Parse repeated 'name=value' options ('all' applies to every valid name)"""
+    options = {}
+    for value in values or []:
+        endpoint, sep, setting = value.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"Expected NAME=VALUE, got '{value}'")
+        targets = valid if endpoint == "all" else [endpoint]
+        for target in targets:
+            if target not in valid:
+                raise argparse.ArgumentTypeError(f"Unknown endpoint or stage '{target}'")
+            options[target] = convert(setting)
+    return options
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the n8n voice trading workflow")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5678)
+    parser.add_argument("--latency", action="append", metavar="NAME=SPEC",
+                        help="Latency distribution of an endpoint or stage, "
+                             "e.g. voice-command=lognormal:300:0.5, stt=fixed:600 or all=none")
+    parser.add_argument("--error-rate", action="append", metavar="ENDPOINT=RATE",
+                        help="Probability of a simulated failure, e.g. orders=0.05")
+    parser.add_argument("--seed", type=int, help="Seed for latency and error sampling")
+    parser.add_argument("--transcription-cache", metavar="DIR",
+                        help="Share a transcription cache directory with the STT stage")
+    parser.add_argument("--no-fast-path", action="store_true",
+                        help="Always use the simulated LLM for parsing")
+    parser.add_argument("--dedupe-entries", type=int, default=DEDUPE_ENTRIES, metavar="N",
+                        help="Idempotency keys remembered for voice-command dedupe")
+    parser.add_argument("--matching-engine", action="store_true",
+                        help="Match orders in simulated price-time priority order books: market orders "
+                             "fill at book prices, limit orders rest until crossed")
+    parser.add_argument("--ledger", metavar="DIR",
+                        help="Keep per-user paper-trading balances and orders in DIR, surviving restarts; "
+                             "/webhook/balance?user_id= serves them")
+    parser.add_argument("--snapshot-every", type=int, default=1000, metavar="N",
+                        help="Ledger changes per shard between snapshots")
+    parser.add_argument("--risk-checks", action="store_true",
+                        help="Run pre-trade risk checks with the default limits (max notional, max position, "
+                             "price band, balance); a rejected command gets a 422 naming the rule")
+    parser.add_argument("--risk-limits", metavar="FILE",
+                        help='Risk limits as JSON {"default": {...}, "users": {"<user_id>": {...}}}; '
+                             'implies --risk-checks')
+    parser.add_argument("--fixtures", metavar="MANIFEST",
+                        help="Fixture manifest whose recordings the STT stage recognizes by sha256 "
+                             "(default: the bundled fixtures.jsonl)")
+    parser.add_argument("--order-history", type=int, default=0, metavar="N",
+                        help="Pre-load N historical orders per exchange")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    try:
+        workflow = MockWorkflow(
+            latencies=parse_endpoint_options(args.latency, LatencyModel, ENDPOINTS + STAGES),
+            error_rates=parse_endpoint_options(args.error_rate, float),
+            seed=args.seed,
+            transcription_cache=TranscriptionCache(args.transcription_cache) if args.transcription_cache else None,
+            fast_path=not args.no_fast_path,
+            order_history=args.order_history,
+            dedupe_entries=args.dedupe_entries,
+            matching_engine=SimulatedExchange() if args.matching_engine else None,
+            ledger=PaperLedger(INITIAL_BALANCES, args.ledger, snapshot_every=args.snapshot_every)
+            if args.ledger else None,
+            risk_engine=load_risk_engine(args.risk_limits) if args.risk_checks or args.risk_limits else None,
+            fixtures=FixtureManifest(args.fixtures) if args.fixtures else None,
+        )
+    except (ValueError, OSError, argparse.ArgumentTypeError) as e:
+        parser.error(str(e))
+
+    server = MockN8nServer(args.host, args.port, workflow, verbose=args.verbose)
+    print(f"🧪 Mock n8n workflow listening on {server.url}")
+    for endpoint in ENDPOINTS:
+        print(f"   /webhook/{endpoint}: latency {workflow.latencies[endpoint].spec}, "
+              f"error rate {workflow.error_rates[endpoint]:.1%}")
+    for stage in STAGES:
+        print(f"   {stage} stage: latency {workflow.latencies[stage].spec}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
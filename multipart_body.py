@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Streaming multipart/form-data bodies for voice command uploads
+
+Shared by N8nVoiceTradingTester (test-voic2trade.py) and the replay harness
+in recorder.py.
+"""
+
+import os
+
+AUDIO_CONTENT_TYPES = {
+    ".m4a": "audio/mp4",
+    ".mp3": "audio/mpeg",
+    ".wav": "audio/wav",
+    ".ogg": "audio/ogg",
+    ".opus": "audio/ogg",
+    ".flac": "audio/flac",
+    ".webm": "audio/webm",
+}
+
+
+def iter_multipart_body(boundary, fields, file_field, audio_path, chunk_size=64 * 1024):
+    """
+    Yield a multipart/form-data body piece by piece
+
+    The audio file is read chunk_size bytes at a time, so it is never held in
+    memory as a whole; requests sends a generator body with chunked encoding.
+
+    Args:
+        boundary: Multipart boundary string
+        fields: Dict of plain form fields
+        file_field: Form field name of the audio file
+        audio_path: Path to the audio file
+        chunk_size: Bytes read from the file per chunk
+    """
+    for name, value in fields.items():
+        yield (f'--{boundary}\r\n'
+               f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+               f'{value}\r\n').encode("utf-8")
+
+    filename = os.path.basename(audio_path)
+    content_type = AUDIO_CONTENT_TYPES.get(os.path.splitext(filename)[1].lower(), "application/octet-stream")
+    yield (f'--{boundary}\r\n'
+           f'Content-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+           f'Content-Type: {content_type}\r\n\r\n').encode("utf-8")
+    with open(audio_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            yield chunk
+    yield f"\r\n--{boundary}--\r\n".encode("utf-8")
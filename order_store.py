@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Client-side order store for incremental order sync
+
+/webhook/orders?since=<cursor> returns only the orders that changed after the
+cursor. OrderStore keeps the merged result indexed by order id, symbol and
+status, so polling open orders costs in proportion to what changed rather
+than to the account's history. A response with incremental=false (first sync,
+or a cursor the workflow no longer recognizes) replaces the whole store.
+"""
+
+import threading
+
+OPEN_STATUSES = ("NEW", "PARTIALLY_FILLED")
+
+
+class OrderStore:
+    """Orders of one exchange account, indexed by id, symbol and status"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.orders = {}
+        self.by_symbol = {}
+        self.by_status = {}
+        self.cursor = None
+        self.syncs = 0
+        self.orders_received = 0
+
+    def _unindex(self, order):
+        for index, key in ((self.by_symbol, order.get("symbol")), (self.by_status, order.get("status"))):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(order["order_id"])
+                if not ids:
+                    del index[key]
+
+    def _index(self, order):
+        self.by_symbol.setdefault(order.get("symbol"), set()).add(order["order_id"])
+        self.by_status.setdefault(order.get("status"), set()).add(order["order_id"])
+
+    def apply(self, response):
+        """
+        Merge one /webhook/orders response
+
+        Args:
+            response: Parsed response body
+
+        Returns:
+            Number of orders added or updated, None if the response was an error
+        """
+        if not isinstance(response, dict) or not response.get("success"):
+            return None
+
+        orders = response.get("orders") or []
+        with self.lock:
+            if not response.get("incremental"):
+                self.orders.clear()
+                self.by_symbol.clear()
+                self.by_status.clear()
+
+            changed = 0
+            for order in orders:
+                current = self.orders.get(order["order_id"])
+                if current is not None:
+                    # Deltas may arrive out of order when polls overlap
+                    if current.get("revision", 0) > order.get("revision", 0):
+                        continue
+                    self._unindex(current)
+                self.orders[order["order_id"]] = order
+                self._index(order)
+                changed += 1
+
+            if response.get("cursor") is not None:
+                self.cursor = response["cursor"]
+            self.syncs += 1
+            self.orders_received += len(orders)
+            return changed
+
+    def get(self, order_id):
+        """Order by id, None if unknown"""
+        with self.lock:
+            return self.orders.get(order_id)
+
+    def with_symbol(self, symbol):
+        """Orders for an exchange symbol (e.g. BTCUSDT)"""
+        with self.lock:
+            return [self.orders[order_id] for order_id in self.by_symbol.get(symbol, ())]
+
+    def with_status(self, *statuses):
+        """Orders in any of the given statuses"""
+        with self.lock:
+            return [self.orders[order_id]
+                    for status in statuses for order_id in self.by_status.get(status, ())]
+
+    def open_orders(self):
+        """Orders that can still fill"""
+        return self.with_status(*OPEN_STATUSES)
+
+    def __len__(self):
+        with self.lock:
+            return len(self.orders)
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Paper-trading ledger for the mock workflow
+
+PaperLedger keeps every user's balances per exchange account and the orders
+placed for them. Balances change only by diffing successive states of an
+order:
+
+- an open limit order locks what it could spend: the quote asset of a buy
+  (remaining quantity x price) or the base asset of a sell,
+- a fill moves base and quote between the free balances at the fill's
+  average price,
+- cancelling or filling an order releases whatever it still had locked.
+
+Recording the same order state twice therefore changes nothing, however
+often the workflow reports an order.
+
+Users are spread over shards by a hash of their user_id. Each shard has
+its own lock, its own append-only log and its own snapshot, so users on
+different shards never wait for each other. Every change is appended to the
+shard's log as one JSON line. Every `snapshot_every` changes, the shard
+writes its whole state to a snapshot file (atomically, via rename) and
+truncates the log. On restart, each shard loads its snapshot, replays
+only the log lines written after it, and cuts off a last line torn by a
+crash before appending again.
+
+A caller that orders changes under a lock of its own can submit() them
+while holding it, which only queues them on their shard, and drain() the
+shards after releasing it. Each shard applies its queue in submission
+order, so no disk I/O happens under the caller's lock.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import deque
+
+OPEN_STATUSES = ("NEW", "PARTIALLY_FILLED")
+
+# Balances are rounded to this many decimals after every change
+AMOUNT_DECIMALS = 8
+
+
+def order_effect(order, base, quote):
+    """
+    What an order state means for the balances
+
+    Returns:
+        Tuple of (filled base quantity, filled quote notional, locked asset,
+        locked amount)
+    """
+    price = order.get("price") or 0.0
+    if "filled_quantity" in order:
+        filled = order["filled_quantity"]
+    else:
+        # Orders executed without a matching engine fill completely or not at all
+        filled = order["quantity"] if order.get("status") == "FILLED" else 0.0
+    notional = filled * (order.get("average_price") or price)
+
+    locked_asset, locked = None, 0.0
+    if order.get("type") == "LIMIT" and order.get("status") in OPEN_STATUSES:
+        remaining = max(0.0, order["quantity"] - filled)
+        if order["side"] == "BUY":
+            locked_asset, locked = quote, remaining * price
+        else:
+            locked_asset, locked = base, remaining
+    return filled, notional, locked_asset, locked
+
+
+class LedgerShard:
+    """Balances and orders of the users hashed to one shard, with its log and snapshot"""
+
+    def __init__(self, index, initial_balances, directory=None, snapshot_every=1000, fsync=False):
+        self.index = index
+        self.initial_balances = initial_balances
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self.pending = deque()
+        self.balances = {}
+        self.orders = {}
+        self.effects = {}
+        self.seq = 0
+        self.since_snapshot = 0
+        self.counters = {"changes": 0, "snapshots": 0, "replayed": 0}
+
+        self.log = None
+        self.log_path = self.snapshot_path = None
+        if directory is not None:
+            self.log_path = os.path.join(directory, f"shard-{index:03d}.log")
+            self.snapshot_path = os.path.join(directory, f"shard-{index:03d}.snapshot.json")
+            self._load()
+            self.log = open(self.log_path, "a", encoding="utf-8")
+
+    def account(self, user_id, exchange):
+        """Balances {asset: [free, locked]} of one account, created on first use"""
+        accounts = self.balances.setdefault(user_id, {})
+        if exchange not in accounts:
+            accounts[exchange] = {asset: [amount, 0.0]
+                                  for asset, amount in self.initial_balances.get(exchange, {}).items()}
+        return accounts[exchange]
+
+    def _apply(self, change):
+        """Apply one change to the in-memory state"""
+        order, base, quote = change["order"], change["base"], change["quote"]
+        account = self.account(order["user_id"], order["exchange"])
+        previous = self.effects.get(order["order_id"], (0.0, 0.0, None, 0.0))
+        current = order_effect(order, base, quote)
+
+        filled = current[0] - previous[0]
+        notional = current[1] - previous[1]
+        sign = 1 if order["side"] == "BUY" else -1
+        deltas = {base: [sign * filled, 0.0], quote: [-sign * notional, 0.0]}
+        for asset, amount in ((previous[2], -previous[3]), (current[2], current[3])):
+            if asset is not None:
+                delta = deltas.setdefault(asset, [0.0, 0.0])
+                delta[0] -= amount
+                delta[1] += amount
+        for asset, (free, locked) in deltas.items():
+            if free or locked:
+                balance = account.setdefault(asset, [0.0, 0.0])
+                balance[0] = round(balance[0] + free, AMOUNT_DECIMALS)
+                balance[1] = round(balance[1] + locked, AMOUNT_DECIMALS)
+
+        self.effects[order["order_id"]] = current
+        self.orders[order["order_id"]] = order
+        self.seq = change["seq"]
+
+    def submit(self, order, base, quote):
+        """Queue the latest state of an order; drain() applies it"""
+        self.pending.append((dict(order), base, quote))
+
+    def drain(self):
+        """Apply and log the queued changes in submission order"""
+        with self.lock:
+            # Only drainers pop, and they hold the lock, so the queue cannot run dry under us
+            while self.pending:
+                order, base, quote = self.pending.popleft()
+                change = {"seq": self.seq + 1, "order": order, "base": base, "quote": quote}
+                self._apply(change)
+                self.counters["changes"] += 1
+                if self.log is not None:
+                    self.log.write(json.dumps(change, separators=(",", ":")) + "\n")
+                    self.log.flush()
+                    if self.fsync:
+                        os.fsync(self.log.fileno())
+                    self.since_snapshot += 1
+                    if self.since_snapshot >= self.snapshot_every:
+                        self._snapshot()
+
+    def _snapshot(self):
+        """Write the shard state and start a new log (lock held)"""
+        state = {
+            "seq": self.seq,
+            "balances": self.balances,
+            "orders": self.orders,
+            "effects": self.effects,
+        }
+        temporary = self.snapshot_path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(state, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.snapshot_path)
+        # A crash before the truncation only leaves lines the snapshot already covers
+        self.log.close()
+        self.log = open(self.log_path, "w", encoding="utf-8")
+        self.since_snapshot = 0
+        self.counters["snapshots"] += 1
+
+    def _load(self):
+        """Restore the snapshot and replay the log lines written after it"""
+        if os.path.isfile(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                state = json.load(f)
+            self.seq = state["seq"]
+            self.balances = state["balances"]
+            self.orders = state["orders"]
+            self.effects = {order_id: tuple(effect) for order_id, effect in state["effects"].items()}
+
+        if os.path.isfile(self.log_path):
+            with open(self.log_path, "rb+") as f:
+                good = 0
+                for line in iter(f.readline, b""):
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("unterminated line")
+                        change = json.loads(line)
+                    except ValueError:
+                        break  # torn last line of a crash
+                    good = f.tell()
+                    if change["seq"] > self.seq:
+                        self._apply(change)
+                        self.counters["replayed"] += 1
+                        self.since_snapshot += 1
+                # Drop the torn tail, or the next change would be appended to it and lost too
+                f.truncate(good)
+
+    def close(self):
+        with self.lock:
+            if self.log is not None:
+                self.log.close()
+                self.log = None
+
+
+class PaperLedger:
+    """Balances and orders of paper-trading users, sharded by user_id"""
+
+    def __init__(self, initial_balances, directory=None, shards=16, snapshot_every=1000, fsync=False):
+        """
+        Args:
+            initial_balances: Dict mapping exchange to {asset: amount} every
+                new account starts with
+            directory: Directory for logs and snapshots; in-memory only if omitted
+            shards: Number of shards (and lock, log and snapshot files)
+            snapshot_every: Changes per shard between snapshots
+            fsync: fsync the log after every change, surviving power loss
+                instead of only process crashes
+        """
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self.shards = [LedgerShard(index, initial_balances, directory, snapshot_every, fsync)
+                       for index in range(shards)]
+
+    def shard(self, user_id):
+        digest = hashlib.blake2b(str(user_id).encode("utf-8"), digest_size=8).digest()
+        return self.shards[int.from_bytes(digest, "big") % len(self.shards)]
+
+    def record(self, order, base, quote):
+        """
+        Record the latest state of an order and adjust its owner's balances
+
+        Args:
+            order: Order dict with order_id, user_id, exchange, side, type,
+                quantity, price, status and optionally filled_quantity and
+                average_price
+            base: Asset bought or sold (e.g. BTC)
+            quote: Asset paid or received (e.g. USDT)
+        """
+        shard = self.shard(order["user_id"])
+        shard.submit(order, base, quote)
+        shard.drain()
+
+    def submit(self, order, base, quote):
+        """
+        Queue the latest state of an order without applying it
+
+        Cheap enough to call under the caller's own lock; drain() applies
+        the queued changes. Arguments as for record().
+        """
+        self.shard(order["user_id"]).submit(order, base, quote)
+
+    def drain(self):
+        """Apply and log the changes submitted so far"""
+        for shard in self.shards:
+            if shard.pending:
+                shard.drain()
+
+    def balances(self, user_id, exchange):
+        """Balances of one account as [{asset, free, locked}]"""
+        shard = self.shard(user_id)
+        with shard.lock:
+            return [{"asset": asset, "free": free, "locked": locked}
+                    for asset, (free, locked) in shard.account(user_id, exchange).items()]
+
+    def holdings(self, user_id, exchange):
+        """Balances of one account as {asset: (free, locked)}"""
+        shard = self.shard(user_id)
+        with shard.lock:
+            return {asset: (free, locked) for asset, (free, locked) in shard.account(user_id, exchange).items()}
+
+    def orders(self, user_id, exchange=None):
+        """Orders of one user, optionally of one exchange, oldest first"""
+        shard = self.shard(user_id)
+        with shard.lock:
+            orders = [dict(order) for order in shard.orders.values()
+                      if order["user_id"] == user_id and (exchange is None or order["exchange"] == exchange)]
+        return sorted(orders, key=lambda order: order.get("timestamp", 0))
+
+    def all_orders(self):
+        """Every order of every shard, oldest first (used to restore the workflow)"""
+        orders = []
+        for shard in self.shards:
+            with shard.lock:
+                orders.extend(dict(order) for order in shard.orders.values())
+        return sorted(orders, key=lambda order: (order.get("timestamp", 0), order.get("revision", 0)))
+
+    def stats(self):
+        """Changes, snapshots and replayed log lines summed over the shards"""
+        totals = {"changes": 0, "snapshots": 0, "replayed": 0}
+        for shard in self.shards:
+            with shard.lock:
+                for key in totals:
+                    totals[key] += shard.counters[key]
+        totals["shards"] = len(self.shards)
+        return totals
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
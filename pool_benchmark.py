@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Benchmark of connection handling strategies for the webhook testers
+
+Sends the same number of requests from a thread pool against the bundled
+echo server (echo_server.py, run as a subprocess) in each of these modes:
+
+- per-request: a new requests.Session for every request, so every request
+  opens (and, with TLS, handshakes) its own connection,
+- pooled-10: one shared session with the default pool of 10 connections per
+  host; with more threads than that, a thread that finds the pool empty
+  opens an extra connection, which is discarded when it comes back to a
+  full pool. Most requests still reuse a connection, but the churn shows
+  in the discarded count and in a higher p50 than pooled-N,
+- pooled-N: one shared session whose pool is as large as the thread count,
+  so every connection is opened once and never discarded,
+- http2: one httpx client multiplexing every request over a single HTTP/2
+  connection (requires httpx and h2; skipped otherwise).
+
+For each mode it reports throughput, p50/p99 latency, the connections the
+client opened and reused, the TLS handshakes, and the connections the server
+accepted (which also covers HTTP/2, where the client keeps no counters).
+
+Usage:
+    python pool_benchmark.py --requests 2000 --concurrency 32 --delay-ms 2
+    python pool_benchmark.py --tls          # self-signed certificate via openssl
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import requests
+
+from connection_pool import ConnectionStats, make_session
+from echo_server import STATS_PATH
+from latency_stats import LatencyHistogram
+
+
+def self_signed_cert(directory):
+    """
+    Create a throwaway certificate for 127.0.0.1 with the openssl CLI
+
+    Returns:
+        Tuple of (certfile, keyfile)
+    """
+    certfile = os.path.join(directory, "cert.pem")
+    keyfile = os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=127.0.0.1", "-keyout", keyfile, "-out", certfile],
+        check=True, capture_output=True,
+    )
+    return certfile, keyfile
+
+
+def run_mode(get, total, concurrency):
+    """
+    Send `total` requests through get(index) from `concurrency` threads
+
+    Returns:
+        Dict with elapsed seconds, errors and the latency histogram
+    """
+    histogram = LatencyHistogram()
+    lock = threading.Lock()
+    errors = []
+
+    def call(index):
+        started = time.perf_counter()
+        try:
+            get(index)
+        except Exception as e:
+            with lock:
+                errors.append(e)
+            return
+        elapsed = time.perf_counter() - started
+        with lock:
+            histogram.record(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, range(total)))
+    return {"elapsed": time.perf_counter() - started, "errors": len(errors), "histogram": histogram}
+
+
+def requests_modes(url, concurrency, verify):
+    """(label, get, connection_stats, cleanup) for the requests-based modes"""
+    per_request_stats = ConnectionStats()
+
+    def per_request(index):
+        with make_session(connection_stats=per_request_stats) as session:
+            session.get(url, verify=verify).content
+
+    modes = [("per-request", per_request, per_request_stats, None)]
+    for label, size in (("pooled-10", 10), (f"pooled-{concurrency}", concurrency)):
+        stats = ConnectionStats()
+        session = make_session(size, connection_stats=stats)
+        modes.append((label, lambda index, session=session: session.get(url, verify=verify).content,
+                      stats, session.close))
+    return modes
+
+
+@contextmanager
+def echo_server(delay_ms, http2=False, certs=None):
+    """
+    Run echo_server.py in a subprocess, so it does not compete with the
+    client threads for the GIL
+
+    Yields:
+        Base URL of the server
+    """
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "echo_server.py"),
+               "--port", "0", "--delay-ms", str(delay_ms)]
+    if http2:
+        command.append("--http2")
+    if certs:
+        command += ["--certfile", certs[0], "--keyfile", certs[1]]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        line = process.stdout.readline()
+        if " listening on " not in line:
+            raise RuntimeError(f"Echo server did not start: {process.stderr.read().strip()}")
+        yield line.rsplit(" ", 1)[-1].strip()
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def server_connections(get_stats, reset=False):
+    """Connections the server accepted, not counting the one asking"""
+    return get_stats(f"{STATS_PATH}?reset=1" if reset else STATS_PATH)["connections"] - 1
+
+
+def benchmark(total=2000, concurrency=32, delay_ms=2.0, tls=False):
+    """
+    Run every mode and return one result row per mode
+
+    Args:
+        total: Requests per mode
+        concurrency: Client threads
+        delay_ms: Milliseconds the echo server waits per request
+        tls: Serve HTTPS with a self-signed certificate
+    """
+    rows = []
+    with tempfile.TemporaryDirectory() as directory, warnings.catch_warnings():
+        # Self-signed certificate: verification is off on purpose
+        warnings.simplefilter("ignore")
+        certs = self_signed_cert(directory) if tls else None
+
+        with echo_server(delay_ms, certs=certs) as url:
+            def get_stats(path):
+                return requests.get(url + path, verify=False).json()
+
+            for label, get, stats, cleanup in requests_modes(url, concurrency, verify=False):
+                server_connections(get_stats, reset=True)
+                result = run_mode(get, total, concurrency)
+                if cleanup is not None:
+                    cleanup()
+                counters = next(iter(stats.snapshot().values()), {})
+                rows.append({"mode": label, **result, **counters,
+                             "server_connections": server_connections(get_stats)})
+
+        try:
+            import httpx
+            import h2  # noqa: F401 - the echo server needs it too
+        except ImportError:
+            rows.append({"mode": "http2", "skipped": "requires httpx and h2 (pip install 'httpx[http2]')"})
+            return rows
+        with echo_server(delay_ms, http2=True, certs=certs) as url, \
+                httpx.Client(http1=False, http2=True, verify=False,
+                             limits=httpx.Limits(max_connections=concurrency)) as client:
+            def get_stats(path):
+                with httpx.Client(http1=False, http2=True, verify=False) as stats_client:
+                    return stats_client.get(url + path).json()
+
+            result = run_mode(lambda index: client.get(url).content, total, concurrency)
+            connections = server_connections(get_stats)
+            completed = total - result["errors"]
+            rows.append({"mode": "http2", **result, "requests": completed, "connects": connections,
+                         "reused": completed - connections, "tls_handshakes": connections if tls else 0,
+                         "discarded": 0, "server_connections": connections})
+    return rows
+
+
+def print_benchmark(rows):
+    print(f"   {'mode':<14}{'req/s':>9}{'p50':>9}{'p99':>9}{'connects':>10}{'reused':>8}"
+          f"{'TLS':>6}{'discarded':>11}{'server conns':>14}{'errors':>8}")
+    for row in rows:
+        if "skipped" in row:
+            print(f"   {row['mode']:<14}skipped: {row['skipped']}")
+            continue
+        histogram = row["histogram"]
+        completed = histogram.count
+        print(f"   {row['mode']:<14}{completed / row['elapsed']:>9.0f}"
+              f"{histogram.percentile(50) * 1000:>7.1f}ms{histogram.percentile(99) * 1000:>7.1f}ms"
+              f"{row.get('connects', 0):>10}{row.get('reused', 0):>8}{row.get('tls_handshakes', 0):>6}"
+              f"{row.get('discarded', 0):>11}{row['server_connections']:>14}{row['errors']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-request sessions, pooled keep-alive and HTTP/2")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per mode")
+    parser.add_argument("--concurrency", type=int, default=32, help="Client threads")
+    parser.add_argument("--delay-ms", type=float, default=2.0, help="Echo server work per request")
+    parser.add_argument("--tls", action="store_true", help="Serve HTTPS with a self-signed certificate (needs openssl)")
+    args = parser.parse_args()
+
+    print(f"🔌 Connection benchmark ({args.requests} requests per mode, {args.concurrency} threads, "
+          f"{'HTTPS' if args.tls else 'HTTP'}, {args.delay_ms:g}ms server delay)")
+    print_benchmark(benchmark(args.requests, args.concurrency, args.delay_ms, args.tls))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Record and replay webhook traffic as JSONL
+
+RequestRecorder appends one JSON line per request the tester makes (endpoint,
+method, params, payload, the headers in RECORDED_HEADERS, status, response
+body and timings). replay() reads
+such a file line by line and re-issues the requests against any base URL at
+the original pace, a multiple of it, or as fast as possible. Only a bounded
+number of requests is in flight at once, so even multi-GB captures replay in
+constant memory.
+
+Usage:
+    python recorder.py recordings.jsonl --base-url http://127.0.0.1:5678 --speed max
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from latency_stats import LatencyRecorder
+from multipart_body import iter_multipart_body
+
+# Request headers that change what the workflow does and must survive a replay:
+# the idempotency key deduplicates orders, If-None-Match turns a read into a 304
+RECORDED_HEADERS = ("Idempotency-Key", "If-None-Match")
+
+
+def recorded_headers(headers):
+    """The RECORDED_HEADERS of a request's headers, None if it has none"""
+    if not headers:
+        return None
+    wanted = {name.lower(): name for name in RECORDED_HEADERS}
+    kept = {wanted[name.lower()]: value for name, value in headers.items() if name.lower() in wanted}
+    return kept or None
+
+
+class RequestRecorder:
+    """Thread-safe JSONL writer for request/response pairs"""
+
+    def __init__(self, path, append=True):
+        """
+        Args:
+            path: JSONL file to write
+            append: Append to an existing file instead of truncating it
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, "a" if append else "w", encoding="utf-8")
+        self.count = 0
+
+    def record(self, method, endpoint, status, body, timings, params=None, payload=None,
+               upload=None, headers=None, error=None, started_at=None):
+        """
+        Append one request/response pair
+
+        Args:
+            method: HTTP method
+            endpoint: Webhook path below /webhook/
+            status: HTTP status code, None if the request failed
+            body: Parsed response body
+            timings: Dict of phase durations in seconds (total, ttfb, body, ...)
+            params: Query string parameters
+            payload: JSON request body
+            upload: Dict with audio_path and form fields of a multipart upload
+            headers: Request headers; only RECORDED_HEADERS are kept
+            error: Error message if the request raised
+            started_at: Wall-clock time the request was sent, defaults to now
+        """
+        entry = {
+            "ts": started_at if started_at is not None else time.time(),
+            "method": method,
+            "endpoint": endpoint,
+            "params": params,
+            "payload": payload,
+            "upload": upload,
+            "headers": recorded_headers(headers),
+            "status": status,
+            "body": body,
+            "timings": timings,
+            "error": error,
+        }
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()
+            self.count += 1
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_recording(path):
+    """
+    Yield recorded entries one line at a time
+
+    Blank lines and lines that are not recorded requests are skipped.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict) and "endpoint" in entry and "method" in entry:
+                yield entry
+
+
+def send_recorded(session, base_url, entry):
+    """
+    Re-issue one recorded request, with its recorded headers
+
+    Returns:
+        The requests.Response
+    """
+    url = f"{base_url}/webhook/{entry['endpoint']}"
+    headers = dict(entry.get("headers") or {})
+    upload = entry.get("upload")
+    if upload:
+        boundary = uuid.uuid4().hex
+        body = iter_multipart_body(boundary, upload.get("fields", {}), "audio", upload["audio_path"])
+        headers["Content-Type"] = f"multipart/form-data; boundary={boundary}"
+        return session.request(entry["method"], url, data=body, headers=headers)
+    return session.request(entry["method"], url, params=entry.get("params"), json=entry.get("payload"),
+                           headers=headers)
+
+
+def replay(path, base_url, speed=1.0, max_in_flight=32, recorder=None):
+    """
+    Replay a recording against a base URL
+
+    Args:
+        path: JSONL recording
+        base_url: Target to send the requests to
+        speed: 1.0 keeps the recorded pacing, 2.0 replays twice as fast,
+            'max' sends as fast as max_in_flight allows
+        max_in_flight: Maximum number of concurrent requests
+        recorder: Optional RequestRecorder for the replayed traffic
+
+    Returns:
+        Dict with counts, status mismatches, schedule lag and a LatencyRecorder
+    """
+    base_url = base_url.rstrip("/")
+    stats = LatencyRecorder()
+    summary = {"sent": 0, "errors": 0, "status_mismatches": 0, "max_lag": 0.0, "stats": stats}
+    summary_lock = threading.Lock()
+    slots = threading.BoundedSemaphore(max_in_flight)
+    local = threading.local()
+
+    def run(entry):
+        try:
+            session = getattr(local, "session", None)
+            if session is None:
+                session = local.session = requests.Session()
+
+            started_at = time.time()
+            started = time.monotonic()
+            status = body = error = None
+            try:
+                response = send_recorded(session, base_url, entry)
+                status = response.status_code
+                try:
+                    body = response.json()
+                except ValueError:
+                    body = response.text
+            except (requests.RequestException, OSError) as e:
+                error = str(e)
+            elapsed = time.monotonic() - started
+
+            stats.record(entry["endpoint"], elapsed, started=started)
+            with summary_lock:
+                summary["errors"] += error is not None
+                summary["status_mismatches"] += status != entry.get("status")
+            if recorder is not None:
+                recorder.record(entry["method"], entry["endpoint"], status, body, {"total": elapsed},
+                                params=entry.get("params"), payload=entry.get("payload"),
+                                upload=entry.get("upload"), headers=entry.get("headers"), error=error,
+                                started_at=started_at)
+        finally:
+            slots.release()
+
+    started = time.monotonic()
+    first_ts = None
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        for entry in iter_recording(path):
+            if speed != "max":
+                first_ts = entry.get("ts", 0) if first_ts is None else first_ts
+                due = started + (entry.get("ts", first_ts) - first_ts) / speed
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                summary["max_lag"] = max(summary["max_lag"], time.monotonic() - due)
+
+            # Bounds queued work, so memory stays flat however long the file is
+            slots.acquire()
+            pool.submit(run, entry)
+            summary["sent"] += 1
+
+    summary["wall_time"] = time.monotonic() - started
+    return summary
+
+
+def print_replay_summary(summary):
+    """Print the result of replay()"""
+    wall_time = summary["wall_time"]
+    print(f"   Requests:          {summary['sent']}")
+    print(f"   Errors:            {summary['errors']}")
+    print(f"   Status mismatches: {summary['status_mismatches']}")
+    print(f"   Wall time:         {wall_time:.2f}s "
+          f"({summary['sent'] / wall_time if wall_time > 0 else 0:.1f} req/s)")
+    print(f"   Max schedule lag:  {summary['max_lag'] * 1000:.1f}ms")
+    summary["stats"].print_report()
+
+
+def parse_speed(value):
+    if value == "max":
+        return value
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded webhook traffic")
+    parser.add_argument("recording", help="JSONL file written by RequestRecorder")
+    parser.add_argument("--base-url", default=os.environ.get("N8N_BASE_URL", "http://127.0.0.1:5678"))
+    parser.add_argument("--speed", type=parse_speed, default=1.0,
+                        help="Replay speed multiplier, or 'max' (default: 1.0, original pace)")
+    parser.add_argument("--max-in-flight", type=int, default=32)
+    parser.add_argument("--record", metavar="PATH", help="Record the replayed traffic to another JSONL file")
+    args = parser.parse_args()
+
+    recorder = RequestRecorder(args.record) if args.record else None
+    print(f"🔁 Replaying {args.recording} against {args.base_url} (speed {args.speed})")
+    try:
+        summary = replay(args.recording, args.base_url, args.speed, args.max_in_flight, recorder)
+    finally:
+        if recorder is not None:
+            recorder.close()
+    print_replay_summary(summary)
+
+
+if __name__ == "__main__":
+    main()
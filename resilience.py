@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Timeouts, retries and hedged requests for the webhook testers
+
+ResiliencePolicy decides, per endpoint:
+
+- connect/read timeouts, so a hung webhook fails instead of blocking forever,
+- retries with full-jitter exponential backoff on connection errors,
+  timeouts and 429/5xx responses, for idempotent requests only: balance and
+  orders, and voice commands sent with an idempotency key. Without a key,
+  retrying a voice command could place a second order; with one, the
+  workflow answers a repeat with the response of the first attempt,
+- hedging: when an idempotent request has not answered after the endpoint's
+  observed p95 latency, a duplicate is sent on another connection and the
+  first response wins. Slow outliers then cost about p95 plus one normal
+  request instead of the full tail.
+
+idempotency_key() derives the key of a voice command from the user, the
+audio and a time window, so every retry and hedge of one command carries the
+same key while the same recording spoken again later is a new order.
+
+Attempts run through a caller-supplied function taking a requests.Session, so
+the policy works with any tester; hedges and their primaries run on a small
+thread pool with one session per thread.
+"""
+
+import hashlib
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from latency_stats import LatencyHistogram
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (3.05, 30)
+DEFAULT_TIMEOUTS = {
+    "voice-command": (3.05, 60),
+    "voice-command/batch": (3.05, 300),
+    "balance": (3.05, 10),
+    "orders": (3.05, 30),
+}
+
+IDEMPOTENT_ENDPOINTS = ("balance", "orders")
+
+# Endpoints retried by default; voice commands only when they carry an idempotency key
+RETRY_ENDPOINTS = IDEMPOTENT_ENDPOINTS + ("voice-command", "voice-command/batch")
+
+# Seconds in which the same user sending the same audio counts as one command
+IDEMPOTENCY_WINDOW = 60
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+RETRY_EXCEPTIONS = (requests.ConnectionError, requests.Timeout)
+
+
+def idempotency_key(user_id, audio_digest, window=IDEMPOTENCY_WINDOW, now=None):
+    """
+    Idempotency key of a voice command
+
+    Args:
+        user_id: User identifier
+        audio_digest: SHA-256 (or another stable identity) of the audio
+        window: Length of the time bucket in seconds
+        now: Unix time, defaults to the current time
+
+    Returns:
+        Hex digest identifying the command within its time bucket
+    """
+    bucket = int((time.time() if now is None else now) // window)
+    return hashlib.sha256(f"{user_id}:{audio_digest}:{bucket}".encode("utf-8")).hexdigest()
+
+
+class ResiliencePolicy:
+    """Per-endpoint timeouts, jittered retries and p95 hedging"""
+
+    def __init__(self, timeouts=None, retries=2, backoff=0.1, max_backoff=2.0,
+                 retry_endpoints=RETRY_ENDPOINTS, hedge_endpoints=(), hedge_percentile=95,
+                 hedge_min_samples=20, hedge_delay=None, seed=None):
+        """
+        Args:
+            timeouts: Dict mapping endpoint to a (connect, read) timeout tuple,
+                merged over DEFAULT_TIMEOUTS
+            retries: Extra attempts for retryable endpoints
+            backoff: Base delay of the exponential backoff in seconds
+            max_backoff: Upper bound of a single backoff delay
+            retry_endpoints: Endpoints retried when the request is idempotent
+            hedge_endpoints: Endpoints that get hedged duplicates when the request is idempotent
+            hedge_percentile: Observed latency percentile after which a hedge is sent
+            hedge_min_samples: Latencies observed before hedging starts
+            hedge_delay: Fixed hedge delay in seconds instead of the percentile
+            seed: Seed for the backoff jitter
+        """
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_endpoints = set(retry_endpoints)
+        self.hedge_endpoints = set(hedge_endpoints)
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.fixed_hedge_delay = hedge_delay
+        self.rng = random.Random(seed)
+
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.counters = {}
+        self.pool = None
+        self.local = threading.local()
+        # Builds the per-thread sessions hedged attempts run on; testers replace
+        # it so those sessions share their pool sizing, stats and headers
+        self.session_factory = requests.Session
+
+    def timeout(self, endpoint):
+        """(connect, read) timeout for an endpoint"""
+        return self.timeouts.get(endpoint, DEFAULT_TIMEOUT)
+
+    def backoff_delay(self, attempt):
+        """Full-jitter exponential backoff before retry number `attempt` (0-based)"""
+        with self.lock:
+            return self.rng.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def hedge_delay(self, endpoint):
+        """Seconds to wait before hedging, None while too few latencies have been observed"""
+        if self.fixed_hedge_delay is not None:
+            return self.fixed_hedge_delay
+        with self.lock:
+            histogram = self.latencies.get(endpoint)
+            if histogram is None or histogram.count < self.hedge_min_samples:
+                return None
+            return histogram.percentile(self.hedge_percentile)
+
+    def _count(self, endpoint, counter, amount=1):
+        with self.lock:
+            counters = self.counters.setdefault(endpoint, {
+                "calls": 0, "attempts": 0, "retries": 0, "timeouts": 0, "errors": 0,
+                "hedges": 0, "hedge_wins": 0,
+            })
+            counters[counter] += amount
+
+    def _observe(self, endpoint, seconds):
+        with self.lock:
+            histogram = self.latencies.get(endpoint)
+            if histogram is None:
+                histogram = self.latencies[endpoint] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def _thread_session(self):
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = self.session_factory()
+        return session
+
+    def _attempt(self, endpoint, send, session):
+        """One timed attempt; returns (response, result of send)"""
+        self._count(endpoint, "attempts")
+        started = time.monotonic()
+        try:
+            result = send(session, self.timeout(endpoint))
+        except requests.Timeout:
+            self._count(endpoint, "timeouts")
+            raise
+        self._observe(endpoint, time.monotonic() - started)
+        return result
+
+    def _hedged(self, endpoint, send, session):
+        """Run an attempt and race a duplicate against it once the hedge delay has passed"""
+        delay = self.hedge_delay(endpoint)
+        if delay is None:
+            return self._attempt(endpoint, send, session)
+
+        with self.lock:
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedge")
+        primary = self.pool.submit(lambda: self._attempt(endpoint, send, self._thread_session()))
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        self._count(endpoint, "hedges")
+        hedge = self.pool.submit(lambda: self._attempt(endpoint, send, self._thread_session()))
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count(endpoint, "hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def call(self, endpoint, send, session, idempotent=False):
+        """
+        Send a request under the policy
+
+        Args:
+            endpoint: Webhook endpoint, selects timeouts, retries and hedging
+            send: Callable (session, timeout) -> (response, ...) performing one attempt
+            session: Session for attempts that are not hedged
+            idempotent: The request carries an idempotency key, so repeating it
+                is safe on any endpoint
+
+        Returns:
+            Whatever send returned for the attempt that was used
+        """
+        self._count(endpoint, "calls")
+        safe = idempotent or endpoint in IDEMPOTENT_ENDPOINTS
+        attempts = 1 + (self.retries if safe and endpoint in self.retry_endpoints else 0)
+        hedged = safe and endpoint in self.hedge_endpoints
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            try:
+                result = self._hedged(endpoint, send, session) if hedged else self._attempt(endpoint, send, session)
+            except RETRY_EXCEPTIONS:
+                if last:
+                    self._count(endpoint, "errors")
+                    raise
+            else:
+                if last or result[0].status_code not in RETRY_STATUSES:
+                    return result
+            self._count(endpoint, "retries")
+            time.sleep(self.backoff_delay(attempt))
+
+    def stats(self):
+        """Counters per endpoint, with the share of hedges that won"""
+        with self.lock:
+            stats = {endpoint: dict(counters) for endpoint, counters in self.counters.items()}
+        for counters in stats.values():
+            counters["hedge_win_rate"] = counters["hedge_wins"] / counters["hedges"] if counters["hedges"] else 0.0
+        return stats
+
+    def close(self):
+        with self.lock:
+            if self.pool is not None:
+                self.pool.shutdown(wait=False)
+                self.pool = None
+
+
+def print_resilience_report(stats):
+    """Print ResiliencePolicy.stats()"""
+    if not stats:
+        print("   No requests sent")
+        return
+    print(f"   {'endpoint':<22}{'calls':>7}{'attempts':>10}{'retries':>9}{'timeouts':>10}"
+          f"{'hedges':>8}{'won':>6}{'win rate':>10}")
+    for endpoint, counters in stats.items():
+        print(f"   {endpoint:<22}{counters['calls']:>7}{counters['attempts']:>10}{counters['retries']:>9}"
+              f"{counters['timeouts']:>10}{counters['hedges']:>8}{counters['hedge_wins']:>6}"
+              f"{counters['hedge_win_rate']:>10.0%}")
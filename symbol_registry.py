@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Registry of tradable assets, exchanges and their instruments
+
+One place that knows what "Bitcoin", "XBT" and "btc" mean. It also knows
+that BTC trades as BTCUSDT on Binance and as BTC-USD on Coinbase, and the
+tick size (price step) and lot size (quantity step) of every instrument.
+The trade parser, the mock workflow and any local order validation read
+the same tables.
+
+Spoken names can span several words ("bitcoin cash", "coin base"). They are
+indexed at start-up into word tries: resolving a name walks one trie node
+per word, and every step is a dict lookup of that word. Resolution is
+therefore O(length of the name), whatever the number of aliases. It always
+takes the longest alias, so "bitcoin cash" is BCH and not BTC followed by
+"cash". Exchange symbols are indexed in a dict by their normalized form, so
+"BTC-USD", "btc_usd" and "BTCUSD" find the same instrument.
+
+Usage:
+    python symbol_registry.py             # list instruments and benchmark lookups
+"""
+
+import re
+import timeit
+
+# Canonical asset code -> spoken aliases (the lower-cased code is always an alias)
+ASSETS = {
+    "BTC": ("bitcoin", "bitcoins", "xbt"),
+    "ETH": ("ether", "ethereum"),
+    "BCH": ("bitcoin cash",),
+    "SOL": ("solana",),
+    "DOGE": ("dogecoin", "doge coin"),
+    "XRP": ("ripple",),
+    "ADA": ("cardano",),
+    "LTC": ("litecoin",),
+}
+
+# Exchange name -> spoken aliases, quote asset and symbol format
+EXCHANGES = {
+    "binance": {"aliases": ("binance",), "quote": "USDT", "symbol_format": "{base}{quote}"},
+    "coinbase": {"aliases": ("coinbase", "coin base", "coinbase pro"), "quote": "USD",
+                 "symbol_format": "{base}-{quote}"},
+    "kraken": {"aliases": ("kraken",), "quote": "USD", "symbol_format": "{base}/{quote}"},
+}
+
+# (exchange, asset) -> (tick size, lot size) of the instruments that can be traded
+INSTRUMENTS = {
+    ("binance", "BTC"): (0.01, 0.00001),
+    ("binance", "ETH"): (0.01, 0.0001),
+    ("coinbase", "BTC"): (0.01, 0.00000001),
+    ("coinbase", "ETH"): (0.01, 0.00000001),
+}
+
+# Asset -> reference price in USD, where simulated exchanges open their books
+REFERENCE_PRICES = {"BTC": 45250.0, "ETH": 3185.0}
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Tolerance when checking that a value is a whole number of steps
+STEP_TOLERANCE = 1e-6
+
+
+def normalize_symbol(symbol):
+    """'BTC-USD', 'btc_usd' and 'BTCUSD' all become 'BTCUSD'"""
+    return re.sub(r"[^A-Z0-9]", "", symbol.upper())
+
+
+def _decimals(step):
+    """Decimals needed to print multiples of a step exactly"""
+    text = f"{step:.10f}".rstrip("0")
+    return len(text.split(".")[1]) if "." in text else 0
+
+
+def _on_step(value, step):
+    steps = value / step
+    return abs(steps - round(steps)) <= STEP_TOLERANCE
+
+
+class Instrument:
+    """One tradable pair on one exchange"""
+
+    __slots__ = ("exchange", "symbol", "base", "quote", "tick_size", "lot_size",
+                 "price_decimals", "quantity_decimals")
+
+    def __init__(self, exchange, symbol, base, quote, tick_size, lot_size):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.base = base
+        self.quote = quote
+        self.tick_size = tick_size
+        self.lot_size = lot_size
+        self.price_decimals = _decimals(tick_size)
+        self.quantity_decimals = _decimals(lot_size)
+
+    def round_price(self, price):
+        """Nearest price on the tick grid"""
+        return round(round(price / self.tick_size) * self.tick_size, self.price_decimals)
+
+    def round_quantity(self, quantity):
+        """Largest quantity on the lot grid not above `quantity`"""
+        lots = int(quantity / self.lot_size + STEP_TOLERANCE)
+        return round(lots * self.lot_size, self.quantity_decimals)
+
+    def check(self, quantity, price=None):
+        """
+        Check an order size against the tick and lot sizes
+
+        Returns:
+            None if the order fits, otherwise a message saying what does not
+        """
+        if quantity < self.lot_size:
+            return f"Quantity {quantity} is below the minimum of {self.lot_size:g} {self.base} on {self.exchange}"
+        if not _on_step(quantity, self.lot_size):
+            return f"Quantity {quantity} is not a multiple of the lot size {self.lot_size:g} for {self.symbol}"
+        if price is not None and not _on_step(price, self.tick_size):
+            return f"Price {price} is not a multiple of the tick size {self.tick_size:g} for {self.symbol}"
+        return None
+
+    def __repr__(self):
+        return (f"Instrument({self.exchange!r}, {self.symbol!r}, tick={self.tick_size:g}, "
+                f"lot={self.lot_size:g})")
+
+
+class AliasTrie:
+    """Word trie mapping (possibly multi-word) aliases to canonical names"""
+
+    __slots__ = ("children", "value")
+
+    def __init__(self):
+        self.children = {}
+        self.value = None
+
+    def insert(self, words, value):
+        node = self
+        for word in words:
+            node = node.children.setdefault(word, AliasTrie())
+        if node.value is not None and node.value != value:
+            raise ValueError(f"Alias '{' '.join(words)}' means both {node.value} and {value}")
+        node.value = value
+
+    def match(self, words, start=0):
+        """
+        Longest alias starting at words[start]
+
+        Args:
+            words: Sequence of lower-case words; other items (e.g. number
+                tokens) never match
+            start: Index of the first word
+
+        Returns:
+            Tuple of (canonical name, number of words used), or (None, 0)
+        """
+        node = self
+        value, length = None, 0
+        index = start
+        while index < len(words):
+            node = node.children.get(words[index])
+            if node is None:
+                break
+            index += 1
+            if node.value is not None:
+                value, length = node.value, index - start
+        return value, length
+
+    def lookup(self, name):
+        """Canonical name of a whole alias ('Bitcoin Cash' -> 'BCH'), None if unknown"""
+        words = WORD_PATTERN.findall(name.lower())
+        value, length = self.match(words)
+        return value if words and length == len(words) else None
+
+
+class SymbolRegistry:
+    """Assets, exchanges and instruments, indexed for lookups by spoken name or symbol"""
+
+    def __init__(self, assets=ASSETS, exchanges=EXCHANGES, instruments=INSTRUMENTS):
+        """
+        Args:
+            assets: Dict mapping asset code to spoken aliases
+            exchanges: Dict mapping exchange name to aliases, quote asset and
+                symbol format
+            instruments: Dict mapping (exchange, asset) to (tick size, lot size)
+        """
+        self.exchanges = {name: dict(spec) for name, spec in exchanges.items()}
+        self.asset_trie = AliasTrie()
+        self.exchange_trie = AliasTrie()
+        for code, aliases in assets.items():
+            for alias in (code.lower(),) + tuple(aliases):
+                self.asset_trie.insert(alias.split(), code)
+        for name, spec in exchanges.items():
+            for alias in (name,) + tuple(spec["aliases"]):
+                self.exchange_trie.insert(alias.split(), name)
+
+        self.instruments = {}
+        self.by_symbol = {}
+        for (exchange, asset), (tick_size, lot_size) in instruments.items():
+            spec = self.exchanges[exchange]
+            symbol = spec["symbol_format"].format(base=asset, quote=spec["quote"])
+            instrument = Instrument(exchange, symbol, asset, spec["quote"], tick_size, lot_size)
+            self.instruments[(exchange, asset)] = instrument
+            self.by_symbol.setdefault(normalize_symbol(symbol), []).append(instrument)
+            # Spoken or typed exchange symbols ("btcusdt") name their base asset
+            self.asset_trie.insert([normalize_symbol(symbol).lower()], asset)
+
+    def asset(self, name):
+        """Asset code of a spoken name ('Bitcoin' -> 'BTC'), None if unknown"""
+        return self.asset_trie.lookup(name)
+
+    def exchange(self, name):
+        """Exchange of a spoken name ('Coin Base' -> 'coinbase'), None if unknown"""
+        return self.exchange_trie.lookup(name)
+
+    def match_asset(self, words, start=0):
+        """Longest asset alias at words[start]; see AliasTrie.match()"""
+        return self.asset_trie.match(words, start)
+
+    def match_exchange(self, words, start=0):
+        """Longest exchange alias at words[start]; see AliasTrie.match()"""
+        return self.exchange_trie.match(words, start)
+
+    def quote_asset(self, exchange):
+        return self.exchanges[exchange]["quote"]
+
+    def instrument(self, exchange, asset):
+        """Instrument of an asset on an exchange, None if it is not traded there"""
+        return self.instruments.get((exchange, asset))
+
+    def symbol(self, exchange, asset):
+        """Exchange symbol of an asset ('binance', 'BTC' -> 'BTCUSDT'), None if not traded"""
+        instrument = self.instruments.get((exchange, asset))
+        return instrument.symbol if instrument else None
+
+    def resolve_symbol(self, symbol, exchange=None):
+        """
+        Instrument of an exchange symbol in any spelling
+
+        Args:
+            symbol: 'BTC-USD', 'btcusdt', ...
+            exchange: Exchange to pick when several list the same symbol
+
+        Returns:
+            The Instrument, None if unknown or ambiguous without an exchange
+        """
+        candidates = self.by_symbol.get(normalize_symbol(symbol), [])
+        if exchange is not None:
+            candidates = [instrument for instrument in candidates if instrument.exchange == exchange]
+        return candidates[0] if len(candidates) == 1 else None
+
+    def exchange_symbols(self, exchanges=None):
+        """{exchange: {asset: symbol}} of the listed (or all) exchanges"""
+        names = exchanges if exchanges is not None else self.exchanges
+        return {name: {asset: instrument.symbol for (exchange, asset), instrument in self.instruments.items()
+                       if exchange == name}
+                for name in names}
+
+
+REGISTRY = SymbolRegistry()
+
+
+LOOKUP_CASES = [
+    ("asset", "Bitcoin"), ("asset", "XBT"), ("asset", "Bitcoin Cash"), ("asset", "ethereum"),
+    ("asset", "BTCUSDT"), ("asset", "bitcoin gold"), ("exchange", "Coin Base"), ("exchange", "Binance"),
+    ("symbol", "BTC-USD"), ("symbol", "ethusdt"), ("symbol", "BTC/EUR"),
+]
+
+
+def main():
+    print("🗂️ Symbol registry")
+    print("=" * 60)
+
+    print(f"   {'exchange':<10}{'symbol':<10}{'base':<6}{'quote':<6}{'tick':>10}{'lot':>14}")
+    for instrument in REGISTRY.instruments.values():
+        print(f"   {instrument.exchange:<10}{instrument.symbol:<10}{instrument.base:<6}{instrument.quote:<6}"
+              f"{instrument.tick_size:>10g}{instrument.lot_size:>14.8f}")
+
+    lookups = {"asset": REGISTRY.asset, "exchange": REGISTRY.exchange, "symbol": REGISTRY.resolve_symbol}
+    print("\n⏱️ Lookups")
+    print("-" * 30)
+    repeat = 100_000
+    for kind, name in LOOKUP_CASES:
+        lookup = lookups[kind]
+        seconds = min(timeit.repeat(lambda: lookup(name), number=repeat, repeat=3))
+        print(f"   {seconds / repeat * 1e6:7.2f} µs  {kind:<9}{name!r:<16} -> {lookup(name)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,24 +9,278 @@ speech-to-text transcription and LLM parsing.
 
 import requests
 import json
+import os
 import time
+import uuid
 from datetime import datetime
+from urllib.parse import urlparse
+
+from connection_pool import ConnectionStats, make_session, print_connection_report
+from fixture_registry import MANIFEST_NAME, FixtureManifest
+from latency_stats import LatencyRecorder, print_stage_breakdown, record_server_timing, server_stage_timings
+from multipart_body import iter_multipart_body
+from resilience import ResiliencePolicy, idempotency_key, print_resilience_report
+from transcription_cache import TranscriptionCache, hash_audio, hash_audio_file
+
+# Point N8N_BASE_URL at mock_n8n_server.py to run everything offline
+DEFAULT_BASE_URL = os.environ.get("N8N_BASE_URL", "https://tigrann.app.n8n.cloud")
+
+# Set N8N_STATS_JSON to export the latency report of the demos as JSON
+STATS_JSON = os.environ.get("N8N_STATS_JSON")
+
+# Set N8N_RECORD_JSONL to log every request/response pair of the demos for replay.
+# (requests.jsonl in the repository root is not a capture file, don't point this at it.)
+RECORD_JSONL = os.environ.get("N8N_RECORD_JSONL")
+
+# Set N8N_TRANSCRIPTION_CACHE to a directory to reuse transcriptions across runs
+TRANSCRIPTION_CACHE_DIR = os.environ.get("N8N_TRANSCRIPTION_CACHE")
+
+FIXTURE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Set N8N_FIXTURE_MANIFEST to run the voice command tests over another corpus,
+# N8N_FIXTURE_SHARD (e.g. 2/8) to take one shard of it per worker, and
+# N8N_FIXTURE_BASE_URL to where its recordings are served from
+FIXTURE_MANIFEST = os.environ.get("N8N_FIXTURE_MANIFEST", os.path.join(FIXTURE_DIR, MANIFEST_NAME))
+FIXTURE_SHARD = os.environ.get("N8N_FIXTURE_SHARD")
+FIXTURE_BASE_URL = os.environ.get("N8N_FIXTURE_BASE_URL",
+                                  "https://github.com/TigranGalstyan/molecula_test_files/raw/refs/heads/main/")
+
+def voice_command(fixture):
+    """Voice command dict of a manifest fixture"""
+    return {
+        "name": fixture.name,
+        "audio_url": FIXTURE_BASE_URL + fixture.path,
+        "audio_file": fixture.path,
+        "expected_transcription": fixture.transcript,
+        "expected_intent": fixture.intent,
+    }
+
+# The bundled trade commands, used by the benchmarks and load tests
+VOICE_COMMANDS = [voice_command(fixture) for fixture in
+                  FixtureManifest(os.path.join(FIXTURE_DIR, MANIFEST_NAME)).select(trades=True, codecs=["aac"])]
+
+# Error scenarios, test_method names a N8nVoiceTradingTester method
+ERROR_SCENARIOS = [
+    {
+        "name": "No Audio Input",
+        "test_method": "test_no_audio_input",
+        "expected_error": "No audio input provided"
+    },
+    {
+        "name": "Empty Audio URL",
+        "test_method": "test_empty_audio_url",
+        "expected_error": "No audio input provided"
+    },
+    {
+        "name": "Malformed Request",
+        "test_method": "test_malformed_request",
+        "expected_error": "No audio input provided"
+    },
+    {
+        "name": "Passing Error Response",
+        "test_method": "test_passing_error_response",
+        "expected_error": "Various error responses"
+    }
+]
 
 class N8nVoiceTradingTester:
     """Test client for n8n voice trading workflow"""
     
-    def __init__(self, base_url):
+    def __init__(self, base_url, transcription_cache=None, preprocess_audio=False, verbose=True,
+                 recorder=None, balance_cache=None, compact=False, resilience=None,
+                 idempotency_window=None, pool_size=10, host_pool_sizes=None, connection_stats=None):
         """
         Initialize the tester
         
         Args:
             base_url: Base URL of your n8n instance (e.g., 'https://your-n8n-instance.com')
+            transcription_cache: Optional TranscriptionCache; on a hit the cached
+                transcription and intent are sent along so the workflow can
+                skip speech-to-text
+            preprocess_audio: Trim silence and re-encode uploads to 16 kHz
+                mono Opus before sending (requires numpy and ffmpeg)
+            verbose: Print every request and its response
+            recorder: Optional RequestRecorder that logs every request/response pair
+            balance_cache: Optional BalanceCache answering test_balance() from
+                a TTL'd, ETag-revalidated snapshot
+            compact: In verbose mode, print one compact JSON record per request
+                instead of the pretty-printed response
+            resilience: ResiliencePolicy with timeouts, retries and hedging; a
+                default policy (timeouts, retries for balance/orders) is used if omitted
+            idempotency_window: Send voice commands with an idempotency key
+                derived from user, audio and this many seconds, so the workflow
+                places one order however often a command is retried or hedged
+            pool_size: Idle connections kept per host; raise it when more
+                threads than that share the tester
+            host_pool_sizes: Dict mapping host name to its own pool size
+            connection_stats: Optional ConnectionStats to share between testers
         """
         self.base_url = base_url.rstrip('/')
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.connection_stats = connection_stats if connection_stats is not None else ConnectionStats()
+        self.pool_size = pool_size
+        self.host_pool_sizes = host_pool_sizes
+        self.session = self._new_session()
+        self.stats = LatencyRecorder()
+        self.stage_stats = LatencyRecorder()
+        self.last_latency = None
+        self.last_response = None
+        self.transcription_cache = transcription_cache
+        self.preprocess_audio = preprocess_audio
+        self.preprocessed = {}
+        self.verbose = verbose
+        self.compact = compact
+        self.recorder = recorder
+        self.balance_cache = balance_cache
+        self.order_stores = {}
+        self.last_envelope = None
+        self.resilience = resilience or ResiliencePolicy()
+        # Hedged attempts run on the policy's own threads, on sessions built like ours
+        self.resilience.session_factory = self._new_session
+        self.idempotency_window = idempotency_window
+        self.audio_identities = {}
+    
+    def _new_session(self):
+        """Session with this tester's pool sizes, connection stats and headers"""
+        session = make_session(self.pool_size, self.host_pool_sizes, connection_stats=self.connection_stats)
+        session.headers.update({
             'Content-Type': 'application/json'
         })
+        return session
+    
+    def _log(self, *args):
+        """Print only in verbose mode"""
+        if self.verbose:
+            print(*args)
+    
+    def _audio_digest(self, audio_url):
+        """
+        SHA-256 of the audio behind a URL
+        
+        Uses the URL alias remembered by the cache, then a bundled fixture with
+        the same file name, and only downloads the audio as a last resort.
+        
+        Args:
+            audio_url: URL to audio file
+            
+        Returns:
+            Hex digest of the audio bytes
+        """
+        digest = self.transcription_cache.lookup_url(audio_url)
+        if digest is None:
+            local_path = os.path.join(FIXTURE_DIR, os.path.basename(urlparse(audio_url).path))
+            if os.path.isfile(local_path):
+                digest = hash_audio_file(local_path)
+            else:
+                response = self.session.get(audio_url)
+                response.raise_for_status()
+                digest = hash_audio(response.content)
+            self.transcription_cache.remember_url(audio_url, digest)
+        return digest
+    
+    def _idempotency_key(self, user_id, audio_url=None, audio_path=None, digest=None):
+        """
+        Idempotency key of a voice command, None when keys are disabled
+        
+        The audio is identified by its content where that is cheap (the
+        transcription cache, a bundled fixture, an uploaded file) and by its
+        URL otherwise; nothing is downloaded just to derive a key.
+        """
+        if self.idempotency_window is None:
+            return None
+        if digest is None:
+            source = audio_path or audio_url
+            digest = self.audio_identities.get(source)
+            if digest is None:
+                local_path = audio_path or os.path.join(FIXTURE_DIR, os.path.basename(urlparse(audio_url).path))
+                if os.path.isfile(local_path):
+                    digest = hash_audio_file(local_path)
+                else:
+                    digest = hash_audio(audio_url.encode("utf-8"))
+                self.audio_identities[source] = digest
+        return idempotency_key(user_id, digest, self.idempotency_window)
+    
+    def _request(self, method, endpoint, upload=None, idempotent=False, **kwargs):
+        """
+        Send a timed request to a workflow webhook and print the result
+        
+        The response is streamed so that time to first byte (headers) and
+        body download are recorded as separate phases in self.stats. Stage
+        timings the workflow reports (Server-Timing) go to self.stage_stats.
+        Timeouts, retries and hedging follow self.resilience; the latency
+        recorded covers every attempt.
+        
+        Args:
+            method: HTTP method
+            endpoint: Webhook path below /webhook/
+            upload: Description of a multipart upload for the recorder
+            idempotent: The request carries an idempotency key and may be
+                retried or hedged
+            **kwargs: Passed through to requests (json, params, ...); a
+                callable 'data' is called for a fresh body on every attempt
+            
+        Returns:
+            API response
+        """
+        url = f"{self.base_url}/webhook/{endpoint}"
+        
+        def send(session, timeout):
+            request_kwargs = {**kwargs, "data": kwargs["data"]()} if callable(kwargs.get("data")) else kwargs
+            sent = time.monotonic()
+            response = session.request(method, url, stream=True, timeout=timeout, **request_kwargs)
+            headers_received = time.monotonic()
+            body = response.content
+            return response, body, {
+                "ttfb": headers_received - sent,
+                "body": time.monotonic() - headers_received,
+            }
+        
+        started_at = time.time()
+        started = time.monotonic()
+        try:
+            response, body, timings = self.resilience.call(endpoint, send, self.session, idempotent=idempotent)
+        except requests.RequestException as e:
+            if self.recorder is not None:
+                self.recorder.record(method, endpoint, None, None, {"total": time.monotonic() - started},
+                                     params=kwargs.get('params'), payload=kwargs.get('json'),
+                                     upload=upload, headers=kwargs.get('headers'), error=str(e),
+                                     started_at=started_at)
+            raise
+        finished = time.monotonic()
+        
+        self.last_latency = finished - started
+        self.last_response = response
+        self.stats.record(endpoint, finished - started, started=started, phases=timings)
+        result = json.loads(body) if body else {}
+        stages = server_stage_timings(response.headers, result)
+        if stages:
+            record_server_timing(self.stage_stats, endpoint, finished - started, stages, started=started)
+        
+        if self.recorder is not None:
+            self.recorder.record(method, endpoint, response.status_code, result,
+                                 {"total": finished - started, **timings},
+                                 params=kwargs.get('params'), payload=kwargs.get('json'),
+                                 upload=upload, headers=kwargs.get('headers'), started_at=started_at)
+        
+        self._log_result(endpoint, response.status_code, finished - started, len(body), result)
+        
+        return result
+    
+    def _log_result(self, endpoint, status, latency, size, result):
+        """Print a response, pretty or as one compact record; no work at all when quiet"""
+        if not self.verbose:
+            return
+        if self.compact:
+            record = {"endpoint": endpoint, "status": status, "ms": round(latency * 1000, 1), "bytes": size}
+            if isinstance(result, dict):
+                for key in ("success", "error", "count", "trade_summary"):
+                    if key in result:
+                        record[key] = result[key]
+            print(json.dumps(record, separators=(",", ":")))
+            return
+        print(f"Status Code: {status}")
+        print(f"Latency: {latency * 1000:.1f} ms")
+        print(f"Response: {json.dumps(result, indent=2)}")
+        print("-" * 50)
     
     def test_voice_command(self, audio_url, user_id="test_user"):
         """
@@ -39,64 +293,291 @@ class N8nVoiceTradingTester:
         Returns:
             API response
         """
-        url = f"{self.base_url}/webhook/voice-command"
+        payload, digest, cached = self._voice_payload(audio_url, user_id)
+        
+        self._log(f"Testing voice command with audio: {audio_url}")
+        if cached:
+            self._log(f"Transcription cache hit: {digest[:12]}")
+        key = self._idempotency_key(user_id, audio_url, digest=digest)
+        headers = {"Idempotency-Key": key} if key else None
+        result = self._request("POST", "voice-command", idempotent=key is not None, json=payload, headers=headers)
+        
+        if digest and not cached and result.get("transcription"):
+            self.transcription_cache.put(digest, result["transcription"], result.get("intent"))
+        
+        return result
+    
+    def _voice_payload(self, audio_url, user_id):
+        """
+        Build a voice-command payload, adding a cached transcription if there is one
+        
+        Returns:
+            Tuple of (payload, audio digest or None, cache entry or None)
+        """
         payload = {
             "audio_url": audio_url,
             "user_id": user_id
         }
         
-        print(f"Testing voice command with audio: {audio_url}")
-        response = self.session.post(url, json=payload)
+        digest = cached = None
+        if self.transcription_cache is not None and audio_url:
+            digest = self._audio_digest(audio_url)
+            cached = self.transcription_cache.get(digest)
+            if cached:
+                payload["transcription"] = cached["transcription"]
+                if cached.get("intent"):
+                    payload["intent"] = cached["intent"]
+        return payload, digest, cached
+    
+    def test_voice_commands_batch(self, commands, user_id="test_user"):
+        """
+        Test many voice commands in a single request
         
-        print(f"Status Code: {response.status_code}")
-        print(f"Response: {json.dumps(response.json(), indent=2)}")
-        print("-" * 50)
+        The workflow starts once for the whole batch and processes the items
+        in parallel, so HTTP and start-up overhead are paid once.
+        
+        Args:
+            commands: Audio URLs, or dicts with audio_url and optionally user_id
+            user_id: User identifier for items that do not name one
+            
+        Returns:
+            API response with one entry per command in 'results'
+        """
+        items, digests = [], []
+        for command in commands:
+            if isinstance(command, str):
+                command = {"audio_url": command}
+            item_user = command.get("user_id", user_id)
+            payload, digest, cached = self._voice_payload(command.get("audio_url"), item_user)
+            key = self._idempotency_key(item_user, command.get("audio_url"), digest=digest)
+            if key:
+                payload["idempotency_key"] = key
+            items.append(payload)
+            digests.append(None if cached else digest)
+        
+        self._log(f"Testing batch of {len(items)} voice commands")
+        # Every item carries its own key, so repeating the whole batch is safe
+        idempotent = all("idempotency_key" in item for item in items)
+        result = self._request("POST", "voice-command/batch", idempotent=idempotent,
+                               json={"items": items, "user_id": user_id})
+        
+        for digest, item in zip(digests, result.get("results", [])):
+            if digest and item.get("transcription"):
+                self.transcription_cache.put(digest, item["transcription"], item.get("intent"))
+        
+        return result
+    
+    def test_voice_command_upload(self, audio_path, user_id="test_user", chunk_size=64 * 1024):
+        """
+        Test voice command processing with the audio uploaded in the request
+        
+        The file is streamed as a chunked multipart/form-data body instead of
+        being referenced by audio_url, so the workflow does not have to fetch
+        it before transcription.
+        
+        Args:
+            audio_path: Path to a local audio file
+            user_id: User identifier
+            chunk_size: Bytes read from the file per body chunk
+            
+        Returns:
+            API response
+        """
+        if self.preprocess_audio:
+            if audio_path not in self.preprocessed:
+                from audio_preprocess import preprocess_file
+                self.preprocessed[audio_path] = preprocess_file(audio_path)
+            processed = self.preprocessed[audio_path]
+            self._log(f"Pre-processed {audio_path}: {processed['input_bytes']} -> "
+                  f"{processed['output_bytes']} bytes")
+            audio_path = processed['output']
+        
+        boundary = uuid.uuid4().hex
+        headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+        key = self._idempotency_key(user_id, audio_path=audio_path)
+        if key:
+            headers["Idempotency-Key"] = key
         
-        return response.json()
+        def body():
+            # A generator body is used up by one attempt; retries need a new one
+            return iter_multipart_body(boundary, {"user_id": user_id}, "audio", audio_path, chunk_size)
+        
+        self._log(f"Testing voice command with uploaded audio: {audio_path}")
+        upload = {"audio_path": audio_path, "fields": {"user_id": user_id}}
+        return self._request("POST", "voice-command", upload=upload, idempotent=key is not None,
+                             data=body, headers=headers)
     
-    def test_balance(self, exchange="binance"):
+    def test_voice_command_stream(self, audio_path, user_id="test_user", chunk_ms=100, speed=1.0,
+                                  speculate=False, default_exchange=None):
+        """
+        Test voice command processing with the audio streamed like a live microphone
+        
+        Partial transcripts and an early intent come back as Server-Sent
+        Events while the audio is still being sent.
+        
+        Args:
+            audio_path: Path to a local audio file
+            user_id: User identifier
+            chunk_ms: Audio duration sent per chunk
+            speed: 1.0 sends at real-time pace, 0 as fast as possible
+            speculate: Let the workflow execute intents from partial transcripts
+                and commit or roll them back on the final transcript
+            default_exchange: Exchange speculation assumes until one is spoken
+            
+        Returns:
+            stream_voice_command() summary with the event timeline and milestones
+        """
+        from voice_stream import stream_voice_command
+        
+        def log_event(elapsed, event, data):
+            detail = data.get("transcription") if event in ("partial", "transcript") else data.get("intent", data)
+            self._log(f"   {elapsed * 1000:8.0f}ms  {event:<10} {detail}")
+        
+        self._log(f"Testing streamed voice command with audio: {audio_path}")
+        started = time.monotonic()
+        summary = stream_voice_command(self.base_url, audio_path, user_id, chunk_ms, speed, log_event,
+                                       speculate=speculate, default_exchange=default_exchange)
+        phases = {name: summary[name] for name in ("first_partial", "early_intent", "final_intent")}
+        self.stats.record("voice-command/stream", time.monotonic() - started, phases=phases, started=started)
+        self._log("-" * 50)
+        return summary
+    
+    def test_balance(self, exchange="binance", user_id=None):
         """
         Test balance retrieval
         
         Args:
             exchange: Exchange name (binance, coinbase)
+            user_id: Paper-trading user whose balances to fetch (mock ledger)
             
         Returns:
             API response
         """
-        url = f"{self.base_url}/webhook/balance"
-        params = {"exchange": exchange}
+        if self.balance_cache is not None and user_id is None:
+            self._log(f"Testing balance retrieval for {exchange} (cached)")
+            return self.balance_cache.get(exchange, self._fetch_balance)
         
-        print(f"Testing balance retrieval for {exchange}")
-        response = self.session.get(url, params=params)
+        params = {"exchange": exchange}
+        if user_id is not None:
+            params["user_id"] = user_id
         
-        print(f"Status Code: {response.status_code}")
-        print(f"Response: {json.dumps(response.json(), indent=2)}")
-        print("-" * 50)
+        self._log(f"Testing balance retrieval for {exchange}")
+        return self._request("GET", "balance", params=params)
+    
+    def _fetch_balance(self, exchange, etag=None):
+        """
+        Conditional balance GET used by the balance cache
         
-        return response.json()
+        Args:
+            exchange: Exchange name
+            etag: ETag of the cached snapshot, None for a full fetch
+            
+        Returns:
+            Tuple of (status code, response body, ETag of the response)
+        """
+        headers = {"If-None-Match": etag} if etag else {}
+        result = self._request("GET", "balance", params={"exchange": exchange}, headers=headers)
+        response = self.last_response
+        etag = response.headers.get("ETag") or (result.get("etag") if isinstance(result, dict) else None)
+        return response.status_code, result, etag
     
-    def test_orders(self, exchange="binance"):
+    def test_orders(self, exchange="binance", since=None, user_id=None):
         """
         Test orders retrieval
         
         Args:
             exchange: Exchange name (binance, coinbase)
+            since: Cursor of a previous call; only orders changed after it are returned
+            user_id: Only return the orders of this user
             
         Returns:
             API response
         """
-        url = f"{self.base_url}/webhook/orders"
         params = {"exchange": exchange}
+        if since is not None:
+            params["since"] = since
+        if user_id is not None:
+            params["user_id"] = user_id
         
-        print(f"Testing orders retrieval for {exchange}")
-        response = self.session.get(url, params=params)
+        self._log(f"Testing orders retrieval for {exchange}")
+        return self._request("GET", "orders", params=params)
+    
+    def iter_orders(self, exchange="binance", since=None, chunk_size=64 * 1024):
+        """
+        Stream the orders of an exchange one at a time
         
-        print(f"Status Code: {response.status_code}")
-        print(f"Response: {json.dumps(response.json(), indent=2)}")
-        print("-" * 50)
+        The body is parsed incrementally as it arrives, so neither the raw
+        response nor the full order list is held in memory. Latency is
+        recorded once the last order has been read; the other top-level
+        fields end up in self.last_envelope.
+        
+        Args:
+            exchange: Exchange name (binance, coinbase)
+            since: Cursor of a previous call; only orders changed after it are returned
+            chunk_size: Bytes read from the socket at a time
+            
+        Yields:
+            Order dicts
+        """
+        from json_stream import stream_json_array
+        
+        params = {"exchange": exchange}
+        if since is not None:
+            params["since"] = since
+        url = f"{self.base_url}/webhook/orders"
+        
+        self._log(f"Streaming orders for {exchange}")
+        started_at = time.time()
+        started = time.monotonic()
+        envelope = {}
+        count = 0
+        size = 0
+        with self.session.get(url, params=params, stream=True,
+                              timeout=self.resilience.timeout("orders")) as response:
+            headers_received = time.monotonic()
+            
+            def chunks():
+                nonlocal size
+                for chunk in response.iter_content(chunk_size):
+                    size += len(chunk)
+                    yield chunk
+            
+            for order in stream_json_array(chunks(), "orders", envelope):
+                count += 1
+                yield order
+        finished = time.monotonic()
         
-        return response.json()
+        timings = {"ttfb": headers_received - started, "body": finished - headers_received}
+        self.last_latency = finished - started
+        self.last_response = response
+        self.last_envelope = envelope
+        self.stats.record("orders", finished - started, started=started, phases=timings)
+        if self.recorder is not None:
+            self.recorder.record("GET", "orders", response.status_code, {**envelope, "streamed_orders": count},
+                                 {"total": finished - started, **timings},
+                                 params=params, started_at=started_at)
+        self._log_result("orders", response.status_code, finished - started, size, {**envelope, "count": count})
+    
+    def sync_orders(self, exchange="binance"):
+        """
+        Bring the local order store of an exchange up to date
+        
+        The first call downloads every order; later calls only fetch the
+        orders changed since the previous sync and merge them.
+        
+        Args:
+            exchange: Exchange name (binance, coinbase)
+            
+        Returns:
+            The exchange's OrderStore
+        """
+        from order_store import OrderStore
+        
+        store = self.order_stores.get(exchange)
+        if store is None:
+            store = self.order_stores[exchange] = OrderStore()
+        store.apply(self.test_orders(exchange, since=store.cursor))
+        return store
     
     def test_no_audio_input(self):
         """
@@ -105,20 +586,13 @@ class N8nVoiceTradingTester:
         Returns:
             API response
         """
-        url = f"{self.base_url}/webhook/voice-command"
         payload = {
             "user_id": "test_user"
             # Missing audio_url field
         }
         
-        print("Testing voice command with no audio input")
-        response = self.session.post(url, json=payload)
-        
-        print(f"Status Code: {response.status_code}")
-        print(f"Response: {json.dumps(response.json(), indent=2)}")
-        print("-" * 50)
-        
-        return response.json()
+        self._log("Testing voice command with no audio input")
+        return self._request("POST", "voice-command", json=payload)
     
     def test_empty_audio_url(self):
         """
@@ -127,20 +601,13 @@ class N8nVoiceTradingTester:
         Returns:
             API response
         """
-        url = f"{self.base_url}/webhook/voice-command"
         payload = {
             "audio_url": "",
             "user_id": "test_user"
         }
         
-        print("Testing voice command with empty audio URL")
-        response = self.session.post(url, json=payload)
-        
-        print(f"Status Code: {response.status_code}")
-        print(f"Response: {json.dumps(response.json(), indent=2)}")
-        print("-" * 50)
-        
-        return response.json()
+        self._log("Testing voice command with empty audio URL")
+        return self._request("POST", "voice-command", json=payload)
     
     def test_malformed_request(self):
         """
@@ -149,20 +616,13 @@ class N8nVoiceTradingTester:
         Returns:
             API response
         """
-        url = f"{self.base_url}/webhook/voice-command"
         payload = {
             "invalid_field": "invalid_value",
             "another_invalid": 123
         }
         
-        print("Testing voice command with malformed request")
-        response = self.session.post(url, json=payload)
-        
-        print(f"Status Code: {response.status_code}")
-        print(f"Response: {json.dumps(response.json(), indent=2)}")
-        print("-" * 50)
-        
-        return response.json()
+        self._log("Testing voice command with malformed request")
+        return self._request("POST", "voice-command", json=payload)
     
     def test_passing_error_response(self):
         """
@@ -171,61 +631,71 @@ class N8nVoiceTradingTester:
         Returns:
             API response
         """
-        url = f"{self.base_url}/webhook/voice-command"
         payload = {
             "audio_url": "https://github.com/TigranGalstyan/molecula_test_files/raw/refs/heads/main/non_trade.m4a",
             "user_id": "test_user"
         }
         
-        print("Testing voice command that should trigger error response")
-        print("Note: This tests the workflow's error handling paths")
-        response = self.session.post(url, json=payload)
-        
-        print(f"Status Code: {response.status_code}")
-        print(f"Response: {json.dumps(response.json(), indent=2)}")
-        print("-" * 50)
-        
-        return response.json()
+        self._log("Testing voice command that should trigger error response")
+        self._log("Note: This tests the workflow's error handling paths")
+        return self._request("POST", "voice-command", json=payload)
 
-def demo_error_scenarios():
+def open_recorder():
+    """RequestRecorder for N8N_RECORD_JSONL, None when recording is off"""
+    if not RECORD_JSONL:
+        return None
+    from recorder import RequestRecorder
+    return RequestRecorder(RECORD_JSONL)
+
+def close_recorder(recorder):
+    """Close a recorder from open_recorder() and report what it captured"""
+    if recorder is not None:
+        recorder.close()
+        print(f"   📼 {recorder.count} requests recorded to {recorder.path}")
+
+def print_latency_summary(tester, stats_json=None):
+    """
+    Print per-endpoint latency percentiles and optionally export them
+    
+    Args:
+        tester: N8nVoiceTradingTester whose calls should be summarized
+        stats_json: Path of a JSON file to write the report to
+    """
+    print("\n⏱️ Latency Summary")
+    print("-" * 30)
+    tester.stats.print_report()
+    
+    print("\n🔬 Pipeline Stage Breakdown")
+    print("-" * 30)
+    print_stage_breakdown(tester.stage_stats.report())
+    
+    print("\n🔌 Connection Reuse")
+    print("-" * 30)
+    print_connection_report(tester.connection_stats.snapshot())
+    
+    if stats_json:
+        tester.stats.to_json(stats_json)
+        print(f"   📁 Latency report written to {stats_json}")
+
+def demo_error_scenarios(base_url=DEFAULT_BASE_URL, stats_json=None):
     """Demonstrate error handling scenarios"""
     
     # Initialize tester
-    tester = N8nVoiceTradingTester("https://tigrann.app.n8n.cloud")
+    recorder = open_recorder()
+    tester = N8nVoiceTradingTester(base_url, recorder=recorder)
     
     print("\n🚨 Testing Error Scenarios")
     print("=" * 40)
     
     # Test error scenarios - keeping only main essential tests
-    error_tests = [
-        {
-            "name": "No Audio Input",
-            "test_method": tester.test_no_audio_input,
-            "expected_error": "No audio input provided"
-        },
-        {
-            "name": "Empty Audio URL",
-            "test_method": tester.test_empty_audio_url,
-            "expected_error": "No audio input provided"
-        },
-        {
-            "name": "Malformed Request",
-            "test_method": tester.test_malformed_request,
-            "expected_error": "No audio input provided"
-        },
-        {
-            "name": "Passing Error Response",
-            "test_method": tester.test_passing_error_response,
-            "expected_error": "Various error responses"
-        }
-    ]
+    error_tests = ERROR_SCENARIOS
     
     for i, test in enumerate(error_tests, 1):
         print(f"\n{i}. {test['name']}")
         print(f"   Expected: {test['expected_error']}")
         
         try:
-            result = test['test_method']()
+            result = getattr(tester, test['test_method'])()
             
             if 'error' in result:
                 print(f"   ✅ Error Caught: {result.get('error', 'Unknown error')}")
@@ -241,40 +711,42 @@ def demo_error_scenarios():
         
         time.sleep(1)  # Pause between requests
     
+    print_latency_summary(tester, stats_json)
+    close_recorder(recorder)
     print("\n✅ Error scenario testing completed!")
 
-def demo_voice_commands():
-    """Demonstrate various voice commands"""
+def demo_voice_commands(base_url=DEFAULT_BASE_URL, stats_json=None, manifest=FIXTURE_MANIFEST,
+                        shard=FIXTURE_SHARD, **filters):
+    """
+    Demonstrate various voice commands
+    
+    Every recording of the fixture manifest is sent, and the transcription
+    and intent are checked against the ones the manifest expects.
+    
+    Args:
+        base_url: Base URL of your n8n instance
+        stats_json: Path to export the latency report to
+        manifest: Fixture manifest to read the recordings from
+        shard: 'index/count' of the shard of the manifest to run
+        **filters: Further FixtureManifest.select() filters (tags, codecs, ...)
+    """
     
     # Initialize tester (replace with your n8n URL)
-    tester = N8nVoiceTradingTester("https://tigrann.app.n8n.cloud")
+    cache = TranscriptionCache(TRANSCRIPTION_CACHE_DIR) if TRANSCRIPTION_CACHE_DIR else None
+    recorder = open_recorder()
+    tester = N8nVoiceTradingTester(base_url, transcription_cache=cache, recorder=recorder)
     
     print("🎤 Voice-Activated Trading System - n8n Demo")
     print("=" * 60)
     
-    # Test voice commands with mock audio URLs
-    voice_commands = [
-        {
-            "name": "Buy Bitcoin Market Order",
-            "audio_url": "https://github.com/TigranGalstyan/molecula_test_files/raw/refs/heads/main/buy_btc_binance.m4a",
-            "expected_transcription": "Buy 0.5 Bitcoin on Binance at market price"
-        },
-        {
-            "name": "Sell Ethereum Limit Order",
-            "audio_url": "https://github.com/TigranGalstyan/molecula_test_files/raw/refs/heads/main/sell_eth.m4a",
-            "expected_transcription": "Sell 10 ETH at $3,200 on Coinbase"
-        },
-        {
-            "name": "Buy Bitcoin Limit Order",
-            "audio_url": "https://github.com/TigranGalstyan/molecula_test_files/raw/refs/heads/main/buy_btc_limit.m4a",
-            "expected_transcription": "Place a limit order to buy 1 BTC at $45,000 on Binance"
-        },
-    ]
+    # Recordings are read from the manifest one at a time, never all up front
+    fixtures = FixtureManifest(manifest).select(shard=shard, **filters)
     
-    print("\n📝 Testing Voice Commands")
+    print(f"\n📝 Testing Voice Commands{f' (shard {shard})' if shard else ''}")
     print("-" * 30)
     
-    for i, command in enumerate(voice_commands, 1):
+    for i, fixture in enumerate(fixtures, 1):
+        command = voice_command(fixture)
         print(f"\n{i}. {command['name']}")
         print(f"   Expected: '{command['expected_transcription']}'")
         
@@ -286,13 +758,842 @@ def demo_voice_commands():
                 if 'order_result' in result:
                     order = result['order_result']
                     print(f"   📊 Order: {order['side']} {order['quantity']} {order['symbol']} @ {order['price']}")
+                if result.get('intent') != command['expected_intent']:
+                    print(f"   ⚠️ Intent differs: {result.get('intent')}")
+            elif command['expected_intent'] is None and result.get('error') == "Not a trading command":
+                print("   ✅ Not a trade, as expected")
             else:
                 print(f"   ❌ Error: {result.get('error', 'Unknown error')}")
+            
+            heard = result.get('transcription')
+            if heard and heard != command['expected_transcription']:
+                print(f"   ⚠️ Heard: '{heard}'")
                 
         except Exception as e:
             print(f"   ❌ Exception: {e}")
         
         time.sleep(1)  # Pause between requests
+    
+    print_latency_summary(tester, stats_json)
+    
+    if cache is not None:
+        cache_stats = cache.stats()
+        print(f"   🗃️ Transcription cache: {cache_stats['hits']} hits, "
+              f"{cache_stats['misses']} misses, {cache_stats['entries']} entries")
+    close_recorder(recorder)
+
+def check_voice_command(result):
+    """Matrix check: the voice command was turned into an order"""
+    if result.get('success'):
+        return True, result.get('trade_summary', 'Command processed')
+    return False, result.get('error', 'Unknown error')
+
+def check_error_response(result):
+    """Matrix check: the workflow answered with an error instead of trading"""
+    if 'error' in result:
+        return True, result['error']
+    if 'success' in result and not result['success']:
+        return True, result.get('message', 'Unknown error')
+    return False, f"Unexpected response: {result}"
+
+def check_success(result):
+    """Matrix check: the request succeeded"""
+    return bool(result.get('success')), result.get('error', '')
+
+def matrix_scenarios():
+    """Voice commands, error scenarios, balance and orders as matrix scenarios"""
+    scenarios = []
+    for command in VOICE_COMMANDS:
+        scenarios.append({
+            "name": command['name'],
+            "call": lambda tester, exchange, url=command['audio_url']: tester.test_voice_command(url),
+            "check": check_voice_command,
+        })
+    for test in ERROR_SCENARIOS:
+        scenarios.append({
+            "name": test['name'],
+            "call": lambda tester, exchange, method=test['test_method']: getattr(tester, method)(),
+            "check": check_error_response,
+        })
+    scenarios += [
+        {
+            "name": "Balance",
+            "call": lambda tester, exchange: tester.test_balance(exchange),
+            "check": check_success,
+            "per_exchange": True,
+        },
+        {
+            "name": "Orders",
+            "call": lambda tester, exchange: tester.test_orders(exchange),
+            "check": check_success,
+            "per_exchange": True,
+        },
+    ]
+    return scenarios
+
+def demo_matrix(base_url=DEFAULT_BASE_URL, repetitions=1, max_workers=16, stats_json=None):
+    """
+    Run every scenario x exchange x repetition combination in parallel
+    
+    Args:
+        base_url: Base URL of your n8n instance
+        repetitions: Times every scenario is repeated
+        max_workers: Maximum number of concurrent requests
+        stats_json: Path of a JSON file to write the latency report to
+    """
+    from matrix_runner import run_matrix, print_matrix_report
+    
+    stats = LatencyRecorder()
+    stage_stats = LatencyRecorder()
+    connection_stats = ConnectionStats()
+    recorder = open_recorder()
+    
+    def make_tester():
+        tester = N8nVoiceTradingTester(base_url, verbose=False, recorder=recorder, connection_stats=connection_stats)
+        tester.stats = stats  # LatencyRecorder is thread-safe, share one report
+        tester.stage_stats = stage_stats
+        return tester
+    
+    print(f"\n🧩 Parallel Test Matrix ({repetitions} repetition(s), {max_workers} workers)")
+    print("=" * 60)
+    
+    report = run_matrix(make_tester, matrix_scenarios(), repetitions=repetitions, max_workers=max_workers)
+    print_matrix_report(report)
+    
+    print("\n⏱️ Latency Summary")
+    print("-" * 30)
+    stats.print_report()
+    print("\n🔬 Pipeline Stage Breakdown")
+    print("-" * 30)
+    print_stage_breakdown(stage_stats.report())
+    print("\n🔌 Connection Reuse")
+    print("-" * 30)
+    print_connection_report(connection_stats.snapshot())
+    if stats_json:
+        stats.to_json(stats_json)
+        print(f"   📁 Latency report written to {stats_json}")
+    close_recorder(recorder)
+    print("\n✅ Matrix run completed!")
+
+def demo_balance_cache(base_url=DEFAULT_BASE_URL, pollers=8, duration=10.0, interval=0.1, ttl=1.0):
+    """
+    Poll balances like a dashboard, without and with the balance cache
+    
+    Args:
+        base_url: Base URL of your n8n instance
+        pollers: Number of concurrent polling threads
+        duration: Seconds each mode polls for
+        interval: Pause between two polls of one thread
+        ttl: Seconds a cached snapshot is served without revalidation
+    """
+    import threading
+    from balance_cache import BalanceCache
+    
+    print(f"\n💰 Balance Cache Benchmark ({pollers} pollers, {interval * 1000:.0f}ms interval, "
+          f"{duration:.0f}s per mode, TTL {ttl:g}s)")
+    print("=" * 60)
+    
+    exchanges = ["binance", "coinbase"]
+    
+    def poll(cache):
+        upstream = LatencyRecorder()
+        callers = LatencyRecorder()
+        deadline = time.monotonic() + duration
+        
+        def worker(index):
+            tester = N8nVoiceTradingTester(base_url, verbose=False, balance_cache=cache)
+            tester.stats = upstream
+            polls = 0
+            while time.monotonic() < deadline:
+                exchange = exchanges[(index + polls) % len(exchanges)]
+                started = time.monotonic()
+                tester.test_balance(exchange)
+                callers.record("balance", time.monotonic() - started, started=started)
+                polls += 1
+                time.sleep(interval)
+        
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(pollers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return callers.histogram("balance"), upstream.histogram("balance")
+    
+    print(f"   {'mode':<10}{'calls':>7}{'upstream':>10}{'p50':>10}{'p99':>10}")
+    for label, cache in (("direct", None), ("cached", BalanceCache(ttl=ttl))):
+        callers, upstream = poll(cache)
+        print(f"   {label:<10}{callers.count:>7}{upstream.count if upstream else 0:>10}"
+              f"{callers.percentile(50) * 1000:8.1f}ms{callers.percentile(99) * 1000:8.1f}ms")
+        if cache is not None:
+            stats = cache.stats()
+            print(f"   🗃️ {stats['hits']} hits, {stats['coalesced']} coalesced, "
+                  f"{stats['revalidated']} revalidated (304), {stats['fetched']} full fetches, "
+                  f"{stats['exchange_calls_saved']:.1%} of calls did not reach the exchange")
+    
+    print("\n✅ Balance cache benchmark completed!")
+
+def demo_order_sync(base_url=DEFAULT_BASE_URL, exchange="binance", polls=20):
+    """
+    Compare polling the full order list with incremental cursor sync
+    
+    One voice command is sent halfway through, so the incremental polls see
+    a delta. Start the mock with --order-history to simulate a long history.
+    
+    Args:
+        base_url: Base URL of your n8n instance
+        exchange: Exchange whose orders are polled
+        polls: Polls per mode
+    """
+    from latency_stats import LatencyHistogram
+    
+    print(f"\n📒 Order Sync Benchmark ({polls} polls of {exchange})")
+    print("=" * 60)
+    
+    full = N8nVoiceTradingTester(base_url, verbose=False)
+    incremental = N8nVoiceTradingTester(base_url, verbose=False)
+    results = {"full": (LatencyHistogram(), []), "incremental": (LatencyHistogram(), [])}
+    
+    for poll in range(polls):
+        if poll == polls // 2:
+            full.test_voice_command(VOICE_COMMANDS[0]['audio_url'], user_id="order_sync_user")
+        
+        full.test_orders(exchange)
+        results["full"][0].record(full.last_latency)
+        results["full"][1].append(len(full.last_response.content))
+        
+        incremental.sync_orders(exchange)
+        results["incremental"][0].record(incremental.last_latency)
+        results["incremental"][1].append(len(incremental.last_response.content))
+    
+    print(f"   {'mode':<13}{'p50':>10}{'p99':>10}{'avg bytes':>12}{'last bytes':>12}")
+    for mode, (histogram, sizes) in results.items():
+        print(f"   {mode:<13}{histogram.percentile(50) * 1000:8.1f}ms{histogram.percentile(99) * 1000:8.1f}ms"
+              f"{sum(sizes) / len(sizes):>12,.0f}{sizes[-1]:>12,}")
+    
+    store = incremental.order_stores[exchange]
+    print(f"   📒 Store: {len(store)} orders, {len(store.open_orders())} open, "
+          f"{store.orders_received} received over {store.syncs} syncs (cursor {store.cursor})")
+    print("\n✅ Order sync benchmark completed!")
+
+def demo_streaming_orders(base_url=DEFAULT_BASE_URL, exchange="binance", repetitions=5):
+    """
+    Compare buffered vs streamed parsing of the order list
+    
+    Start the mock with --order-history to get a large response.
+    
+    Args:
+        base_url: Base URL of your n8n instance
+        exchange: Exchange whose orders are fetched
+        repetitions: Fetches per mode
+    """
+    import tracemalloc
+    from latency_stats import LatencyHistogram
+    
+    print(f"\n🌊 Streaming Orders Benchmark ({repetitions} fetches of {exchange})")
+    print("=" * 60)
+    
+    tester = N8nVoiceTradingTester(base_url, verbose=False)
+    
+    def buffered():
+        return sum(1 for order in tester.test_orders(exchange).get("orders", []))
+    
+    def streamed():
+        return sum(1 for order in tester.iter_orders(exchange))
+    
+    print(f"   {'mode':<10}{'orders':>8}{'p50':>10}{'cpu p50':>10}{'peak memory':>14}")
+    for mode, run in (("buffered", buffered), ("streamed", streamed)):
+        wall, cpu, peaks = LatencyHistogram(), LatencyHistogram(), []
+        for _ in range(repetitions):
+            tracemalloc.start()
+            started, cpu_started = time.perf_counter(), time.process_time()
+            count = run()
+            cpu.record(time.process_time() - cpu_started)
+            wall.record(time.perf_counter() - started)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        print(f"   {mode:<10}{count:>8}{wall.percentile(50) * 1000:8.1f}ms{cpu.percentile(50) * 1000:8.1f}ms"
+              f"{max(peaks) / 1024 / 1024:>11.1f} MB")
+    
+    print("\n✅ Streaming orders benchmark completed!")
+
+def demo_batch_voice_commands(base_url=DEFAULT_BASE_URL, size=32):
+    """
+    Compare sequential voice commands with one batch request
+    
+    Args:
+        base_url: Base URL of your n8n instance
+        size: Number of voice commands
+    """
+    print(f"\n📦 Batch Voice Command Benchmark ({size} commands)")
+    print("=" * 60)
+    
+    urls = [VOICE_COMMANDS[i % len(VOICE_COMMANDS)]['audio_url'] for i in range(size)]
+    tester = N8nVoiceTradingTester(base_url, verbose=False)
+    
+    started = time.perf_counter()
+    sequential = [tester.test_voice_command(url, user_id=f"batch_user_{i}") for i, url in enumerate(urls)]
+    sequential_time = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    batch = tester.test_voice_commands_batch(
+        [{"audio_url": url, "user_id": f"batch_user_{i}"} for i, url in enumerate(urls)])
+    batch_time = time.perf_counter() - started
+    
+    results = batch.get("results", [])
+    mismatches = sum(1 for single, item in zip(sequential, results)
+                     if single.get("success") != item.get("success")
+                     or single.get("transcription") != item.get("transcription"))
+    print(f"   Sequential: {sequential_time:7.2f}s ({sequential_time / size * 1000:.0f}ms per command)")
+    print(f"   Batch:      {batch_time:7.2f}s ({batch_time / size * 1000:.0f}ms per command, "
+          f"{batch.get('succeeded', 0)}/{batch.get('count', 0)} succeeded)")
+    if batch_time > 0:
+        print(f"   Speedup:    {sequential_time / batch_time:.1f}x")
+    status = "✅" if not mismatches and len(results) == size else "❌"
+    print(f"   {status} {mismatches} result(s) differ from the sequential run")
+    
+    print("\n✅ Batch benchmark completed!")
+
+def demo_streaming_voice_commands(base_url=DEFAULT_BASE_URL, speed=1.0):
+    """
+    Stream every fixture at microphone pace and compare with a whole-file upload
+    
+    For the upload, the user has to finish speaking before anything is sent,
+    so its time to final intent is the audio duration plus the request latency.
+    
+    Args:
+        base_url: Base URL of the workflow (needs the streaming endpoint, e.g. mock_n8n_server.py)
+        speed: 1.0 streams at real-time pace
+    """
+    print(f"\n🎙️ Streaming Voice Command Test (speed {speed:g}x)")
+    print("=" * 60)
+    
+    tester = N8nVoiceTradingTester(base_url, verbose=False)
+    
+    def ms(value):
+        return f"{value * 1000:>9.0f}ms" if value is not None else f"{'-':>11}"
+    
+    print(f"   {'fixture':<22}{'audio':>8}{'partial':>11}{'early':>11}{'final':>11}{'upload':>11}")
+    for command in VOICE_COMMANDS:
+        path = os.path.join(FIXTURE_DIR, command['audio_file'])
+        summary = tester.test_voice_command_stream(path, speed=speed)
+        tester.test_voice_command_upload(path)
+        upload_final = summary['audio_duration'] / (speed or float('inf')) + tester.last_latency
+        
+        print(f"   {command['audio_file']:<22}{summary['audio_duration']:>7.2f}s"
+              f"{ms(summary['first_partial'])}{ms(summary['early_intent'])}"
+              f"{ms(summary['final_intent'])}{ms(upload_final)}")
+        final = summary.get('response', {}).get('transcription')
+        if summary['error'] or final != command['expected_transcription']:
+            print(f"   ❌ {summary['error'] or f'Unexpected transcription: {final}'}")
+    
+    print("\n✅ Streaming test completed!")
+
+def demo_speculation(base_url=DEFAULT_BASE_URL, repetitions=3, speed=1.0, default_exchange="binance"):
+    """
+    Measure what speculative early-intent execution saves per fixture
+    
+    Every fixture is streamed with and without speculation; the report shows
+    the median time to the final result, the saving and how often a staged
+    order had to be rolled back.
+    
+    Args:
+        base_url: Base URL of the workflow (needs the streaming endpoint, e.g. mock_n8n_server.py)
+        repetitions: Streams per fixture and mode
+        speed: 1.0 streams at real-time pace
+        default_exchange: Exchange speculation assumes until one is spoken
+    """
+    from latency_stats import LatencyHistogram
+    
+    print(f"\n🔮 Speculative Execution Benchmark ({repetitions} run(s) per mode, speed {speed:g}x)")
+    print("=" * 60)
+    
+    tester = N8nVoiceTradingTester(base_url, verbose=False)
+    print(f"   {'fixture':<22}{'baseline':>10}{'speculative':>13}{'saved':>9}{'attempts':>10}{'rollbacks':>11}")
+    total_attempts = total_rollbacks = 0
+    for command in VOICE_COMMANDS:
+        path = os.path.join(FIXTURE_DIR, command['audio_file'])
+        baseline, speculative = LatencyHistogram(), LatencyHistogram()
+        attempts = rollbacks = 0
+        for _ in range(repetitions):
+            summary = tester.test_voice_command_stream(path, speed=speed)
+            if summary['result'] is not None:
+                baseline.record(summary['result'])
+            summary = tester.test_voice_command_stream(path, speed=speed, speculate=True,
+                                                       default_exchange=default_exchange)
+            if summary['result'] is not None:
+                speculative.record(summary['result'])
+            speculation = summary.get('response', {}).get('speculation', {})
+            attempts += speculation.get('attempts', 0)
+            rollbacks += speculation.get('rollbacks', 0)
+        
+        total_attempts += attempts
+        total_rollbacks += rollbacks
+        if not baseline.count or not speculative.count:
+            print(f"   ❌ {command['audio_file']}: no result received")
+            continue
+        saved = baseline.percentile(50) - speculative.percentile(50)
+        print(f"   {command['audio_file']:<22}{baseline.percentile(50) * 1000:>8.0f}ms"
+              f"{speculative.percentile(50) * 1000:>11.0f}ms{saved * 1000:>7.0f}ms"
+              f"{attempts:>10}{rollbacks:>11}")
+    
+    if total_attempts:
+        print(f"\n   Rollback rate: {total_rollbacks / total_attempts:.0%} "
+              f"({total_rollbacks} of {total_attempts} speculative orders)")
+    print("\n✅ Speculation benchmark completed!")
+
+def demo_resilience(base_url=DEFAULT_BASE_URL, calls=200, concurrency=8):
+    """
+    Compare balance tail latency without and with hedged requests
+    
+    Hedging pays off against a heavy-tailed workflow, e.g. the mock started
+    with --latency balance=lognormal:150:1.0.
+    
+    Args:
+        base_url: Base URL of your n8n instance
+        calls: Balance requests per mode
+        concurrency: Polling threads
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    import threading
+    
+    print(f"\n🛡️ Resilience Benchmark ({calls} balance calls per mode, {concurrency} threads)")
+    print("=" * 60)
+    
+    exchanges = ["binance", "coinbase"]
+    policies = [
+        ("retries", ResiliencePolicy()),
+        ("hedged", ResiliencePolicy(hedge_endpoints=["balance"], hedge_min_samples=20)),
+    ]
+    
+    print(f"   {'mode':<10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}")
+    for label, policy in policies:
+        stats = LatencyRecorder()
+        local = threading.local()
+        
+        def call(index):
+            tester = getattr(local, "tester", None)
+            if tester is None:
+                tester = local.tester = N8nVoiceTradingTester(base_url, verbose=False, resilience=policy)
+                tester.stats = stats
+            tester.test_balance(exchanges[index % len(exchanges)])
+        
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(call, range(calls)))
+        policy.close()
+        
+        summary = stats.report().get("balance")
+        if summary:
+            print(f"   {label:<10}" + "".join(f"{summary[key] * 1000:8.1f}ms" for key in ("p50", "p90", "p99", "max")))
+        print_resilience_report(policy.stats())
+    
+    print("\n✅ Resilience benchmark completed!")
+
+def demo_idempotency(base_url=DEFAULT_BASE_URL, users=8, sends=2, hedge_delay=0.05):
+    """
+    Check that retried and hedged voice commands place one order each
+    
+    Every user sends every fixture command `sends` times, as a client does
+    when it gives up waiting and tries again. With idempotency keys the
+    policy also retries and hedges the commands. The orders placed per user
+    and symbol are then counted on the workflow.
+    
+    Args:
+        base_url: Base URL of your n8n instance
+        users: Simulated users per mode
+        sends: Times each user sends each command
+        hedge_delay: Seconds before a keyed voice command is hedged
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    print(f"\n🔑 Idempotency Check ({users} users x {len(VOICE_COMMANDS)} commands x {sends} sends)")
+    print("=" * 60)
+    
+    run = uuid.uuid4().hex[:8]
+    modes = [("no key", None), ("idempotency key", 60)]
+    print(f"   {'mode':<18}{'commands':>9}{'attempts':>10}{'replays':>9}{'orders':>8}{'duplicates':>12}")
+    for label, window in modes:
+        policy = ResiliencePolicy(hedge_endpoints=["voice-command"], hedge_delay=hedge_delay)
+        user_ids = [f"idem-{run}-{window or 0}-{index}" for index in range(users)]
+        
+        def send_all(user_id):
+            tester = N8nVoiceTradingTester(base_url, verbose=False, resilience=policy, idempotency_window=window)
+            results = []
+            for command in VOICE_COMMANDS:
+                for _ in range(sends):
+                    try:
+                        results.append(tester.test_voice_command(command["audio_url"], user_id))
+                    except requests.RequestException as e:
+                        results.append({"success": False, "error": str(e)})
+            return results
+        
+        with ThreadPoolExecutor(max_workers=users) as pool:
+            results = [result for batch in pool.map(send_all, user_ids) for result in batch]
+        policy.close()
+        
+        checker = N8nVoiceTradingTester(base_url, verbose=False)
+        placed = {}
+        for exchange in ("binance", "coinbase"):
+            for order in checker.test_orders(exchange).get("orders", []):
+                if order.get("user_id") in user_ids:
+                    key = (order["user_id"], order["symbol"], order["side"], order["type"])
+                    placed[key] = placed.get(key, 0) + 1
+        orders = sum(placed.values())
+        attempts = policy.stats().get("voice-command", {}).get("attempts", 0)
+        replays = sum(1 for result in results if result.get("idempotent_replay"))
+        print(f"   {label:<18}{len(results):>9}{attempts:>10}{replays:>9}{orders:>8}{orders - len(placed):>12}")
+    
+    print("\n✅ Idempotency check completed!")
+
+def demo_connection_pool(requests_per_mode=2000, concurrency=32, delay_ms=2.0, tls=False):
+    """
+    Compare per-request sessions, pooled keep-alive and HTTP/2 multiplexing
+    
+    Runs against the bundled echo server, so it measures connection handling
+    only; HTTP/2 requires httpx and h2.
+    
+    Args:
+        requests_per_mode: Requests sent in every mode
+        concurrency: Client threads
+        delay_ms: Simulated server work per request
+        tls: Serve HTTPS with a self-signed certificate (needs openssl)
+    """
+    from pool_benchmark import benchmark, print_benchmark
+    
+    print(f"\n🔌 Connection Benchmark ({requests_per_mode} requests per mode, {concurrency} threads, "
+          f"{'HTTPS' if tls else 'HTTP'})")
+    print("=" * 60)
+    print_benchmark(benchmark(requests_per_mode, concurrency, delay_ms, tls))
+    print("\n✅ Connection benchmark completed!")
+
+def demo_matching_engine(orders=200_000, cancel_rate=0.3, market_rate=0.1):
+    """
+    Measure the order book behind mock_n8n_server.py --matching-engine
+    
+    Args:
+        orders: Limit, market and cancel requests to process
+        cancel_rate: Share of requests that cancel a resting order
+        market_rate: Share of new orders that are market orders
+    """
+    from matching_engine import benchmark, print_benchmark
+    
+    print(f"\n📈 Order Book Benchmark ({orders:,} requests)")
+    print("=" * 60)
+    print_benchmark(benchmark(orders, cancel_rate, market_rate))
+    print("\n✅ Order book benchmark completed!")
+
+def demo_paper_trading(base_url=DEFAULT_BASE_URL, user_id=None):
+    """
+    Trade by voice as one paper-trading user and check that the balances
+    reported by /webhook/balance follow from the orders in /webhook/orders
+    
+    Requires mock_n8n_server.py --ledger DIR (ideally with --matching-engine).
+    
+    Args:
+        base_url: Base URL of your n8n instance
+        user_id: Paper-trading user, a fresh one if omitted
+    """
+    from paper_ledger import order_effect
+    from symbol_registry import REGISTRY
+    
+    user_id = user_id or f"paper-{uuid.uuid4().hex[:8]}"
+    tester = N8nVoiceTradingTester(base_url, verbose=False)
+    
+    print(f"\n📒 Paper Trading ({user_id})")
+    print("=" * 60)
+    
+    exchanges = sorted({command["expected_intent"]["exchange"] for command in VOICE_COMMANDS})
+    before = {exchange: tester.test_balance(exchange, user_id) for exchange in exchanges}
+    for command in VOICE_COMMANDS:
+        result = tester.test_voice_command(command["audio_url"], user_id)
+        order = result.get("order_result") or {}
+        print(f"   🎙️ {command['name']:<28} {order.get('status', result.get('error', '-')):<18}"
+              f"{order.get('filled_quantity', '')}")
+    
+    # Expected balances: the balances before trading plus the effect of every order
+    consistent = True
+    for exchange in exchanges:
+        after = tester.test_balance(exchange, user_id)
+        expected = {row["asset"]: [row["free"], row["locked"]] for row in before[exchange].get("balances", [])}
+        for order in tester.test_orders(exchange, user_id=user_id).get("orders", []):
+            instrument = REGISTRY.resolve_symbol(order["symbol"], exchange)
+            base, quote = instrument.base, instrument.quote
+            filled, notional, locked_asset, locked = order_effect(order, base, quote)
+            sign = 1 if order["side"] == "BUY" else -1
+            expected.setdefault(base, [0.0, 0.0])[0] += sign * filled
+            expected.setdefault(quote, [0.0, 0.0])[0] -= sign * notional
+            if locked_asset is not None:
+                expected.setdefault(locked_asset, [0.0, 0.0])[0] -= locked
+                expected[locked_asset][1] += locked
+        
+        print(f"\n   {exchange}")
+        print(f"   {'asset':<8}{'free before':>16}{'free after':>16}{'locked':>14}{'expected':>16}")
+        previous = {row["asset"]: row for row in before[exchange].get("balances", [])}
+        for row in after.get("balances", []):
+            free, locked = expected.get(row["asset"], [0.0, 0.0])
+            matches = abs(row["free"] - free) < 1e-6 and abs(row["locked"] - locked) < 1e-6
+            consistent = consistent and matches
+            print(f"   {row['asset']:<8}{previous.get(row['asset'], {}).get('free', 0.0):>16,.4f}"
+                  f"{row['free']:>16,.4f}{row['locked']:>14,.4f}{free:>16,.4f} {'✅' if matches else '❌'}")
+    
+    print(f"\n{'✅ Balances follow from the orders' if consistent else '❌ Balances and orders disagree'}")
+
+def demo_risk_checks(base_url=DEFAULT_BASE_URL, checks=300_000, user_id=None):
+    """
+    Show which orders the pre-trade risk checks reject and what a check costs
+    
+    Voice commands are sent to base_url; against mock_n8n_server.py
+    --risk-checks (or --risk-limits FILE) they pass through the 'risk' stage.
+    
+    Args:
+        base_url: Base URL of your n8n instance
+        checks: Checks per concurrency level of the benchmark
+        user_id: User whose balances and voice commands are checked, a fresh one if omitted
+    """
+    from risk_engine import RiskEngine, benchmark, print_benchmark
+    from symbol_registry import REFERENCE_PRICES, REGISTRY
+    
+    print("\n🛡️ Pre-Trade Risk Checks")
+    print("=" * 60)
+    
+    user_id = user_id or f"risk-{uuid.uuid4().hex[:8]}"
+    tester = N8nVoiceTradingTester(base_url, verbose=False)
+    quote_assets = {exchange: REGISTRY.quote_asset(exchange) for exchange in REGISTRY.exchanges}
+    engine = RiskEngine(quote_assets, user_limits={"demo_user": {"max_position": {"BTC": 3.0}}})
+    holdings = {row["asset"]: (row["free"], row["locked"])
+                for row in tester.test_balance("binance", user_id).get("balances", [])}
+    orders = [
+        ("Buy 0.5 BTC at market", {"side": "BUY", "quantity": 0.5, "price": None}),
+        ("Buy 1 BTC at $4,500", {"side": "BUY", "quantity": 1.0, "price": 4500.0}),
+        ("Buy 6 BTC at market", {"side": "BUY", "quantity": 6.0, "price": None}),
+        ("Buy 1 BTC at market", {"side": "BUY", "quantity": 1.0, "price": None}),
+        ("Sell 5 BTC at market", {"side": "SELL", "quantity": 5.0, "price": None}),
+    ]
+    print(f"   Default limits with a 3 BTC position limit, binance balances of {user_id}, "
+          f"last BTC price {REFERENCE_PRICES['BTC']:,.2f}")
+    for label, order in orders:
+        intent = {"exchange": "binance", "asset": "BTC",
+                  "order_type": "MARKET" if order["price"] is None else "LIMIT", **order}
+        rejection = engine.check("demo_user", intent, REFERENCE_PRICES["BTC"], holdings)
+        print(f"   {label:<24} {'✅ passed' if rejection is None else '❌ ' + rejection[0]}"
+              f"{'' if rejection is None else ': ' + rejection[1]}")
+    
+    print(f"\n   Check cost ({checks:,} checks)")
+    print_benchmark(benchmark(checks))
+    
+    print(f"\n   Voice commands ({user_id})")
+    for command in VOICE_COMMANDS:
+        result = tester.test_voice_command(command["audio_url"], user_id)
+        risk_ms = result.get("timings", {}).get("risk")
+        outcome = (f"❌ {result['rule']}: {result.get('message')}" if result.get("rule")
+                   else (result.get("order_result") or {}).get("status", result.get("error", "-")))
+        print(f"   🎙️ {command['name']:<28} {outcome}"
+              f"{'' if risk_ms is None else f' (risk {risk_ms:.3f}ms)'}")
+    
+    print("\n✅ Risk checks completed!")
+
+def demo_symbol_registry():
+    """
+    Resolve the assets and exchanges of the expected transcriptions to
+    exchange instruments and check the orders against tick and lot sizes
+    """
+    from symbol_registry import REGISTRY
+    from trade_parser import parse_trade_command
+    
+    print("\n🗂️ Symbol Registry")
+    print("=" * 60)
+    
+    for command in VOICE_COMMANDS:
+        intent = parse_trade_command(command["expected_transcription"])
+        if intent is None:
+            print(f"   {command['name']:<28} not a trade")
+            continue
+        instrument = REGISTRY.instrument(intent["exchange"], intent["asset"])
+        if instrument is None:
+            print(f"   {command['name']:<28} ❌ {intent['asset']} is not traded on {intent['exchange']}")
+            continue
+        problem = instrument.check(intent["quantity"], intent["price"])
+        print(f"   {command['name']:<28} {instrument.symbol:<9} tick {instrument.tick_size:g}, "
+              f"lot {instrument.lot_size:g}  {'✅' if problem is None else '❌ ' + problem}")
+    
+    print("\n   Spoken names")
+    for name in ("Bitcoin", "XBT", "Bitcoin Cash", "Ether", "BTC-USD", "Coin Base"):
+        instrument = REGISTRY.resolve_symbol(name)
+        resolved = REGISTRY.asset(name) or REGISTRY.exchange(name) or (instrument and instrument.symbol)
+        print(f"   {name!r:<16} -> {resolved}")
+    
+    print("\n✅ Symbol registry check completed!")
+
+def demo_replay(path=RECORD_JSONL, base_url=DEFAULT_BASE_URL, speed=1.0, max_in_flight=32):
+    """
+    Replay a recorded JSONL capture against a base URL
+    
+    Args:
+        path: JSONL file written with N8N_RECORD_JSONL
+        base_url: Base URL to replay against
+        speed: Multiplier of the recorded pace, or 'max'
+        max_in_flight: Maximum number of concurrent requests
+    """
+    from recorder import replay, print_replay_summary
+    
+    print(f"\n🔁 Replaying {path} (speed {speed})")
+    print("=" * 60)
+    
+    if not path or not os.path.exists(path):
+        print("   ❌ No recording found, set N8N_RECORD_JSONL and run a demo first")
+        return
+    
+    print_replay_summary(replay(path, base_url, speed, max_in_flight))
+    print("\n✅ Replay completed!")
+
+def demo_upload_benchmark(base_url=DEFAULT_BASE_URL, repetitions=5):
+    """
+    Compare end-to-end latency of audio_url fetch vs direct upload per fixture
+    
+    Args:
+        base_url: Base URL of your n8n instance
+        repetitions: Timed calls per fixture and mode
+    """
+    from latency_stats import LatencyHistogram
+    
+    tester = N8nVoiceTradingTester(base_url)
+    modes = {
+        "url": lambda command: tester.test_voice_command(command['audio_url']),
+        "upload": lambda command: tester.test_voice_command_upload(
+            os.path.join(FIXTURE_DIR, command['audio_file'])),
+    }
+    
+    print("\n📤 URL Fetch vs Direct Upload Benchmark")
+    print("=" * 60)
+    
+    results = []
+    for command in VOICE_COMMANDS:
+        histograms = {mode: LatencyHistogram() for mode in modes}
+        for mode, call in modes.items():
+            call(command)  # Warm up the connection and any server-side caches
+        for _ in range(repetitions):
+            # Interleave modes so drift on the server affects both equally
+            for mode, call in modes.items():
+                call(command)
+                histograms[mode].record(tester.last_latency)
+        results.append((command, histograms))
+    
+    print(f"\n   {'fixture':<22}{'size':>9}{'url p50':>11}{'upload p50':>12}{'saved':>10}")
+    for command, histograms in results:
+        size_kb = os.path.getsize(os.path.join(FIXTURE_DIR, command['audio_file'])) / 1024
+        url_p50 = histograms["url"].percentile(50) * 1000
+        upload_p50 = histograms["upload"].percentile(50) * 1000
+        print(f"   {command['audio_file']:<22}{size_kb:>7.1f}KB{url_p50:>9.1f}ms"
+              f"{upload_p50:>10.1f}ms{url_p50 - upload_p50:>8.1f}ms")
+    
+    print("\n✅ Upload benchmark completed!")
+
+def demo_preprocess_benchmark(base_url=DEFAULT_BASE_URL, repetitions=5):
+    """
+    Compare uploads of the original fixtures with pre-processed 16 kHz mono audio
+    
+    Args:
+        base_url: Base URL of your n8n instance
+        repetitions: Timed calls per fixture and variant
+    """
+    from latency_stats import LatencyHistogram
+    
+    testers = {
+        "original": N8nVoiceTradingTester(base_url),
+        "processed": N8nVoiceTradingTester(base_url, preprocess_audio=True),
+    }
+    
+    print("\n🎚️ Audio Pre-processing Benchmark")
+    print("=" * 60)
+    
+    results = []
+    for command in VOICE_COMMANDS:
+        path = os.path.join(FIXTURE_DIR, command['audio_file'])
+        histograms = {variant: LatencyHistogram() for variant in testers}
+        for tester in testers.values():
+            tester.test_voice_command_upload(path)  # Warm up, and pre-process once
+        for _ in range(repetitions):
+            for variant, tester in testers.items():
+                tester.test_voice_command_upload(path)
+                histograms[variant].record(tester.last_latency)
+        results.append((command, testers["processed"].preprocessed[path], histograms))
+    
+    print(f"\n   {'fixture':<22}{'original':>10}{'processed':>11}{'saved':>8}{'trimmed':>9}"
+          f"{'orig p50':>11}{'proc p50':>11}{'delta':>10}")
+    for command, processed, histograms in results:
+        original_p50 = histograms["original"].percentile(50) * 1000
+        processed_p50 = histograms["processed"].percentile(50) * 1000
+        trimmed = processed['trimmed_leading'] + processed['trimmed_trailing']
+        print(f"   {command['audio_file']:<22}"
+              f"{processed['input_bytes'] / 1024:>8.1f}KB"
+              f"{processed['output_bytes'] / 1024:>9.1f}KB"
+              f"{processed['bytes_saved'] / processed['input_bytes']:>8.0%}"
+              f"{trimmed:>8.2f}s"
+              f"{original_p50:>9.1f}ms{processed_p50:>9.1f}ms"
+              f"{original_p50 - processed_p50:>8.1f}ms")
+    
+    print("\n✅ Pre-processing benchmark completed!")
+
+def demo_concurrent_load(base_url=DEFAULT_BASE_URL, total=200, concurrency=50):
+    """
+    Fire many voice commands concurrently and summarize how the workflow copes
+    
+    Args:
+        base_url: Base URL of your n8n instance
+        total: Number of voice commands to send
+        concurrency: Maximum number of in-flight requests
+    """
+    import asyncio
+    from async_tester import AsyncN8nVoiceTradingTester, run_concurrent, print_load_summary
+    
+    print(f"\n⚡ Concurrent Load Test ({total} voice commands, {concurrency} in flight)")
+    print("=" * 60)
+    
+    async def run():
+        async with AsyncN8nVoiceTradingTester(base_url, connection_limit=concurrency) as tester:
+            def make_call(index):
+                command = VOICE_COMMANDS[index % len(VOICE_COMMANDS)]
+                return tester.test_voice_command(command['audio_url'], user_id=f"load_user_{index}")
+            
+            summary = await run_concurrent(make_call, total, concurrency)
+            summary["stages"] = tester.stage_stats.report()
+            return summary
+    
+    summary = asyncio.run(run())
+    print_load_summary(summary)
+    print("\n🔬 Pipeline Stage Breakdown")
+    print_stage_breakdown(summary["stages"])
+    print("\n✅ Concurrent load testing completed!")
+
+def demo_open_loop_load(base_url=DEFAULT_BASE_URL, rate=20.0, duration=30.0, arrival="poisson"):
+    """
+    Drive the workflow at a fixed arrival rate, independent of response times
+    
+    Args:
+        base_url: Base URL of your n8n instance
+        rate: Target arrival rate in requests per second
+        duration: Length of the run in seconds
+        arrival: 'fixed' or 'poisson' arrival schedule
+    """
+    import asyncio
+    from async_tester import AsyncN8nVoiceTradingTester
+    from load_generator import default_calls, run_open_loop, summarize, print_report
+    
+    print(f"\n📈 Open-Loop Load Test ({rate:.0f} req/s, {arrival} arrivals, {duration:.0f}s)")
+    print("=" * 60)
+    
+    audio_urls = [command['audio_url'] for command in VOICE_COMMANDS]
+    
+    async def run():
+        # No connection limit: queueing must happen in the workflow, not the client
+        async with AsyncN8nVoiceTradingTester(base_url, connection_limit=0) as tester:
+            samples = await run_open_loop(default_calls(tester, audio_urls), rate, duration, arrival)
+            return samples, tester.stage_stats.report()
+    
+    samples, stages = asyncio.run(run())
+    print_report(summarize(samples, rate, duration))
+    print("\n🔬 Pipeline Stage Breakdown")
+    print_stage_breakdown(stages)
+    print("\n✅ Open-loop load testing completed!")
 
 def main():
     """Main demo function"""
@@ -300,23 +1601,82 @@ def main():
     print("🎯 n8n Voice-Activated Trading System - Test Suite")
     print("=" * 60)
     print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Target: {DEFAULT_BASE_URL}")
     
     # Show different testing options
     print("\n🧪 Testing Options:")
     print("1. Run voice command tests (requires n8n instance)")
     print("2. Run error scenario tests")
+    print("3. Run concurrent load test (requires aiohttp)")
+    print("4. Run open-loop load test (requires aiohttp)")
+    print("5. Compare audio_url fetch vs direct upload")
+    print("6. Compare original vs pre-processed audio uploads (requires numpy and ffmpeg)")
+    print("7. Run the full test matrix in parallel")
+    print("8. Replay the N8N_RECORD_JSONL capture")
+    print("9. Compare direct vs cached balance polling")
+    print("10. Compare full vs incremental order sync")
+    print("11. Compare buffered vs streamed order parsing")
+    print("12. Compare sequential vs batched voice commands")
+    print("13. Stream voice commands at microphone pace")
+    print("14. Measure speculative early-intent execution")
+    print("15. Compare balance tail latency with and without hedging")
+    print("16. Check that retried voice commands place one order")
+    print("17. Compare per-request sessions, pooled keep-alive and HTTP/2")
+    print("18. Benchmark the simulated exchange order book")
+    print("19. Check paper-trading balances against orders (mock with --ledger)")
+    print("20. Show pre-trade risk rejections and check cost (mock with --risk-checks)")
+    print("21. Resolve spoken assets and exchanges to exchange symbols")
     
-    choice = input("\nSelect option (1-2) or press Enter to show info: ").strip()
+    choice = input("\nSelect option (1-21) or press Enter to show info: ").strip()
     
     if choice == "1":
-        demo_voice_commands()
+        demo_voice_commands(stats_json=STATS_JSON)
     elif choice == "2":
-        demo_error_scenarios()
+        demo_error_scenarios(stats_json=STATS_JSON)
+    elif choice == "3":
+        demo_concurrent_load()
+    elif choice == "4":
+        demo_open_loop_load()
+    elif choice == "5":
+        demo_upload_benchmark()
+    elif choice == "6":
+        demo_preprocess_benchmark()
+    elif choice == "7":
+        demo_matrix(stats_json=STATS_JSON)
+    elif choice == "8":
+        demo_replay()
+    elif choice == "9":
+        demo_balance_cache()
+    elif choice == "10":
+        demo_order_sync()
+    elif choice == "11":
+        demo_streaming_orders()
+    elif choice == "12":
+        demo_batch_voice_commands()
+    elif choice == "13":
+        demo_streaming_voice_commands()
+    elif choice == "14":
+        demo_speculation()
+    elif choice == "15":
+        demo_resilience()
+    elif choice == "16":
+        demo_idempotency()
+    elif choice == "17":
+        demo_connection_pool()
+    elif choice == "18":
+        demo_matching_engine()
+    elif choice == "19":
+        demo_paper_trading()
+    elif choice == "20":
+        demo_risk_checks()
+    elif choice == "21":
+        demo_symbol_registry()
     else:
         # Show info
         print("\n" + "=" * 60)
         print("To run the actual voice command and error tests:")
-        print("1. Update the base_url in the script")
+        print("1. Update the base_url in the script, or set N8N_BASE_URL")
+        print("   (e.g. N8N_BASE_URL=http://127.0.0.1:5678 with python mock_n8n_server.py running)")
         print("2. Uncomment the test calls below")
         print("3. Run: python test-n8n-workflow.py")
         
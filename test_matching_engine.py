@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Regression tests for matching_engine.py
+
+Run with: python -m pytest test_matching_engine.py
+"""
+
+import random
+import threading
+
+from matching_engine import QUANTITY_DECIMALS, OrderBook
+
+# Seconds a fuzz run may take before it counts as hung
+TIMEOUT = 30
+
+
+def run_with_timeout(target):
+    """Run target in a daemon thread, failing if it does not finish in TIMEOUT"""
+    errors = []
+
+    def run():
+        try:
+            target()
+        except Exception as e:  # noqa: BLE001 - re-raised in the test thread
+            errors.append(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(TIMEOUT)
+    assert not thread.is_alive(), f"order book still matching after {TIMEOUT}s"
+    if errors:
+        raise errors[0]
+
+
+def assert_consistent(book):
+    """Every level's volume is the sum of its orders' remaining quantities"""
+    for side, levels in book.levels.items():
+        for price, level in levels.items():
+            remaining = sum(order.remaining for order in level.orders if order.remaining > 0)
+            assert abs(level.volume - remaining) < 10 ** -QUANTITY_DECIMALS, (side, price, level.volume, remaining)
+
+
+def test_quantities_are_rounded_on_entry():
+    book = OrderBook("BTCUSDT")
+    order, _ = book.submit("s1", "SELL", 0.098819875, 100.5)
+    assert order.quantity == order.remaining == round(0.098819875, QUANTITY_DECIMALS)
+    assert book.levels["SELL"][100.5].volume == order.remaining
+
+
+def test_fill_of_fractional_level_does_not_hang():
+    def trade():
+        book = OrderBook("BTCUSDT")
+        book.submit("s1", "SELL", 0.098819875, 100.5)
+        book.submit("s2", "SELL", 0.0000000149, 100.5)
+        order, fills = book.submit("b1", "BUY", 0.2898, 101)
+        assert order.status == "PARTIALLY_FILLED"
+        assert sum(fill.quantity for fill in fills) == book.orders["b1"].filled
+        assert book.best_ask() is None
+        assert book.best_bid() == 101
+
+    run_with_timeout(trade)
+
+
+def test_fuzz_fractional_quantities_does_not_hang():
+    def fuzz():
+        for seed in range(20):
+            rng = random.Random(seed)
+            book = OrderBook("BTCUSDT")
+            for order_id in range(2000):
+                quantity = round(rng.uniform(0.0001, 0.5), rng.choice((4, 8, 9, 10, 12)))
+                price = None if rng.random() < 0.2 else round(rng.uniform(99, 102) * 2) / 2
+                book.submit(order_id, rng.choice(("BUY", "SELL")), quantity, price)
+                if book.orders and rng.random() < 0.2:
+                    book.cancel(rng.choice(list(book.orders)))
+            assert_consistent(book)
+
+    run_with_timeout(fuzz)
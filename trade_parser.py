@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Deterministic parser for spoken trade commands
+
+Turns transcripts such as "Buy 0.5 Bitcoin on Binance at market price" or
+"Place a limit order to buy 1 BTC at $45,000 on Binance" into the same intent
+structure the workflow's LLM parsing step produces:
+
+    {"side": "BUY", "quantity": 0.5, "asset": "BTC", "order_type": "MARKET",
+     "price": None, "exchange": "binance"}
+
+It handles digits and number words ("zero point five", "half a", "ten"),
+currency formats ("$3,200", "45k", "3200 dollars"), and the asset and
+exchange names of symbol_registry.py, including multi-word ones ("bitcoin
+cash", "coin base"). Anything it cannot parse unambiguously returns None so
+the caller can fall back to the LLM.
+
+Usage:
+    python trade_parser.py            # parse the expected transcripts and benchmark
+"""
+
+import re
+import timeit
+
+from symbol_registry import REGISTRY
+
+SIDE_WORDS = {
+    "buy": "BUY", "purchase": "BUY", "long": "BUY", "acquire": "BUY",
+    "sell": "SELL", "short": "SELL", "dump": "SELL",
+}
+
+UNITS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "thirteen": 13, "fourteen": 14, "fifteen": 15, "sixteen": 16,
+    "seventeen": 17, "eighteen": 18, "nineteen": 19,
+}
+TENS = {
+    "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50,
+    "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+}
+SCALES = {"hundred": 100, "thousand": 1_000, "million": 1_000_000}
+FRACTIONS = {"half": 0.5, "quarter": 0.25}
+SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+PRICE_MARKERS = {"at", "for", "@", "price", "of"}
+CURRENCY_WORDS = {"dollars", "dollar", "usd", "usdt", "bucks"}
+ARTICLES = {"a", "an"}
+
+TOKEN_PATTERN = re.compile(r"(\$)?(\d+(?:,\d{3})*(?:\.\d+)?|\.\d+)([km])?\b|[a-z]+|@")
+
+
+class Number:
+    """Numeric token with the flags the grammar cares about"""
+
+    __slots__ = ("value", "currency")
+
+    def __init__(self, value, currency=False):
+        self.value = value
+        self.currency = currency
+
+
+def tokenize(text):
+    """
+    Split a transcript into words and Number tokens
+
+    Digits keep their '$' prefix and 'k'/'m' suffix; runs of number words
+    ("one hundred twenty five", "zero point five") become a single Number.
+    """
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        dollar, digits, suffix = match.groups()
+        if digits is None:
+            tokens.append(match.group(0))
+            continue
+        value = float(digits.replace(",", ""))
+        if suffix:
+            value *= SUFFIXES[suffix]
+        tokens.append(Number(value, currency=bool(dollar)))
+    return _merge_number_words(tokens)
+
+
+def _merge_number_words(tokens):
+    """Replace runs of spoken number words with Number tokens"""
+    merged = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if isinstance(token, str) and token in FRACTIONS:
+            # "half a bitcoin", "a quarter bitcoin"
+            if merged and merged[-1] in ARTICLES:
+                merged.pop()
+            merged.append(Number(FRACTIONS[token]))
+            i += 1
+            if i < len(tokens) and tokens[i] in ARTICLES:
+                i += 1
+            continue
+
+        if not (isinstance(token, str) and (token in UNITS or token in TENS)):
+            merged.append(token)
+            i += 1
+            continue
+
+        total, current = 0, 0
+        while i < len(tokens) and isinstance(tokens[i], str):
+            word = tokens[i]
+            if word in UNITS:
+                current += UNITS[word]
+            elif word in TENS:
+                current += TENS[word]
+            elif word in SCALES:
+                current = max(current, 1) * SCALES[word]
+                if SCALES[word] >= 1000:
+                    total, current = total + current, 0
+            elif word == "and" and i + 1 < len(tokens) and tokens[i + 1] in UNITS:
+                pass
+            else:
+                break
+            i += 1
+        value = float(total + current)
+
+        # "zero point five", "three point two k"
+        if i + 1 < len(tokens) and tokens[i] == "point" and tokens[i + 1] in UNITS:
+            digits = []
+            i += 1
+            while i < len(tokens) and isinstance(tokens[i], str) and tokens[i] in UNITS and UNITS[tokens[i]] < 10:
+                digits.append(str(UNITS[tokens[i]]))
+                i += 1
+            value += float("0." + "".join(digits))
+        merged.append(Number(value))
+    return merged
+
+
+def parse_trade_command(text, default_exchange=None):
+    """
+    Parse a spoken trade command
+
+    Args:
+        text: Transcript of the voice command
+        default_exchange: Exchange to use when the transcript names none
+
+    Returns:
+        Intent dict with side, quantity, asset, order_type, price and
+        exchange, or None when the transcript is not an unambiguous trade
+    """
+    tokens = tokenize(text)
+
+    side = asset = exchange = None
+    asset_index = None
+    wants_market = wants_limit = False
+    for index, token in enumerate(tokens):
+        if not isinstance(token, str):
+            continue
+        if token in SIDE_WORDS:
+            if side is not None and SIDE_WORDS[token] != side:
+                return None
+            side = SIDE_WORDS[token]
+        elif token == "market":
+            wants_market = True
+        elif token == "limit":
+            wants_limit = True
+        else:
+            if asset_index is None:
+                asset, _ = REGISTRY.match_asset(tokens, index)
+                if asset is not None:
+                    asset_index = index
+                    continue
+            named, _ = REGISTRY.match_exchange(tokens, index)
+            exchange = named or exchange
+
+    if side is None or asset is None:
+        return None
+
+    # Quantity: the number right before the asset ("0.5 bitcoin", "a bitcoin")
+    quantity = None
+    quantity_index = asset_index - 1
+    if quantity_index >= 0 and tokens[quantity_index] == "of":
+        quantity_index -= 1
+    if quantity_index >= 0:
+        before = tokens[quantity_index]
+        if isinstance(before, Number) and not before.currency:
+            quantity = before.value
+        elif before in ARTICLES:
+            quantity = 1.0
+    if not quantity:
+        return None
+
+    # Price: a currency amount, or a number after 'at'/'for'/'price' or before 'dollars'
+    price = None
+    for index, token in enumerate(tokens):
+        if not isinstance(token, Number) or index == quantity_index:
+            continue
+        previous = tokens[index - 1] if index > 0 else None
+        following = tokens[index + 1] if index + 1 < len(tokens) else None
+        if token.currency or previous in PRICE_MARKERS or following in CURRENCY_WORDS:
+            price = token.value
+            break
+
+    if wants_market and price is None:
+        order_type = "MARKET"
+    elif price is not None and not wants_market:
+        order_type = "LIMIT"
+    elif wants_market or wants_limit:
+        return None  # "limit" without a price, or both a market and a limit price
+    else:
+        order_type = "MARKET"
+
+    exchange = exchange or default_exchange
+    if exchange is None:
+        return None
+
+    return {
+        "side": side,
+        "quantity": quantity,
+        "asset": asset,
+        "order_type": order_type,
+        "price": price,
+        "exchange": exchange,
+    }
+
+
+BENCHMARK_CASES = [
+    ("Buy 0.5 Bitcoin on Binance at market price",
+     {"side": "BUY", "quantity": 0.5, "asset": "BTC", "order_type": "MARKET", "price": None, "exchange": "binance"}),
+    ("Sell 10 ETH at $3,200 on Coinbase",
+     {"side": "SELL", "quantity": 10.0, "asset": "ETH", "order_type": "LIMIT", "price": 3200.0, "exchange": "coinbase"}),
+    ("Place a limit order to buy 1 BTC at $45,000 on Binance",
+     {"side": "BUY", "quantity": 1.0, "asset": "BTC", "order_type": "LIMIT", "price": 45000.0, "exchange": "binance"}),
+    ("buy zero point five bitcoin on binance at market price",
+     {"side": "BUY", "quantity": 0.5, "asset": "BTC", "order_type": "MARKET", "price": None, "exchange": "binance"}),
+    ("Sell ten ether for 3.2k dollars on Coinbase",
+     {"side": "SELL", "quantity": 10.0, "asset": "ETH", "order_type": "LIMIT", "price": 3200.0, "exchange": "coinbase"}),
+    ("Buy half a bitcoin at forty five thousand dollars on Binance",
+     {"side": "BUY", "quantity": 0.5, "asset": "BTC", "order_type": "LIMIT", "price": 45000.0, "exchange": "binance"}),
+    ("Sell two bitcoin cash at market on coin base",
+     {"side": "SELL", "quantity": 2.0, "asset": "BCH", "order_type": "MARKET", "price": None, "exchange": "coinbase"}),
+    ("What is the weather like today", None),
+]
+
+
+def main():
+    print("🧮 Trade command parser")
+    print("=" * 60)
+
+    failures = 0
+    for text, expected in BENCHMARK_CASES:
+        parsed = parse_trade_command(text)
+        status = "✅" if parsed == expected else "❌"
+        failures += parsed != expected
+        print(f"{status} {text}")
+        print(f"   -> {parsed}")
+
+    print("\n⏱️ Microbenchmark")
+    print("-" * 30)
+    repeat = 20000
+    for text, _ in BENCHMARK_CASES:
+        seconds = min(timeit.repeat(lambda: parse_trade_command(text), number=repeat, repeat=3))
+        print(f"   {seconds / repeat * 1e6:7.2f} µs  {text}")
+
+    if failures:
+        print(f"\n❌ {failures} transcript(s) parsed differently than expected")
+
+
+if __name__ == "__main__":
+    main()
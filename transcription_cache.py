@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Content-addressed transcription cache for the n8n Voice-Activated Trading System
+
+Transcriptions (and the trade intent parsed from them) are stored on disk under
+the SHA-256 of the audio bytes, so the same recording is only sent through
+speech-to-text once. Entries expire after a TTL and the least recently used
+entries are evicted once the cache holds more than max_entries recordings.
+Recency is tracked through file modification times, so several processes (the
+tester and mock_n8n_server.py) can share one cache directory.
+
+Layout:
+    <directory>/audio/<sha256>.json   transcription entries
+    <directory>/urls/<sha256(url)>.json   audio URL -> audio sha256 aliases
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL = 7 * 24 * 3600
+
+
+def hash_audio(data):
+    """SHA-256 hex digest of audio bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_audio_file(path, chunk_size=64 * 1024):
+    """SHA-256 hex digest of an audio file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TranscriptionCache:
+    """On-disk LRU + TTL cache of transcriptions keyed by audio hash"""
+
+    def __init__(self, directory=".transcription_cache", max_entries=1000, ttl=DEFAULT_TTL):
+        """
+        Args:
+            directory: Cache directory, created if missing
+            max_entries: Maximum number of cached recordings
+            ttl: Seconds an entry stays valid after it was stored
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self.audio_dir = os.path.join(directory, "audio")
+        self.url_dir = os.path.join(directory, "urls")
+        os.makedirs(self.audio_dir, exist_ok=True)
+        os.makedirs(self.url_dir, exist_ok=True)
+
+        # digest -> None, ordered from least to most recently used
+        self.recency = OrderedDict()
+        entries = []
+        for name in os.listdir(self.audio_dir):
+            if name.endswith(".json"):
+                path = os.path.join(self.audio_dir, name)
+                entries.append((os.path.getmtime(path), name[:-len(".json")]))
+        for _, digest in sorted(entries):
+            self.recency[digest] = None
+
+    def _entry_path(self, digest):
+        return os.path.join(self.audio_dir, f"{digest}.json")
+
+    def _url_path(self, url):
+        return os.path.join(self.url_dir, f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json")
+
+    def _read(self, path):
+        """Load a JSON file, None if it is missing, unreadable or expired"""
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("created", 0) > self.ttl:
+            return None
+        return entry
+
+    def _write(self, path, entry):
+        """Atomically write a JSON file"""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def _remove(self, digest):
+        self.recency.pop(digest, None)
+        try:
+            os.remove(self._entry_path(digest))
+        except OSError:
+            pass
+
+    def get(self, digest):
+        """
+        Look up a transcription by audio hash
+
+        Args:
+            digest: SHA-256 hex digest of the audio bytes
+
+        Returns:
+            Dict with 'transcription', 'intent' and 'created', or None on a miss
+        """
+        with self.lock:
+            path = self._entry_path(digest)
+            entry = self._read(path)
+            if entry is None:
+                self._remove(digest)
+                self.misses += 1
+                return None
+
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            self.recency[digest] = None
+            self.recency.move_to_end(digest)
+            self.hits += 1
+            return entry
+
+    def put(self, digest, transcription, intent=None):
+        """
+        Store a transcription and its parsed trade intent
+
+        Args:
+            digest: SHA-256 hex digest of the audio bytes
+            transcription: Speech-to-text result
+            intent: Parsed trade intent, None if the audio is not a trade
+        """
+        entry = {
+            "digest": digest,
+            "transcription": transcription,
+            "intent": intent,
+            "created": time.time(),
+        }
+        with self.lock:
+            self._write(self._entry_path(digest), entry)
+            self.recency[digest] = None
+            self.recency.move_to_end(digest)
+            while len(self.recency) > self.max_entries:
+                oldest = next(iter(self.recency))
+                self._remove(oldest)
+
+    def lookup_url(self, url):
+        """Audio hash previously recorded for a URL, None if unknown or expired"""
+        entry = self._read(self._url_path(url))
+        return entry["digest"] if entry else None
+
+    def remember_url(self, url, digest):
+        """Record which audio hash a URL served, so it need not be downloaded again"""
+        self._write(self._url_path(url), {"url": url, "digest": digest, "created": time.time()})
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.recency),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
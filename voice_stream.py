@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Streaming voice commands over Server-Sent Events
+
+stream_voice_command() plays a recording into /webhook/voice-command/stream
+the way a live microphone would: the file is sent as a chunked body in
+small slices, paced to the audio's real duration. The response is read at the
+same time on the same connection, so partial transcripts and an early intent
+arrive while the audio is still being sent. The timeline of every event is
+recorded to measure time-to-first-partial and time-to-final-intent. With
+speculate=True the workflow executes intents from partial transcripts early
+and commits or rolls them back once the final transcript is known.
+
+Only the standard library is used: http.client lets one thread keep sending
+the body while another reads the response.
+
+Usage:
+    python voice_stream.py buy_btc_binance.m4a --base-url http://127.0.0.1:5678
+"""
+
+import argparse
+import http.client
+import json
+import os
+import struct
+import threading
+import time
+from urllib.parse import urlencode, urlparse
+
+from multipart_body import AUDIO_CONTENT_TYPES
+
+# Used to estimate the duration of recordings that are not MP4/M4A
+FALLBACK_BITRATE = 128_000
+
+
+def mp4_duration(path):
+    """
+    Duration of an MP4/M4A file from its movie header box
+
+    Returns:
+        Seconds, None if the file has no readable 'moov/mvhd' box
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    def boxes(start, end):
+        offset = start
+        while offset + 8 <= end:
+            size, kind = struct.unpack_from(">I4s", data, offset)
+            header = 8
+            if size == 1:
+                size = struct.unpack_from(">Q", data, offset + 8)[0]
+                header = 16
+            elif size == 0:
+                size = end - offset
+            if size < header:
+                return
+            yield kind, offset + header, offset + size
+            offset += size
+
+    for kind, start, end in boxes(0, len(data)):
+        if kind != b"moov":
+            continue
+        for child, child_start, _ in boxes(start, end):
+            if child != b"mvhd":
+                continue
+            version = data[child_start]
+            if version == 1:
+                timescale, duration = struct.unpack_from(">IQ", data, child_start + 20)
+            else:
+                timescale, duration = struct.unpack_from(">II", data, child_start + 12)
+            return duration / timescale if timescale else None
+    return None
+
+
+def audio_duration(path):
+    """Duration of a recording in seconds, estimated from its size for non-MP4 files"""
+    try:
+        duration = mp4_duration(path)
+    except (OSError, struct.error):
+        duration = None
+    return duration or os.path.getsize(path) * 8 / FALLBACK_BITRATE
+
+
+def iter_sse(response):
+    """
+    Yield (event, data) pairs from a text/event-stream response
+
+    'data' is decoded as JSON; events without data are skipped.
+    """
+    event, data = "message", []
+    for raw in response:
+        line = raw.decode("utf-8").rstrip("\r\n")
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith(":"):
+            continue
+        else:
+            field, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+            if field == "event":
+                event = value
+            elif field == "data":
+                data.append(value)
+
+
+def stream_voice_command(base_url, audio_path, user_id="test_user", chunk_ms=100, speed=1.0,
+                         on_event=None, timeout=60, speculate=False, default_exchange=None):
+    """
+    Stream a recording to the workflow and collect its events
+
+    Args:
+        base_url: Base URL of the workflow
+        audio_path: Local recording to play
+        user_id: User identifier
+        chunk_ms: Audio duration sent per chunk
+        speed: 1.0 sends at real-time pace, 2.0 twice as fast, 0 as fast as possible
+        on_event: Optional callable (seconds, event, data) called for every event
+        timeout: Socket timeout in seconds
+        speculate: Let the workflow execute intents from partial transcripts
+        default_exchange: Exchange speculation assumes until one is spoken
+
+    Returns:
+        Dict with the event timeline, the milestone times in seconds since
+        the first audio byte (first_partial, early_intent, final_intent,
+        result, audio_sent), the audio duration and the final result
+    """
+    url = urlparse(base_url.rstrip("/"))
+    connection_class = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+    connection = connection_class(url.hostname, url.port, timeout=timeout)
+
+    size = os.path.getsize(audio_path)
+    duration = audio_duration(audio_path)
+    chunk_size = max(1, int(size * chunk_ms / 1000 / duration))
+    params = {"user_id": user_id, "audio_name": os.path.basename(audio_path), "audio_length": size}
+    if speculate:
+        params["speculate"] = 1
+    if default_exchange:
+        params["default_exchange"] = default_exchange
+    query = urlencode(params)
+    content_type = AUDIO_CONTENT_TYPES.get(os.path.splitext(audio_path)[1].lower(), "application/octet-stream")
+
+    connection.putrequest("POST", f"{url.path}/webhook/voice-command/stream?{query}")
+    connection.putheader("Content-Type", content_type)
+    connection.putheader("Transfer-Encoding", "chunked")
+    connection.putheader("Accept", "text/event-stream")
+    connection.endheaders()
+    # getresponse() detaches the socket from a Connection: close response, so
+    # the sender keeps its own reference instead of going through connection.send()
+    sock = connection.sock
+
+    summary = {"audio_duration": duration, "audio_bytes": size, "events": [],
+               "first_partial": None, "early_intent": None, "final_intent": None,
+               "result": None, "audio_sent": None, "error": None}
+    started = time.monotonic()
+
+    def send_audio():
+        try:
+            with open(audio_path, "rb") as f:
+                for index, chunk in enumerate(iter(lambda: f.read(chunk_size), b"")):
+                    if speed:
+                        delay = started + index * chunk_ms / 1000 / speed - time.monotonic()
+                        if delay > 0:
+                            time.sleep(delay)
+                    sock.sendall(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            sock.sendall(b"0\r\n\r\n")
+            summary["audio_sent"] = time.monotonic() - started
+        except OSError as e:
+            summary["error"] = f"Sending audio failed: {e}"
+
+    sender = threading.Thread(target=send_audio, daemon=True)
+    sender.start()
+    response = None
+    try:
+        response = connection.getresponse()
+        if response.status != 200:
+            summary["error"] = f"HTTP {response.status}"
+            return summary
+
+        for event, data in iter_sse(response):
+            elapsed = time.monotonic() - started
+            summary["events"].append((elapsed, event, data))
+            if on_event is not None:
+                on_event(elapsed, event, data)
+
+            if event == "partial" and summary["first_partial"] is None:
+                summary["first_partial"] = elapsed
+            elif event == "intent":
+                key = "early_intent" if data.get("early") else "final_intent"
+                summary[key] = elapsed
+                summary[f"{key}_value"] = data.get("intent")
+            elif event == "result":
+                summary["result"] = elapsed
+                summary["response"] = data
+            elif event == "error":
+                summary["error"] = data.get("error")
+                summary["response"] = data
+    finally:
+        sender.join(timeout)
+        if response is not None:
+            response.close()
+        connection.close()
+    return summary
+
+
+def print_stream_summary(summary):
+    """Print the milestones of one stream_voice_command() run"""
+    def ms(value):
+        return f"{value * 1000:8.0f}ms" if value is not None else "       -  "
+
+    print(f"   Audio:           {summary['audio_duration']:.2f}s, {summary['audio_bytes']:,} bytes")
+    print(f"   First partial:   {ms(summary['first_partial'])}")
+    print(f"   Early intent:    {ms(summary['early_intent'])}")
+    print(f"   Final intent:    {ms(summary['final_intent'])}")
+    print(f"   Result:          {ms(summary['result'])}")
+    if summary["final_intent"] is not None and summary["audio_sent"] is not None:
+        print(f"   After speech:    {ms(summary['final_intent'] - summary['audio_sent'])} "
+              f"from the last audio byte to the final intent")
+    if summary["error"]:
+        print(f"   ❌ {summary['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a recording as a live voice command")
+    parser.add_argument("audio", help="Recording to stream")
+    parser.add_argument("--base-url", default=os.environ.get("N8N_BASE_URL", "http://127.0.0.1:5678"))
+    parser.add_argument("--user-id", default="test_user")
+    parser.add_argument("--chunk-ms", type=int, default=100)
+    parser.add_argument("--speed", type=float, default=1.0, help="Pace multiplier, 0 sends as fast as possible")
+    args = parser.parse_args()
+
+    def show(elapsed, event, data):
+        detail = data.get("transcription") if event in ("partial", "transcript") else data.get("intent", data)
+        print(f"   {elapsed * 1000:8.0f}ms  {event:<10} {detail}")
+
+    print(f"🎙️ Streaming {args.audio} to {args.base_url}")
+    summary = stream_voice_command(args.base_url, args.audio, args.user_id, args.chunk_ms, args.speed, show)
+    print()
+    print_stream_summary(summary)
+
+
+if __name__ == "__main__":
+    main()